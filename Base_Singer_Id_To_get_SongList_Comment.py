@@ -13,19 +13,32 @@
 # --- 模块导入 ---
 import requests  # 用于发送HTTP网络请求
 import sqlite3  # 用于操作SQLite数据库
-import time  # 用于实现程序延时，防止请求过快被封
+import argparse  # 用于解析命令行参数(如 --refresh、--resume、--frontier)
+import itertools  # 续抓时跳过已处理的歌曲
+import time  # 用于记录歌手的抓取时间
 import json  # 用于处理JSON格式的数据
 import os  # 用于操作系统级别的功能，如创建目录、检查文件路径
 import hashlib  # 用于计算文件的MD5值，校验文件完整性
 import sys  # 用于访问系统特定的参数和功能，如此处的错误输出
-import base64  # 用于解码API返回的Base64编码的歌词
+
+import qq_music_client as client  # 共用的连接池HTTP客户端
+import qq_music_api  # musicu.fcg 多模块请求打包与响应拆分
+import qq_music_coalesce  # 按歌曲 mid 合并重复请求
+import qq_music_comments  # 评论分页获取(支持增量同步)
+import qq_music_stages as stages  # 逐首歌曲的阶段完成状态
+import qq_music_ledger as ledger  # 可续抓的抓取台账
+import qq_music_frontier as frontier  # 从合作歌手中发现新歌手的抓取边界
 
 # --- 全局配置 (Global Configuration) ---
 
 # 1. 数据库和文件存储配置
 DB_FILE = 'qq_music_library_final.db'  # 定义数据库文件的名称
+LEDGER_FILE = 'qq_music_ledger_base.db'  # 本脚本的抓取台账，与共用 DB_FILE 的 Except_tags&MP3.py 互不干扰
 MUSIC_STORAGE_DIR = 'qq_music_library_final'  # 定义存放音乐文件和封面的主目录
 COVER_STORAGE_DIR = os.path.join(MUSIC_STORAGE_DIR, 'covers')  # 封面图片的专属子目录
+# 'songs' 表中可能缺失、需要补建的列 (列名, 类型)
+SONG_EXTRA_COLUMNS = (('tags', 'TEXT'), ('lrc', 'TEXT'), ('file_path', 'TEXT'), ('file_size', 'INTEGER'),
+                      ('file_md5', 'TEXT'))
 
 # 2. 起始歌手ID列表 (STARTING_ARTIST_IDS)
 # 这是爬虫的入口点。程序将依次处理这个列表中的每一个歌手。
@@ -35,19 +48,28 @@ STARTING_ARTIST_IDS = [
     # "0025NhlN2yWrP4", # 周杰伦 Jay Chou (示例)
 ]
 
-# 3. 伪装请求头 (Request Headers)
-# 模拟浏览器发送请求，这是反爬虫策略中最基本的一步。
-# 'User-Agent' 告诉服务器我们是普通用户通过浏览器访问。
-# 'Referer' 告诉服务器请求是从QQ音乐官网页面跳转过来的，增加请求的“合法性”。
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36',
-    'Referer': 'https://y.qq.com/',
-    'Content-Type': 'application/json'  # 明确告诉服务器我们发送的是JSON格式数据
-}
+# 3. 网络请求配置
+# 伪装请求头、连接池(keep-alive)和超时时间统一由 qq_music_client 模块管理，
+# 所有请求都通过按主机复用的 Session 发出，避免每次请求都重新握手。
 
 # 4. 评论抓取配置 (Comment Fetching Settings)
-COMMENTS_PER_PAGE = 25  # 每次API请求获取的评论数量
+COMMENTS_PER_PAGE = 25  # 每次API请求获取的最少评论数量；实际页大小由 qq_music_comments 自动探测(可达 PROBE_PAGE_SIZE)
 MAX_COMMENTS_PER_SONG = 200  # 每首歌最多抓取的评论总数，防止无限抓取
+INCREMENTAL_COMMENTS = True  # 增量同步: 库中已有评论的歌曲只获取新评论，遇到整页都已存储时停止翻页
+
+# 5. 批量请求配置
+# 每处理一页歌曲前，把这一页所有歌曲的详情和歌词子请求打包进一个 musicu.fcg 请求中预先获取。
+SONG_BATCH_SIZE = 20
+
+# 6. 抓取阶段配置
+# 每首歌依次执行的阶段，完成情况记录在 'song_stages' 表中；重跑时只执行缺失(或已过期)的阶段。
+SONG_STAGES = (stages.STAGE_LISTED, stages.STAGE_TAGS, stages.STAGE_COVER, stages.STAGE_COMMENTS,
+               stages.STAGE_LYRICS, stages.STAGE_FILE)
+
+# 7. 抓取边界配置 (--frontier 模式)
+# 从 STARTING_ARTIST_IDS (或 --seeds 指定的CSV) 出发，按广度优先逐层抓取歌曲中出现的合作歌手。
+FRONTIER_MAX_ARTISTS = 50  # 每次运行最多抓取的歌手数，None 表示直到队列为空
+FRONTIER_MAX_DEPTH = 2  # 最多扩展到第几层合作歌手(种子为第0层)，None 表示不限制
 
 
 # --- 数据库与文件操作核心函数 (Core DB & File Functions) ---
@@ -56,7 +78,7 @@ def init_environment():
     """
     初始化程序运行环境。
     1. 检查并创建主存储目录和封面子目录，如果它们不存在。
-    2. 连接或创建SQLite数据库，并执行建表语句，确保'songs'和'comments'表结构正确。
+    2. 连接或创建SQLite数据库，并执行建表语句，确保'songs'、'comments'、'artists'、'song_stages'、台账和抓取边界表结构正确。
     这个函数在主程序开始时调用，确保万事俱备。
     """
     # 检查并创建目录
@@ -89,6 +111,11 @@ def init_environment():
                 file_size INTEGER,
                 file_md5 TEXT
             )''')
+            # 库可能由 Except_tags&MP3.py 创建，它的 'songs' 表没有音频文件相关的列，这里补上
+            existing_columns = {row[1] for row in cursor.execute("PRAGMA table_info(songs)")}
+            for column, column_type in SONG_EXTRA_COLUMNS:
+                if column not in existing_columns:
+                    cursor.execute(f"ALTER TABLE songs ADD COLUMN {column} {column_type}")
 
             # --- 创建 'comments' 表 ---
             # 'song_id' 设置为外键 (FOREIGN KEY)，关联到 'songs' 表的主键。
@@ -104,11 +131,38 @@ def init_environment():
                 FOREIGN KEY (song_id) REFERENCES songs (song_id)
             )''')
 
+            # --- 创建 'artists' 表 ---
+            # 记录每位歌手上次抓取时的 totalNum、最新发布的歌曲和抓取时间，供 --refresh 增量刷新时比对。
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS artists (
+                singer_mid TEXT PRIMARY KEY,
+                artist_name TEXT,
+                total_num INTEGER,
+                newest_song_id TEXT,
+                newest_song_name TEXT,
+                last_crawled_at REAL
+            )''')
+
             # --- 创建索引 (Indexes) ---
             # 索引可以极大地提升查询速度，特别是对于经常用于查询条件的字段。
             # 这里为评论表的 'song_id' 和 'liked_count' 创建索引。
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_comments_song_id ON comments (song_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_comments_liked_count ON comments (liked_count DESC)')
+            # 增量同步评论时按歌曲查询最新评论时间，(song_id, comment_time) 索引让这个查询无需扫表
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_comments_song_time ON comments (song_id, comment_time)')
+
+            # --- 创建 'song_stages' 表 ---
+            # 记录每首歌各阶段的完成时间；旧数据库第一次运行时根据已有的列回填。
+            stages.init_table(cursor, SONG_STAGES)
+
+            # --- 创建抓取台账表 'crawl_jobs'、'crawl_listing' (在本脚本单独的台账数据库中) ---
+            # 记录每位歌手的歌曲列表和处理进度，供 --resume 从中断处继续。
+            with sqlite3.connect(LEDGER_FILE) as ledger_conn:
+                ledger.init_tables(ledger_conn.cursor())
+
+            # --- 创建抓取边界表 'frontier_artists'、'frontier_songs' ---
+            # 持久化的已访问歌手集合与待抓队列，供 --frontier 模式逐步扩展。
+            frontier.init_tables(cursor)
 
             conn.commit()  # 提交事务，使建表和建索引操作生效
             print(f"数据库 '{DB_FILE}' 初始化或检查完成。")
@@ -141,6 +195,46 @@ def execute_db_query(query, params=(), fetch=None):
         return None
 
 
+def get_artist_snapshot(artist_id):
+    """
+    读取歌手上次抓取时记录的快照。
+    :param artist_id: str, 歌手的 mid。
+    :return: (total_num, newest_song_id) 元组，没有记录时返回 (None, None)。
+    """
+    row = execute_db_query("SELECT total_num, newest_song_id FROM artists WHERE singer_mid = ?",
+                           (artist_id,), fetch='one')
+    return row if row else (None, None)
+
+
+def get_stored_comment_state(song_id):
+    """
+    读取数据库中某首歌已存储的评论，用于增量同步。
+    :param song_id: str, 歌曲的 mid。
+    :return: (已有评论ID的集合, 最新评论时间) 元组，该歌曲还没有评论时返回 (None, None)。
+    """
+    rows = execute_db_query("SELECT comment_id FROM comments WHERE song_id = ?", (song_id,), fetch='all')
+    if not rows:
+        return None, None
+    newest = execute_db_query("SELECT MAX(comment_time) FROM comments WHERE song_id = ?", (song_id,), fetch='one')
+    return {row[0] for row in rows}, newest[0] if newest else None
+
+
+def save_artist_snapshot(artist_id, song_stream):
+    """
+    一位歌手的歌曲全部处理完毕后，记录本次看到的 totalNum、最新歌曲和抓取时间。
+    :param artist_id: str, 歌手的 mid。
+    :param song_stream: qq_music_api.ArtistSongStream / SongListing, 本次的歌曲列表。
+    """
+    newest_song = song_stream.newest_song
+    execute_db_query('''
+        INSERT OR REPLACE INTO artists
+            (singer_mid, artist_name, total_num, newest_song_id, newest_song_name, last_crawled_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (artist_id, song_stream.artist_name, song_stream.total_num, newest_song.mid if newest_song else None,
+          newest_song.name if newest_song else None, time.time()))
+
+
+@qq_music_coalesce.coalesced('cover')
 def download_cover(song_name, song_id, cover_url):
     """
     根据给定的URL下载封面图片，并保存到 'covers' 目录。
@@ -154,7 +248,7 @@ def download_cover(song_name, song_id, cover_url):
         return None
     try:
         # 使用 stream=True 进行流式下载，特别适合大文件，可以避免一次性将所有内容读入内存。
-        response = requests.get(cover_url, headers=HEADERS, stream=True, timeout=30)
+        response = client.get(cover_url, stream=True, timeout=30)
         response.raise_for_status()  # 如果请求返回错误状态码(如404, 500)，则会抛出异常。
 
         # 清理文件名中的非法字符，防止创建文件时出错。
@@ -186,7 +280,7 @@ def download_file(song_name, song_id, download_url):
         print(f"  -> 歌曲 '{song_name}' 的下载链接为空，跳过下载。")
         return None
     try:
-        response = requests.get(download_url, headers=HEADERS, stream=True, timeout=60)
+        response = client.get(download_url, stream=True, timeout=60)
         response.raise_for_status()
 
         safe_song_name = "".join(i for i in song_name if i not in r'\/:*?"<>|')
@@ -214,98 +308,16 @@ def download_file(song_name, song_id, download_url):
 
 # --- QQ音乐API请求函数 (QQ Music API Functions) ---
 
-def get_artist_songs_api(artist_id):
-    """
-    通过歌手ID，分页获取其名下的所有歌曲列表。
-    这是整个爬虫的数据来源。
-    :param artist_id: str, 歌手的 mid，如陈奕迅的 '003Nz2So3XXYek'。
-    :return: 成功则返回包含歌手名和歌曲列表的字典，失败则返回None。
-    """
-    print(f"\n正在获取歌手详情: ID={artist_id}")
-    url = 'https://u.y.qq.com/cgi-bin/musicu.fcg'  # QQ音乐通用数据接口
-    all_songs = []  # 用于存储所有获取到的歌曲信息
-    page_num = 0  # 页码，从0开始
-    songs_per_page = 80  # 每次请求获取的歌曲数，80是比较稳妥的最大值
-    artist_name = ""  # 存储歌手名
-    total_songs_count = 0  # 存储官方记录的总歌曲数
-
-    while True:  # 使用无限循环，直到取完所有页或发生错误
-        # 这是请求体(payload)的构造，是API逆向分析的核心成果。
-        # 'module' 和 'method' 告诉服务器我们要调用哪个功能。
-        # 'param' 包含了具体的请求参数，如歌手ID、起始位置(begin)、数量(num)。
-        req_data = {
-            "comm": {"ct": 24, "cv": 0},
-            "req_1": {
-                "module": "musichall.song_list_server",
-                "method": "GetSingerSongList",
-                "param": {
-                    "singerMid": artist_id,
-                    "begin": page_num * songs_per_page,
-                    "num": songs_per_page,
-                    "order": 1  # 1: 按发布时间排序, 2: 按热度排序
-                }
-            }
-        }
-        try:
-            res = requests.post(url, headers=HEADERS, data=json.dumps(req_data), timeout=20)
-            res.raise_for_status()
-            data = res.json()
-
-            # 检查返回码，确保业务逻辑也成功
-            if data.get('code') == 0 and data.get('req_1', {}).get('code') == 0:
-                api_data = data['req_1']['data']
-
-                # 首次成功请求时，获取歌手名和总歌曲数并打印
-                if not artist_name:
-                    artist_name = api_data.get('singerName', '未知歌手')
-                    total_songs_count = api_data.get('totalNum', 0)
-                    print(f"成功锁定歌手: '{artist_name}'，官方记录总歌曲数: {total_songs_count}")
-
-                song_list = api_data.get('songList', [])
-                if not song_list:  # 如果返回的歌曲列表为空，说明已经取完
-                    print("  -> 已获取该歌手所有歌曲。")
-                    break
-
-                # 【V13修复点】直接添加 song_item，而不是错误的 song_item['musicData']
-                for song_item in song_list:
-                    all_songs.append(song_item)
-
-                print(f"  -> 已获取 {len(song_list)} 首歌曲，累计: {len(all_songs)} / {total_songs_count}")
-                page_num += 1  # 页码+1，准备获取下一页
-                time.sleep(1)  # 礼貌性延迟，避免请求过快
-            else:
-                print(f"获取歌手 {artist_id} 的歌曲列表时，API返回错误: {data}", file=sys.stderr)
-                break
-        except Exception as e:
-            print(f"获取歌手 {artist_id} 歌曲列表时出错: {e}", file=sys.stderr)
-            break
-
-    if all_songs:
-        return {"artist_name": artist_name, "songs": all_songs}
-    return None
-
-
+@qq_music_coalesce.coalesced('track_info')
 def get_song_details_api(song_id):
     """
     获取单曲的详细信息，主要用于提取语种、流派等标签信息。
     :param song_id: str, 歌曲的 mid。
-    :return: 成功则返回歌曲的 'track_info' 字典，失败则返回None。
+    :return: 成功则返回歌曲的 TrackInfo (语种、流派)，失败则返回None。
     """
-    url = 'https://u.y.qq.com/cgi-bin/musicu.fcg'
-    req_data = {
-        "comm": {"ct": 24, "cv": 0, "g_tk": 5381},
-        "req_1": {
-            "module": "music.trackInfo.TrackInfoServer",
-            "method": "GetTrackInfo",
-            "param": {"song_mid": song_id}
-        }
-    }
     try:
-        res = requests.post(url, headers=HEADERS, data=json.dumps(req_data), timeout=10)
-        res.raise_for_status()
-        data = res.json()
-        if data.get('code') == 0 and data.get('req_1', {}).get('code') == 0:
-            return data['req_1']['data']['track_info']
+        results = qq_music_api.call_musicu({"req_1": qq_music_api.track_info_request(song_id)}, endpoint='track_info')
+        return qq_music_api.parse_track_info(results['req_1'])
     except Exception as e:
         print(f"  -> 获取歌曲详情(ID={song_id})时出错: {e}", file=sys.stderr)
     return None
@@ -315,7 +327,7 @@ def generate_tags(playlist_info, song_details):
     """
     标签生成引擎，聚合歌单标签（已兼容移除）和歌曲自身属性（语种、流派）。
     :param playlist_info: dict or None, 歌单信息，在歌手模式下为None。
-    :param song_details: dict or None, 单曲详情信息。
+    :param song_details: TrackInfo or None, 单曲详情中的语种和流派 (见 qq_music_models)。
     :return: set, 一个包含所有提取到的标签的集合。
     """
     tags = set()  # 使用集合可以自动去重
@@ -327,21 +339,13 @@ def generate_tags(playlist_info, song_details):
                 tags.add(tag_item['name'].strip())
 
     # 2. 从歌曲详情中提取语种(lan)和流派(genre)
-    if song_details and 'info' in song_details and isinstance(song_details['info'], list):
-        # 歌曲的详情信息存储在一个列表中，需要遍历查找
-        for info_item in song_details['info']:
-            # 检查是否是语种信息
-            if info_item.get('name') == 'lan' and info_item.get('content'):
-                for content_item in info_item.get('content', []):
-                    lang_value = content_item.get('value', '')
-                    for lang in lang_value.split(','):  # 有的语种可能是 "国语,粤语" 这种形式
-                        if lang: tags.add(lang.strip())
-            # 检查是否是流派信息
-            if info_item.get('name') == 'genre' and info_item.get('content'):
-                for content_item in info_item.get('content', []):
-                    genre_info = content_item.get('value', '')
-                    if isinstance(genre_info, str) and genre_info:
-                        tags.add(genre_info.strip())
+    if song_details:
+        for lang_value in song_details.languages:
+            for lang in lang_value.split(','):  # 有的语种可能是 "国语,粤语" 这种形式
+                if lang: tags.add(lang.strip())
+        for genre_info in song_details.genres:
+            if isinstance(genre_info, str) and genre_info:
+                tags.add(genre_info.strip())
 
     tags.discard('')  # 清理可能产生的空标签
     return tags
@@ -352,9 +356,9 @@ def get_song_url_api(song_id):
     获取歌曲的音频播放链接 (purl)。
     这是能否下载歌曲的关键。
     :param song_id: str, 歌曲的 mid。
-    :return: 成功则返回完整的下载URL，失败则返回None。
+    :return: (url, answered) 元组。url 为完整的下载URL，拿不到时为None；
+             answered 表示接口是否正常应答，为False时是请求失败(网络错误、熔断、接口错误码)，之后可以重试。
     """
-    vkey_url = 'https://u.y.qq.com/cgi-bin/musicu.fcg'
     # 'guid' 是一个设备标识符，可以随机生成。
     # 'purl' 是API返回的部分URL，需要和 'sip' (服务器地址)拼接才是完整链接。
     req_data = {"req_0": {"module": "vkey.GetVkeyServer", "method": "CgiGetVkey",
@@ -362,21 +366,22 @@ def get_song_url_api(song_id):
                                     "loginflag": 1, "platform": "20"}},
                 "comm": {"uin": "0", "format": "json", "ct": 24, "cv": 0}}
     try:
-        res = requests.post(vkey_url, headers=HEADERS, data=json.dumps(req_data), timeout=10)
-        res.raise_for_status()
-        data = res.json()
-        if data.get('code') == 0 and data.get('req_0', {}).get('code') == 0:
-            mid_info = data['req_0']['data']['midurlinfo']
-            if mid_info and mid_info[0]:
-                purl = mid_info[0].get('purl')
-                if purl:  # 只有purl存在，才能拼接下载链接
-                    server_host = data['req_0']['data'].get('sip', ["http://ws.stream.qqmusic.qq.com/"])[0]
-                    return server_host + purl
+        data = client.post_musicu(req_data, endpoint='vkey', timeout=10)
+        if data.get('code') != 0 or data.get('req_0', {}).get('code') != 0:
+            return None, False
+        mid_info = data['req_0']['data']['midurlinfo']
+        if mid_info and mid_info[0]:
+            purl = mid_info[0].get('purl')
+            if purl:  # 只有purl存在，才能拼接下载链接
+                server_host = data['req_0']['data'].get('sip', ["http://ws.stream.qqmusic.qq.com/"])[0]
+                return server_host + purl, True
+        return None, True
     except Exception as e:
         print(f"  -> 获取ID={song_id}的URL失败: {e}", file=sys.stderr)
-    return None
+    return None, False
 
 
+@qq_music_coalesce.coalesced('lyrics')
 def get_lyrics_api(song_id):
     """
     获取歌曲的歌词。
@@ -384,195 +389,249 @@ def get_lyrics_api(song_id):
     :param song_id: str, 歌曲的 mid。
     :return: 成功则返回UTF-8编码的歌词字符串，失败则返回None。
     """
-    url = 'https://u.y.qq.com/cgi-bin/musicu.fcg'
-    req_data = {"comm": {"ct": 24, "cv": 0, "g_tk": 5381},
-                "req_lyric": {"module": "music.musichallSong.PlayLyricInfo", "method": "GetPlayLyricInfo",
-                              "param": {"songMID": song_id}}}
     try:
-        res = requests.post(url, headers=HEADERS, data=json.dumps(req_data), timeout=10)
-        res.raise_for_status()
-        data = res.json()
-        if data.get('code') == 0 and data.get('req_lyric', {}).get('code') == 0:
-            lyric_base64 = data['req_lyric']['data'].get('lyric')
-            if lyric_base64:
-                # 使用 base64.b64decode 解码，再用 .decode('utf-8') 转为字符串。
-                return base64.b64decode(lyric_base64).decode('utf-8')
+        results = qq_music_api.call_musicu({"req_lyric": qq_music_api.lyric_request(song_id)}, endpoint='lyrics')
+        return qq_music_api.parse_lyric(results['req_lyric'])
     except Exception as e:
         print(f"  -> 获取ID={song_id}的歌词失败: {e}", file=sys.stderr)
     return None
 
 
+# 评论列表很大，且同一首歌只需写库一次：只共享进行中的请求，不保留结果
+@qq_music_coalesce.coalesced('comments', remember_if=None)
 def get_all_comments_api(song_id_num, song_id):
     """
     分页获取一首歌的所有评论，直到达到上限或没有更多评论。
+    开启 INCREMENTAL_COMMENTS 且库中已有该歌曲的评论时，只获取新评论。
     :param song_id_num: int, 歌曲的数字ID (songid)，评论API需要这个ID。
     :param song_id: str, 歌曲的文本ID (mid)，用于存入数据库。
-    :return: list, 包含所有评论信息的字典列表。
+    :return: (comments, complete) 元组，comments 为所有(新)评论的 models.Comment 列表，
+             complete 表示是否完整获取(请求出错中断时为 False)。
+    """
+    known_ids, newest_time = get_stored_comment_state(song_id) if INCREMENTAL_COMMENTS else (None, None)
+    return qq_music_comments.fetch_song_comments(song_id_num, song_id, MAX_COMMENTS_PER_SONG, COMMENTS_PER_PAGE,
+                                                 known_ids, newest_time)
+
+
+def prefetch_song_bundles(song_plan):
+    """
+    为一页歌曲批量预取详情和歌词，把原本每首歌一次(或两次)的请求合并为一次。
+    只请求阶段计划中仍需生成标签或存储歌词的歌曲。
+    :param song_plan: dict, stages.plan_songs 的结果：歌曲 mid -> 需要执行的阶段。
+    :return: dict, 歌曲 mid -> {"track_info": ..., "lyrics": ..., "failed": set} (见 qq_music_api.get_song_bundle_api)。
     """
-    print(f"    -> 开始获取歌曲 {song_id} 的评论...")
-    all_comments = []
-    page = 0
-    while len(all_comments) < MAX_COMMENTS_PER_SONG:
-        # 这是一个较旧的API，但目前依然有效。
-        comment_url = 'https://c.y.qq.com/base/fcgi-bin/fcg_global_comment_h5.fcg'
-        params = {'biztype': 1, 'topid': song_id_num, 'cmd': 8, 'pagenum': page, 'pagesize': COMMENTS_PER_PAGE,
-                  'format': 'json', 'g_tk': 5381}
-        try:
-            res = requests.get(comment_url, headers=HEADERS, params=params, timeout=10)
-            res.raise_for_status()
-            data = res.json()
-            if data.get('code') == 0:
-                comments = data.get('comment', {}).get('commentlist', [])
-                if not comments:  # 如果返回的评论列表为空，说明没有更多了
-                    print(f"    -> 已无更多评论。")
-                    break
-                # 整理评论数据并添加到总列表中
-                for cmt in comments:
-                    all_comments.append({
-                        'comment_id': cmt.get('commentid'),
-                        'song_id': song_id,  # 关联到我们的文本主键
-                        'user_nickname': cmt.get('nick'),
-                        'content': cmt.get('rootcommentcontent'),
-                        'liked_count': cmt.get('praisenum'),
-                        'comment_time': cmt.get('time')
-                    })
-                print(f"    -> 已获取 {len(comments)} 条评论，累计: {len(all_comments)}")
-                page += 1
-                time.sleep(0.5)
-            else:
-                break
-        except Exception as e:
-            print(f"    -> 获取评论失败: {e}", file=sys.stderr)
-            break
-    return all_comments
+    track_ids = [song_id for song_id, todo in song_plan.items() if stages.STAGE_TAGS in todo]
+    lyric_ids = [song_id for song_id, todo in song_plan.items() if stages.STAGE_LYRICS in todo]
+    if track_ids:
+        print(f"\n  -> 批量预取 {len(track_ids)} 首歌曲的详情和 {len(lyric_ids)} 首歌曲的歌词...")
+    return qq_music_api.get_song_bundles_api(track_ids, lyric_ids, batch_size=SONG_BATCH_SIZE)
 
 
 # --- 主程序逻辑 (Main Logic) ---
 
-def main():
-    """主程序执行入口，负责调度所有爬取任务。"""
+def main(refresh=False, resume=False, use_frontier=False, seeds_file=None):
+    """
+    主程序执行入口，负责调度所有爬取任务。
+    :param refresh: bool, 增量刷新模式：每位歌手只请求首页与 'artists' 表中的快照比对，只处理新增的歌曲。
+    :param resume: bool, 续抓模式：按抓取台账跳过上次已完成的歌手，未完成的歌手从中断处继续，不再重新获取已记录的歌曲列表。
+    :param use_frontier: bool, 抓取边界模式：从种子歌手出发，按广度优先抓取歌曲中出现的合作歌手。
+    :param seeds_file: str or None, 抓取边界模式下的种子歌手CSV，为None时使用 STARTING_ARTIST_IDS。
+    """
     print("--- QQ音乐爬虫启动 (V15 - 歌手模式注释增强版) ---")
     init_environment()
+    if not resume:
+        ledger.reset(LEDGER_FILE)  # 新的一次运行，从头记录台账
+
+    if use_frontier:
+        # 种子加入持久化的队列；之前运行中已抓取的歌手不会重新入队，队列中剩余的歌手接着抓
+        seeds = frontier.read_seed_csv(seeds_file) if seeds_file else STARTING_ARTIST_IDS
+        added = frontier.seed(DB_FILE, seeds)
+        print(f"抓取边界: 新加入 {added} 位种子歌手，队列中共 {frontier.count_queued(DB_FILE)} 位待抓。")
+        artist_ids = frontier.iter_frontier(DB_FILE, FRONTIER_MAX_ARTISTS, FRONTIER_MAX_DEPTH)
+    else:
+        artist_ids = STARTING_ARTIST_IDS
 
     # 1. 遍历待处理的歌手列表
-    for artist_id in STARTING_ARTIST_IDS:
-        artist_data = get_artist_songs_api(artist_id)
-        if not artist_data:
+    for artist_id in artist_ids:
+        job = ledger.load_job(LEDGER_FILE, artist_id)
+        if job and job.weight is not None:
+            job = None  # 按权重获取的部分歌曲列表，不能当作完整的任务续抓，重新开始
+        if job and job.status == ledger.JOB_DONE:
+            print(f"\n歌手 '{job.artist_name}' 已处理完毕，跳过。")
+            if use_frontier:
+                frontier.mark_visited(DB_FILE, artist_id)
+            continue
+        if job:
+            # 从台账恢复歌曲列表：已记录的分页不再请求，从上次提交的位置继续处理
+            song_stream = ledger.resume_listing(LEDGER_FILE, job)
+            start_index = job.next_index
+            print(f"\n--- 续抓歌手 '{job.artist_name}'：台账中已有 {job.listed} 首歌曲，从第 {start_index + 1} 首继续 ---")
+        elif refresh:
+            # 只请求首页与上次的快照比对，有新歌时才继续翻页 (见 qq_music_api.refresh_artist_songs)
+            known_total, known_newest_id = get_artist_snapshot(artist_id)
+            song_stream = qq_music_api.refresh_artist_songs(artist_id, known_total, known_newest_id)
+        else:
+            # 只同步获取首页；其余分页在后台并发获取，边到达边处理 (见 qq_music_api.stream_artist_songs)
+            song_stream = qq_music_api.stream_artist_songs(artist_id)
+        if not song_stream:
             print(f"跳过无法获取歌曲的歌手: {artist_id}")
             continue  # 处理下一个歌手
-
-        song_list = artist_data.get('songs', [])
-        artist_name = artist_data.get('artist_name', artist_id)
-        total_songs = len(song_list)
+        if not job:
+            ledger.start_job(LEDGER_FILE, artist_id, song_stream.artist_name, song_stream.total_num,
+                             song_stream.newest_song)
+            start_index = 0
+        # 歌曲列表在迭代时逐页写入台账
+        song_stream = ledger.RecordingStream(LEDGER_FILE, song_stream, recorded=job.listed if job else 0)
+
+        artist_name = song_stream.artist_name
+        total_songs = song_stream.total_num
         print(f"\n--- 开始处理歌手 '{artist_name}' 的 {total_songs} 首歌曲 ---")
 
         # 2. 遍历该歌手的每一首歌曲
-        for index, song in enumerate(song_list):
-            try:
+        # 每凑满一页，先批量读取这一页歌曲的阶段状态，再批量预取仍需要的详情和歌词
+        # 续抓时跳过序号小于 start_index 的歌曲(已在上次运行中处理完毕)
+        remaining_songs = itertools.islice(song_stream, start_index, None)
+        for batch_start, song_batch in qq_music_api.iter_batches(remaining_songs, SONG_BATCH_SIZE):
+            batch_start += start_index
+            song_plan = stages.plan_songs(DB_FILE, [song.mid for song in song_batch], SONG_STAGES)
+            song_bundles = prefetch_song_bundles(song_plan)
+            for index, song in enumerate(song_batch, batch_start):
                 # --- 数据解析 ---
-                # 【V14修复点】API返回的歌曲信息在外层'songInfo'中，需要先提取出来。
-                song_data = song['songInfo']
-
-                # 从解析后的数据中提取我们需要的核心字段
-                song_id = song_data['mid']  # 文本ID，用作主键
-                song_id_num = song_data['id']  # 数字ID，仅供评论API使用
-                song_name = song_data['name']  # 歌名
-                album_mid = song_data.get('album', {}).get('mid')  # 安全地获取专辑mid
-                album_name = song_data.get('album', {}).get('name')
+                # 歌曲列表在解析时已投影为 models.Song，缺少关键字段的歌曲已被跳过。
+                song_id = song.mid  # 文本ID，用作主键
+                song_id_num = song.id  # 数字ID，仅供评论API使用
+                song_name = song.name  # 歌名
+                album_mid = song.album_mid
+                album_name = song.album_name
                 # 将歌手列表转为JSON字符串存储
-                artist_names_json = json.dumps([s.get('name') for s in song_data.get('singer', [])], ensure_ascii=False)
+                artist_names_json = json.dumps(list(song.singer_names), ensure_ascii=False)
                 # 拼接封面URL
                 cover_url = f"https://y.qq.com/music/photo_new/T002R500x500M000{album_mid}.jpg" if album_mid else ""
-            except KeyError as e:
-                # 如果缺少关键字段，打印错误并跳过这首歌，避免程序崩溃。
-                print(f"解析歌曲基础信息时缺少关键字段: {e}，跳过此歌曲。歌曲数据: {song}", file=sys.stderr)
-                continue
-
-            print(f"\n[歌手 '{artist_name}' 歌曲进度 {index + 1}/{total_songs}] 正在处理: {song_name} (ID: {song_id})")
-
-            # 3. 检查歌曲是否已下载过，如果已下载则跳过，实现断点续传。
-            existing_song = execute_db_query(
-                "SELECT file_path FROM songs WHERE song_id = ? AND file_path IS NOT NULL AND file_path != ''",
-                (song_id,), fetch='one'
-            )
-            if existing_song:
-                print(f"  -> 歌曲 '{song_name}' 的文件已存在于数据库记录中，跳过处理。")
-                continue
-
-            # --- 分步执行爬取任务 ---
-
-            # 步骤A: 预先插入歌曲基础信息
-            # 使用 INSERT OR IGNORE，如果歌曲已存在，则忽略本次插入，避免主键冲突。
-            execute_db_query('''
-                INSERT OR IGNORE INTO songs (song_id, name, album_name, album_mid, artist_names)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (song_id, song_name, album_name, album_mid, artist_names_json))
-
-            # 步骤B: 处理标签（获取、聚合、更新）
-            song_details = get_song_details_api(song_id)
-            new_tags = generate_tags(None, song_details)  # 在歌手模式下，第一个参数传None
-            tags_json = json.dumps(list(new_tags), ensure_ascii=False)
-            print(f"  -> 生成标签: {list(new_tags)}")
-
-            # 步骤C: 下载封面并更新数据库
-            # 先检查数据库中是否已有封面路径
-            cover_record = execute_db_query("SELECT cover_path FROM songs WHERE song_id = ?", (song_id,), fetch='one')
-            if not (cover_record and cover_record[0]):
-                cover_path = download_cover(song_name, song_id, cover_url)
-                # 将标签和封面路径一次性更新到数据库
-                execute_db_query("UPDATE songs SET tags = ?, cover_path = ? WHERE song_id = ?",
-                                 (tags_json, cover_path, song_id))
-            else:
-                # 如果已有封面，则只更新标签
-                execute_db_query("UPDATE songs SET tags = ? WHERE song_id = ?", (tags_json, song_id))
-
-            time.sleep(0.5)
-
-            # 步骤D: 获取并存储评论
-            comments = get_all_comments_api(song_id_num, song_id)
-            if comments:
-                # 遍历所有获取到的评论并插入数据库
-                for cmt in comments:
-                    execute_db_query(
-                        '''INSERT OR IGNORE INTO comments (comment_id, song_id, user_nickname, content, liked_count, comment_time) 
-                           VALUES (?, ?, ?, ?, ?, ?)''',
-                        (cmt['comment_id'], cmt['song_id'], cmt['user_nickname'], cmt['content'],
-                         cmt['liked_count'], cmt['comment_time'])
-                    )
-                print(f"  -> 已完成 {len(comments)} 条评论的增量存储。")
-
-            # 步骤E: 获取并存储歌词
-            lyrics_record = execute_db_query("SELECT lrc FROM songs WHERE song_id = ?", (song_id,), fetch='one')
-            if not (lyrics_record and lyrics_record[0]):  # 检查是否已有歌词
-                lyrics = get_lyrics_api(song_id)
-                if lyrics:
-                    execute_db_query("UPDATE songs SET lrc = ? WHERE song_id = ?", (lyrics, song_id))
-                    print(f"  -> 成功获取并存储歌词。")
-                else:
-                    print(f"  -> 未找到该歌曲的歌词。")
-            else:
-                print(f"  -> 歌词已存在于数据库中，跳过获取。")
-
-            time.sleep(0.5)
-
-            # 步骤F: 获取下载链接并下载文件 (最核心的步骤)
-            download_url = get_song_url_api(song_id)
-            if download_url:
-                file_info = download_file(song_name, song_id, download_url)
-                if file_info:  # 下载成功后，更新数据库记录
-                    execute_db_query(
-                        "UPDATE songs SET file_path = ?, file_size = ?, file_md5 = ? WHERE song_id = ?",
-                        (file_info['path'], file_info['size'], file_info['md5'], song_id)
-                    )
-            else:
-                print(f"  -> 未能获取歌曲 '{song_name}' 的下载链接，标记为无法下载。")
-                # 即使无法下载，也更新一下数据库记录，避免下次重复尝试。
-                execute_db_query("UPDATE songs SET file_path = ? WHERE song_id = ?", ('UNAVAILABLE', song_id))
-
-            print(f"  -> 歌曲 '{song_name}' 处理完毕，等待3秒...")
-            time.sleep(3)  # 完成一首歌的全部流程后，进行较长时间的等待
+
+                print(f"\n[歌手 '{artist_name}' 歌曲进度 {index + 1}/{total_songs}] 正在处理: {song_name} (ID: {song_id})")
+
+                # 3. 检查歌曲还有哪些阶段未完成，全部完成则跳过，实现断点续传与补抓。
+                todo = song_plan.get(song_id, ())
+                if not todo:
+                    print(f"  -> 歌曲 '{song_name}' 的所有阶段均已完成，跳过处理。")
+                    continue
+                if todo != SONG_STAGES:
+                    print(f"  -> 补抓未完成的阶段: {', '.join(todo)}")
+
+                # --- 分步执行爬取任务 ---
+
+                # 步骤A: 预先插入歌曲基础信息
+                # 使用 INSERT OR IGNORE，如果歌曲已存在，则忽略本次插入，避免主键冲突。
+                if stages.STAGE_LISTED in todo:
+                    execute_db_query('''
+                        INSERT OR IGNORE INTO songs (song_id, name, album_name, album_mid, artist_names)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', (song_id, song_name, album_name, album_mid, artist_names_json))
+                    stages.mark_done(DB_FILE, song_id, stages.STAGE_LISTED)
+
+                # 步骤B: 处理标签（获取、聚合、更新）
+                # 歌曲详情和歌词已在本页开头批量预取；个别未预取到的歌曲单独打包请求一次。
+                song_bundle = song_bundles.get(song_id)
+                if song_bundle is None:
+                    song_bundle = qq_music_api.get_song_bundle_api(
+                        song_id, with_track_info=stages.STAGE_TAGS in todo, with_lyrics=stages.STAGE_LYRICS in todo)
+                # 请求失败(而非接口确认没有该资源)的阶段不做任何记录，下次运行时重试
+                if stages.STAGE_TAGS in todo and 'track_info' in song_bundle['failed']:
+                    print(f"  -> 获取歌曲详情失败，下次运行时重试。")
+                elif stages.STAGE_TAGS in todo:
+                    song_details = song_bundle['track_info']
+                    new_tags = generate_tags(None, song_details)  # 在歌手模式下，第一个参数传None
+                    tags_json = json.dumps(list(new_tags), ensure_ascii=False)
+                    print(f"  -> 生成标签: {list(new_tags)}")
+                    execute_db_query("UPDATE songs SET tags = ? WHERE song_id = ?", (tags_json, song_id))
+                    if song_details is not None:
+                        stages.mark_done(DB_FILE, song_id, stages.STAGE_TAGS)
+                    else:  # 接口应答了但没有详情，等待期过后重新生成标签
+                        stages.record_miss(DB_FILE, song_id, stages.STAGE_TAGS, 'no_track_info')
+
+                # 步骤C: 下载封面并更新数据库
+                if stages.STAGE_COVER in todo:
+                    cover_path = download_cover(song_name, song_id, cover_url)
+                    if cover_path:
+                        execute_db_query("UPDATE songs SET cover_path = ? WHERE song_id = ?", (cover_path, song_id))
+                        stages.mark_done(DB_FILE, song_id, stages.STAGE_COVER)
+                    elif not cover_url:  # 下载失败是暂时的，不记录，下次运行时重试
+                        stages.record_miss(DB_FILE, song_id, stages.STAGE_COVER, 'no_cover_url')
+
+                # 步骤D: 获取并存储评论
+                if stages.STAGE_COMMENTS in todo:
+                    comments, comments_complete = get_all_comments_api(song_id_num, song_id)
+                    if comments:
+                        # 遍历所有获取到的评论并插入数据库
+                        for cmt in comments:
+                            execute_db_query(
+                                '''INSERT OR IGNORE INTO comments (comment_id, song_id, user_nickname, content, liked_count, comment_time) 
+                                   VALUES (?, ?, ?, ?, ?, ?)''',
+                                (cmt.comment_id, cmt.song_id, cmt.user_nickname, cmt.content,
+                                 cmt.liked_count, cmt.comment_time)
+                            )
+                        print(f"  -> 已完成 {len(comments)} 条评论的增量存储。")
+                    if comments_complete:
+                        stages.mark_done(DB_FILE, song_id, stages.STAGE_COMMENTS)
+
+                # 步骤E: 存储歌词 (已在步骤B中随歌曲详情一并获取)
+                if stages.STAGE_LYRICS in todo:
+                    lyrics = song_bundle['lyrics']
+                    if lyrics:
+                        execute_db_query("UPDATE songs SET lrc = ? WHERE song_id = ?", (lyrics, song_id))
+                        stages.mark_done(DB_FILE, song_id, stages.STAGE_LYRICS)
+                        print(f"  -> 成功获取并存储歌词。")
+                    elif 'lyrics' in song_bundle['failed']:
+                        print(f"  -> 获取歌词失败，下次运行时重试。")
+                    else:
+                        # 记入失败结果表，等待期内不再请求；连续缺失时等待期翻倍
+                        stages.record_miss(DB_FILE, song_id, stages.STAGE_LYRICS, 'no_lyrics')
+                        print(f"  -> 未找到该歌曲的歌词。")
+
+                # 步骤F: 获取下载链接并下载文件 (最核心的步骤)
+                if stages.STAGE_FILE in todo:
+                    download_url, url_answered = get_song_url_api(song_id)
+                    if download_url:
+                        file_info = download_file(song_name, song_id, download_url)
+                        if file_info:  # 下载成功后，更新数据库记录
+                            execute_db_query(
+                                "UPDATE songs SET file_path = ?, file_size = ?, file_md5 = ? WHERE song_id = ?",
+                                (file_info['path'], file_info['size'], file_info['md5'], song_id)
+                            )
+                            stages.mark_done(DB_FILE, song_id, stages.STAGE_FILE)
+                        # 下载失败是暂时的，不记录，下次运行时重试
+                    elif not url_answered:
+                        print(f"  -> 请求歌曲 '{song_name}' 的下载链接失败，下次运行时重试。")
+                    else:
+                        print(f"  -> 未能获取歌曲 '{song_name}' 的下载链接，标记为无法下载。")
+                        # 数据库中仍标记为无法下载；何时复查由失败结果表的等待期决定，不再永久放弃。
+                        execute_db_query("UPDATE songs SET file_path = ? WHERE song_id = ?", ('UNAVAILABLE', song_id))
+                        stages.record_miss(DB_FILE, song_id, stages.STAGE_FILE, 'no_url')
+
+                # 请求节奏由各端点的自适应限速器控制，这里不再固定等待
+                print(f"  -> 歌曲 '{song_name}' 处理完毕。")
+
+            # 抓取边界模式下，从这一批歌曲的 singer 数组中发现合作歌手
+            if use_frontier:
+                frontier.observe(DB_FILE, artist_id, song_batch)
+            # 这一批歌曲处理完毕，提交进度
+            ledger.checkpoint(LEDGER_FILE, artist_id, batch_start + len(song_batch))
+
+        # 3. 该歌手处理完毕，记录快照供下次增量刷新
+        # 有分页补请求后仍失败时不记录快照、不结束任务：否则下次 --refresh 比对快照一致会跳过该歌手，
+        # 失败分页上的歌曲永远不会入库；保留未完成的任务，--resume 时会重新获取歌曲列表
+        if song_stream.missing:
+            print(f"歌手 '{artist_name}' 的歌曲列表有 {len(song_stream.missing)} 页获取失败，不记录快照，下次继续补抓。")
+            continue
+        save_artist_snapshot(artist_id, song_stream)
+        ledger.finish_job(LEDGER_FILE, artist_id)
+        # 抓取边界模式下，只有完整获取并处理了歌曲列表的歌手才加入已访问集合；
+        # 获取失败或有分页缺失的歌手由 iter_frontier 标记为获取失败，下次运行时重新入队
+        if use_frontier:
+            frontier.mark_visited(DB_FILE, artist_id)
 
     print("\n--- 所有任务处理完毕 ---")
+    qq_music_coalesce.print_stats()
     print(f"数据已存储在数据库文件: {DB_FILE}")
     print(f"音乐和封面文件已下载至目录: {MUSIC_STORAGE_DIR}")
 
@@ -581,4 +640,14 @@ def main():
 if __name__ == '__main__':
     # 只有当这个脚本被直接执行时，main()函数才会被调用。
     # 如果它被其他脚本作为模块导入，则不会自动运行。
-    main()
+    parser = argparse.ArgumentParser(description="按歌手ID爬取QQ音乐歌曲、评论、歌词和封面")
+    parser.add_argument('--refresh', action='store_true',
+                        help="增量刷新：每位歌手只请求首页，与上次记录的快照比对，只处理新增的歌曲")
+    parser.add_argument('--resume', action='store_true',
+                        help="续抓：从上次中断的歌手和歌曲继续，不再重新获取已记录的歌曲列表")
+    parser.add_argument('--frontier', action='store_true',
+                        help="抓取边界：从种子歌手出发，按广度优先抓取歌曲中出现的合作歌手")
+    parser.add_argument('--seeds', metavar='CSV',
+                        help="抓取边界模式的种子歌手CSV (需包含 singer_mid 列)，默认使用 STARTING_ARTIST_IDS")
+    args = parser.parse_args()
+    main(refresh=args.refresh, resume=args.resume, use_frontier=args.frontier, seeds_file=args.seeds)
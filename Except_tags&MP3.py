@@ -8,7 +8,7 @@
     一个通过QQ音乐【歌手ID】，爬取其名下特定比例的歌曲、评论、歌词、封面并导出到Excel的Python爬虫。
     本版本根据用户需求进行修改，主要变更包括：
     1. 【V19核心工作】: 将根据权重计算待爬取歌曲数量的方式，从默认的向下取整修改为向上取整。
-    2. 程序可自动检测并兼容 .xlsx 和 .csv 两种格式的输入文件。
+    2. 程序可自动检测并兼容 .xlsx 和 .csv 两种格式的输入文件(由 qq_music_tasks 流式读取)。
     3. 从外部Excel/CSV文件读取歌手任务列表（包含抓取权重）。
     4. 移除了MP3音频文件的下载功能。
     5. 移除了语种、流派等标签的爬取逻辑。
@@ -19,38 +19,57 @@
 # --- 模块导入 ---
 import requests  # 用于发送HTTP网络请求
 import sqlite3  # 用于操作SQLite数据库
-import time  # 用于实现程序延时，防止请求过快被封
+import argparse  # 用于解析命令行参数(如 --resume、--offset/--limit、--shard)
 import json  # 用于处理JSON格式的数据
 import os  # 用于操作系统级别的功能，如创建目录、检查文件路径
 import sys  # 用于访问系统特定的参数和功能，如此处的错误输出
-import base64  # 用于解码API返回的Base64编码的歌词
-import pandas as pd  # 用于读取CSV/Excel文件和导出到Excel
+import pandas as pd  # 用于导出到Excel
 import math  # 新增：导入math模块以使用向上取整功能
 
+import qq_music_client as client  # 共用的连接池HTTP客户端
+import qq_music_async  # 并发抓取歌手歌曲列表的异步引擎
+import qq_music_api  # musicu.fcg 多模块请求打包与响应拆分
+import qq_music_coalesce  # 按歌曲 mid 合并重复请求
+import qq_music_comments  # 评论分页获取(支持增量同步)
+import qq_music_stages as stages  # 逐首歌曲的阶段完成状态
+import qq_music_ledger as ledger  # 可续抓的抓取台账
+import qq_music_tasks  # 歌手任务文件的流式读取
+
 # --- 全局配置 (Global Configuration) ---
 
 # 1. 数据库和文件存储配置
 DB_FILE = 'qq_music_library_final.db'  # 定义数据库文件的名称
+LEDGER_FILE = 'qq_music_ledger_except.db'  # 本脚本的抓取台账，与共用 DB_FILE 的 Base 脚本互不干扰
 MUSIC_STORAGE_DIR = 'qq_music_library_final'  # 定义存放封面等文件的总目录
 COVER_STORAGE_DIR = os.path.join(MUSIC_STORAGE_DIR, 'covers')  # 封面图片的专属子目录
 
 # 2. 输出文件配置 (输入文件配置已改为自动检测)
 OUTPUT_EXCEL_FILE = 'qq_music_output.xlsx'
 
-# 3. 伪装请求头 (Request Headers)
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36',
-    'Referer': 'https://y.qq.com/',
-    'Content-Type': 'application/json'
-}
+# 3. 网络请求配置
+# 伪装请求头、代理修复(NO_PROXY)、连接池和超时时间统一由 qq_music_client 模块管理。
 
 # 4. 评论抓取配置 (Comment Fetching Settings)
-COMMENTS_PER_PAGE = 25  # 每次API请求获取的评论数量
+COMMENTS_PER_PAGE = 25  # 每次API请求获取的最少评论数量；实际页大小由 qq_music_comments 自动探测(可达 PROBE_PAGE_SIZE)
 MAX_COMMENTS_PER_SONG = 200  # 每首歌最多抓取的评论总数
+INCREMENTAL_COMMENTS = True  # 增量同步: 库中已有评论的歌曲只获取新评论，遇到整页都已存储时停止翻页
+
+# 5. 并发抓取配置
+# 每批并发获取多少位歌手的歌曲列表；未安装 aiohttp 时退回逐个获取。
+ARTIST_BATCH_SIZE = 200
+ASYNC_CONCURRENCY = 50  # 同时在途的请求数上限
+ASYNC_REQUESTS_PER_SECOND = 10  # 全局每秒请求数预算
+# 按权重截取时歌曲列表的排序方式: 'time' 最新发布的歌曲优先(原有行为)，'hot' 热度最高的歌曲优先，
+# 'mix' 一半名额给热度最高的歌曲、其余给最新发布的歌曲。配合按权重只请求所需分页，小权重即可覆盖热门歌曲。
+SONG_ORDER_MODE = 'time'
 
-# 5. 代理修复配置
-NO_PROXY = {'http': None, 'https': None}
+# 6. 批量请求配置
+# 每处理一页歌曲前，把这一页所有新歌曲的歌词子请求打包进一个 musicu.fcg 请求中预先获取。
+SONG_BATCH_SIZE = 20
 
+# 7. 抓取阶段配置
+# 每首歌依次执行的阶段，完成情况记录在 'song_stages' 表中；重跑时只补抓缺失(或已过期)的阶段。
+SONG_STAGES = (stages.STAGE_LISTED, stages.STAGE_COVER, stages.STAGE_COMMENTS, stages.STAGE_LYRICS)
 
 # --- 核心功能函数 ---
 
@@ -96,8 +115,12 @@ def init_environment():
             )''')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_comments_song_id ON comments (song_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_comments_liked_count ON comments (liked_count DESC)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_comments_song_time ON comments (song_id, comment_time)')
+            stages.init_table(cursor, SONG_STAGES)
             conn.commit()
-            print(f"数据库 '{DB_FILE}' 初始化或检查完成。")
+        with sqlite3.connect(LEDGER_FILE) as ledger_conn:  # 抓取台账在本脚本单独的数据库中
+            ledger.init_tables(ledger_conn.cursor())
+        print(f"数据库 '{DB_FILE}' 初始化或检查完成。")
     except sqlite3.Error as e:
         print(f"数据库初始化错误: {e}", file=sys.stderr)
         sys.exit(1)
@@ -119,6 +142,18 @@ def execute_db_query(query, params=(), fetch=None):
         return None
 
 
+def get_stored_comment_state(song_id):
+    """
+    读取某首歌已存储的评论ID集合和最新评论时间，还没有评论时返回 (None, None)。
+    """
+    rows = execute_db_query("SELECT comment_id FROM comments WHERE song_id = ?", (song_id,), fetch='all')
+    if not rows:
+        return None, None
+    newest = execute_db_query("SELECT MAX(comment_time) FROM comments WHERE song_id = ?", (song_id,), fetch='one')
+    return {row[0] for row in rows}, newest[0] if newest else None
+
+
+@qq_music_coalesce.coalesced('cover')
 def download_cover(song_name, song_id, cover_url):
     """
     下载封面图片。
@@ -127,7 +162,7 @@ def download_cover(song_name, song_id, cover_url):
         print(f"  -> 歌曲 '{song_name}' 的封面链接为空，跳过下载。")
         return None
     try:
-        response = requests.get(cover_url, headers=HEADERS, stream=True, timeout=30, proxies=NO_PROXY)
+        response = client.get(cover_url, stream=True, timeout=30)
         response.raise_for_status()
         safe_song_name = "".join(i for i in song_name if i not in r'\/:*?"<>|')
         file_name = f"{safe_song_name} - {song_id}.jpg"
@@ -142,29 +177,6 @@ def download_cover(song_name, song_id, cover_url):
         return None
 
 
-def read_input_file(filepath):
-    """
-    从指定的CSV或Excel文件读取歌手任务列表。
-    """
-    try:
-        if filepath.lower().endswith('.csv'):
-            df = pd.read_csv(filepath, dtype={'singer_mid': str})
-        else:  # .xlsx or .xls
-            df = pd.read_excel(filepath, dtype={'singer_mid': str})
-
-        if 'singer_mid' not in df.columns or 'weight' not in df.columns:
-            print(f"错误：输入文件 '{filepath}' 必须包含 'singer_mid' 和 'weight' 列。", file=sys.stderr)
-            sys.exit(1)
-
-        df['weight'] = df['weight'].astype(str).str.replace('%', '', regex=False).astype(float)
-        df['weight'] = df['weight'].clip(0, 1)
-        print(f"成功从 '{filepath}' 读取 {len(df)} 个歌手任务。")
-        return df.to_dict('records')
-    except Exception as e:
-        print(f"读取或解析输入文件 '{filepath}' 时出错: {e}", file=sys.stderr)
-        sys.exit(1)
-
-
 def export_to_excel():
     """
     将数据库内容导出到Excel文件。
@@ -186,193 +198,197 @@ def export_to_excel():
 
 # --- QQ音乐API请求函数 ---
 
-def get_artist_songs_api(artist_id):
+def prefetch_lyrics(song_plan):
     """
-    获取歌手的所有歌曲列表。
+    为一页歌曲批量预取歌词，只请求阶段计划中仍需存储歌词的歌曲。
+    :param song_plan: dict, stages.plan_songs 的结果：歌曲 mid -> 需要执行的阶段。
+    :return: dict, 歌曲 mid -> {"lyrics": ..., "failed": set, ...} (见 qq_music_api.get_song_bundle_api)。
     """
-    print(f"\n正在获取歌手详情: ID={artist_id}")
-    url = 'https://u.y.qq.com/cgi-bin/musicu.fcg'
-    all_songs, page_num, artist_name, total_songs_count = [], 0, "", 0
-    songs_per_page = 80  # 每次(页)爬取歌曲数
-    while True:
-        req_data = {"comm": {"ct": 24, "cv": 0},
-                    "req_1": {"module": "musichall.song_list_server", "method": "GetSingerSongList",
-                              "param": {"singerMid": artist_id, "begin": page_num * songs_per_page,
-                                        "num": songs_per_page, "order": 1}}}
-        try:
-            res = requests.post(url, headers=HEADERS, data=json.dumps(req_data), timeout=20, proxies=NO_PROXY)
-            res.raise_for_status()
-            data = res.json()
-            if data.get('code') == 0 and data.get('req_1', {}).get('code') == 0:
-                api_data = data['req_1']['data']
-                if not artist_name:
-                    artist_name = api_data.get('singerName', '未知歌手')
-                    total_songs_count = api_data.get('totalNum', 0)
-                    print(f"成功锁定歌手: '{artist_name}'，官方记录总歌曲数: {total_songs_count}")
-                song_list = api_data.get('songList', [])
-                if not song_list:
-                    print("  -> 已获取该歌手所有歌曲。")
-                    break
-                all_songs.extend(song_list)
-                print(f"  -> 已获取 {len(song_list)} 首歌曲，累计: {len(all_songs)} / {total_songs_count}")
-                page_num += 1
-                time.sleep(1)
-            else:
-                print(f"获取歌手 {artist_id} 的歌曲列表时，API返回错误: {data}", file=sys.stderr)
-                break
-        except Exception as e:
-            print(f"获取歌手 {artist_id} 歌曲列表时出错: {e}", file=sys.stderr)
-            break
-    if all_songs:
-        return {"artist_name": artist_name, "songs": all_songs}
-    return None
-
-
-def get_lyrics_api(song_id):
-    """
-    获取歌曲的歌词。
-    """
-    url = 'https://u.y.qq.com/cgi-bin/musicu.fcg'
-    req_data = {"comm": {"ct": 24, "cv": 0, "g_tk": 5381},
-                "req_lyric": {"module": "music.musichallSong.PlayLyricInfo", "method": "GetPlayLyricInfo",
-                              "param": {"songMID": song_id}}}
-    try:
-        res = requests.post(url, headers=HEADERS, data=json.dumps(req_data), timeout=10, proxies=NO_PROXY)
-        res.raise_for_status()
-        data = res.json()
-        if data.get('code') == 0 and data.get('req_lyric', {}).get('code') == 0:
-            lyric_base64 = data['req_lyric']['data'].get('lyric')
-            if lyric_base64:
-                return base64.b64decode(lyric_base64).decode('utf-8')
-    except Exception as e:
-        print(f"  -> 获取ID={song_id}的歌词失败: {e}", file=sys.stderr)
-    return None
+    lyric_ids = [song_id for song_id, todo in song_plan.items() if stages.STAGE_LYRICS in todo]
+    return qq_music_api.get_song_bundles_api(lyric_ids=lyric_ids, batch_size=SONG_BATCH_SIZE)
 
 
+# 评论列表很大，且同一首歌只需写库一次：只共享进行中的请求，不保留结果
+@qq_music_coalesce.coalesced('comments', remember_if=None)
 def get_all_comments_api(song_id_num, song_id):
     """
-    分页获取一首歌的所有评论。
+    分页获取一首歌的所有评论；开启增量同步且库中已有评论时只获取新评论。
+    :return: (comments, complete) 元组，complete 表示是否完整获取。
     """
-    print(f"    -> 开始获取歌曲 {song_id} 的评论...")
-    all_comments, page = [], 0
-    while len(all_comments) < MAX_COMMENTS_PER_SONG:
-        comment_url = 'https://c.y.qq.com/base/fcgi-bin/fcg_global_comment_h5.fcg'
-        params = {'biztype': 1, 'topid': song_id_num, 'cmd': 8, 'pagenum': page, 'pagesize': COMMENTS_PER_PAGE,
-                  'format': 'json', 'g_tk': 5381}
-        try:
-            res = requests.get(comment_url, headers=HEADERS, params=params, timeout=10, proxies=NO_PROXY)
-            res.raise_for_status()
-            data = res.json()
-            if data.get('code') == 0:
-                comments = data.get('comment', {}).get('commentlist', [])
-                if not comments:
-                    print(f"    -> 已无更多评论。")
-                    break
-                for cmt in comments:
-                    all_comments.append(
-                        {'comment_id': cmt.get('commentid'), 'song_id': song_id, 'user_nickname': cmt.get('nick'),
-                         'content': cmt.get('rootcommentcontent'), 'liked_count': cmt.get('praisenum'),
-                         'comment_time': cmt.get('time')})
-                print(f"    -> 已获取 {len(comments)} 条评论，累计: {len(all_comments)}")
-                page += 1
-                time.sleep(0.5)
-            else:
-                break
-        except Exception as e:
-            print(f"    -> 获取评论失败: {e}", file=sys.stderr)
-            break
-    return all_comments
+    known_ids, newest_time = get_stored_comment_state(song_id) if INCREMENTAL_COMMENTS else (None, None)
+    return qq_music_comments.fetch_song_comments(song_id_num, song_id, MAX_COMMENTS_PER_SONG, COMMENTS_PER_PAGE,
+                                                 known_ids, newest_time)
 
 
 # --- 主程序逻辑 (Main Logic) ---
 
-def main():
-    """主程序执行入口，负责调度所有爬取任务。"""
-    print("--- QQ音乐爬虫启动 (V19 - 向上取整版) ---")
-    init_environment()
-
-    # 调用 find_input_file 函数自动查找输入文件
-    input_filepath = find_input_file()
-    if not input_filepath:
-        print("\n错误：在程序目录下未找到 'artists.xlsx' 或 'artists.csv' 文件。", file=sys.stderr)
-        print("请确保您的歌手列表文件存在，并已正确命名。", file=sys.stderr)
-        sys.exit(1)
-
-    artists_to_process_raw = read_input_file(input_filepath)
-
-    # 清洗数据，去除 singer_mid 为空的行
-    df_cleaned = pd.DataFrame(artists_to_process_raw)
-    df_cleaned.dropna(subset=['singer_mid'], inplace=True)
-    artists_to_process = df_cleaned.to_dict('records')
-
-    for artist_task in artists_to_process:
-        artist_id, artist_weight = artist_task['singer_mid'], artist_task['weight']
-
-        # 确保 artist_id 不是浮点数 NaN (虽然 dropna 已处理，但作为双重保障)
-        if pd.isna(artist_id):
-            continue
-
-        artist_data = get_artist_songs_api(str(artist_id))  # 确保ID是字符串
-        if not artist_data:
-            print(f"跳过无法获取歌曲的歌手: {artist_id}")
-            continue
+def process_artist(artist_id, artist_weight, artist_data, start_index=0):
+    """
+    按权重处理单个歌手的歌曲：封面、评论、歌词，已完成的阶段不再重复执行。
+    :param artist_id: str, 歌手的 mid。
+    :param artist_weight: float, 抓取权重 (0~1)。
+    :param artist_data: dict or None, qq_music_api.get_artist_songs_api 形式的歌曲列表结果，
+                        按权重获取时只包含前 ceil(totalNum * weight) 首歌。
+    :param start_index: int, 从第几首歌开始处理(抓取台账中记录的进度)。
+    """
+    if not artist_data:
+        print(f"跳过无法获取歌曲的歌手: {artist_id}")
+        return
 
-        full_song_list = artist_data.get('songs', [])
-        artist_name = artist_data.get('artist_name', artist_id)
+    full_song_list = artist_data.get('songs', [])
+    artist_name = artist_data.get('artist_name', artist_id)
 
-        # 修改：使用 math.ceil 进行向上取整
-        num_to_process = int(math.ceil(len(full_song_list) * artist_weight))
+    # 修改：使用 math.ceil 进行向上取整 (基数为首页返回的 totalNum)
+    num_to_process = int(math.ceil(artist_data.get('total_num', len(full_song_list)) * artist_weight))
 
-        songs_to_process = full_song_list[:num_to_process]
-        total_to_process = len(songs_to_process)
+    songs_to_process = full_song_list[:num_to_process]
+    total_to_process = len(songs_to_process)
 
+    if start_index >= total_to_process:
+        print(f"\n歌手 '{artist_name}' 的 {total_to_process} 首歌曲已处理完毕，跳过。")
+        return
+    if start_index:
+        print(f"\n--- 续抓歌手 '{artist_name}'：从第 {start_index + 1}/{total_to_process} 首继续 ---")
+    else:
         print(f"\n--- 开始处理歌手 '{artist_name}' 的 {total_to_process} 首歌曲 (权重: {artist_weight:.2%}) ---")
 
-        for index, song in enumerate(songs_to_process):
-            try:
-                song_data = song['songInfo']
-                song_id, song_id_num, song_name = song_data['mid'], song_data['id'], song_data['name']
-                album_mid = song_data.get('album', {}).get('mid')
-                album_name = song_data.get('album', {}).get('name')
-                artist_names_json = json.dumps([s.get('name') for s in song_data.get('singer', [])], ensure_ascii=False)
-                cover_url = f"https://y.qq.com/music/photo_new/T002R500x500M000{album_mid}.jpg" if album_mid else ""
-            except KeyError as e:
-                print(f"解析歌曲基础信息时缺少关键字段: {e}，跳过此歌曲。歌曲数据: {song}", file=sys.stderr)
-                continue
-            print(
-                f"\n[歌手 '{artist_name}' 歌曲进度 {index + 1}/{total_to_process}] 正在处理: {song_name} (ID: {song_id})")
-            existing_song = execute_db_query("SELECT song_id FROM songs WHERE song_id = ?", (song_id,), fetch='one')
-            if existing_song:
-                print(f"  -> 歌曲 '{song_name}' 已存在于数据库中，跳过处理。")
-                continue
+    song_plan = {}
+    prefetched_lyrics = {}
+    for index, song in enumerate(songs_to_process[start_index:], start_index):
+        # 每到一页的开头，提交上一页的进度，批量读取这一页歌曲的阶段状态，并批量预取仍需要的歌词
+        if (index - start_index) % SONG_BATCH_SIZE == 0:
+            ledger.checkpoint(LEDGER_FILE, artist_id, index)
+            song_plan = stages.plan_songs(DB_FILE, [s.mid for s in songs_to_process[index:index + SONG_BATCH_SIZE]],
+                                          SONG_STAGES)
+            prefetched_lyrics = prefetch_lyrics(song_plan)
+        song_id, song_id_num, song_name = song.mid, song.id, song.name
+        album_mid, album_name = song.album_mid, song.album_name
+        artist_names_json = json.dumps(list(song.singer_names), ensure_ascii=False)
+        cover_url = f"https://y.qq.com/music/photo_new/T002R500x500M000{album_mid}.jpg" if album_mid else ""
+        print(
+            f"\n[歌手 '{artist_name}' 歌曲进度 {index + 1}/{total_to_process}] 正在处理: {song_name} (ID: {song_id})")
+        todo = song_plan.get(song_id, ())
+        if not todo:
+            print(f"  -> 歌曲 '{song_name}' 的所有阶段均已完成，跳过处理。")
+            continue
+        if todo != SONG_STAGES:
+            print(f"  -> 补抓未完成的阶段: {', '.join(todo)}")
+        if stages.STAGE_LISTED in todo:
             execute_db_query(
                 'INSERT OR IGNORE INTO songs (song_id, name, album_name, album_mid, artist_names, tags) VALUES (?, ?, ?, ?, ?, NULL)',
                 (song_id, song_name, album_name, album_mid, artist_names_json))
+            stages.mark_done(DB_FILE, song_id, stages.STAGE_LISTED)
+        if stages.STAGE_COVER in todo:
             cover_path = download_cover(song_name, song_id, cover_url)
             if cover_path:
                 execute_db_query("UPDATE songs SET cover_path = ? WHERE song_id = ?", (cover_path, song_id))
-            time.sleep(0.5)
-            comments = get_all_comments_api(song_id_num, song_id)
+                stages.mark_done(DB_FILE, song_id, stages.STAGE_COVER)
+            elif not cover_url:  # 下载失败是暂时的，不记录，下次运行时重试
+                stages.record_miss(DB_FILE, song_id, stages.STAGE_COVER, 'no_cover_url')
+        if stages.STAGE_COMMENTS in todo:
+            comments, comments_complete = get_all_comments_api(song_id_num, song_id)
             if comments:
                 for cmt in comments:
                     execute_db_query(
                         'INSERT OR IGNORE INTO comments (comment_id, song_id, user_nickname, content, liked_count, comment_time) VALUES (?, ?, ?, ?, ?, ?)',
-                        (cmt['comment_id'], cmt['song_id'], cmt['user_nickname'], cmt['content'], cmt['liked_count'],
-                         cmt['comment_time']))
+                        (cmt.comment_id, cmt.song_id, cmt.user_nickname, cmt.content, cmt.liked_count,
+                         cmt.comment_time))
                 print(f"  -> 已完成 {len(comments)} 条评论的存储。")
-            lyrics = get_lyrics_api(song_id)
+            if comments_complete:
+                stages.mark_done(DB_FILE, song_id, stages.STAGE_COMMENTS)
+        if stages.STAGE_LYRICS in todo:
+            lyric_bundle = prefetched_lyrics.get(song_id)
+            if lyric_bundle is None:  # 未能预取时单独请求一次
+                lyric_bundle = qq_music_api.get_song_bundle_api(song_id, with_track_info=False)
+            lyrics = lyric_bundle['lyrics']
             if lyrics:
                 execute_db_query("UPDATE songs SET lrc = ? WHERE song_id = ?", (lyrics, song_id))
+                stages.mark_done(DB_FILE, song_id, stages.STAGE_LYRICS)
                 print(f"  -> 成功获取并存储歌词。")
+            elif 'lyrics' in lyric_bundle['failed']:  # 请求失败不记录，下次运行时重试
+                print(f"  -> 获取歌词失败，下次运行时重试。")
             else:
+                stages.record_miss(DB_FILE, song_id, stages.STAGE_LYRICS, 'no_lyrics')
                 print(f"  -> 未找到该歌曲的歌词。")
-            print(f"  -> 歌曲 '{song_name}' 处理完毕，等待2秒...")
-            time.sleep(2)
+        print(f"  -> 歌曲 '{song_name}' 处理完毕。")
+    ledger.checkpoint(LEDGER_FILE, artist_id, total_to_process)
+
+
+def record_artist_listing(artist_id, artist_data, weight):
+    """
+    把新获取的歌曲列表写入台账，进度从头开始。获取失败(artist_data 为None)时不做记录。
+    :param weight: float, 获取歌曲列表时使用的权重。
+    """
+    if artist_data:
+        ledger.start_job(LEDGER_FILE, artist_id, artist_data['artist_name'], artist_data['total_num'], weight=weight)
+        ledger.record_listing(LEDGER_FILE, artist_id, artist_data['songs'])
+
+
+def main(resume=False, task_args=None):
+    """
+    主程序执行入口，负责调度所有爬取任务。
+    :param resume: bool, 续抓模式：按抓取台账复用上次记录的歌曲列表，并从每位歌手上次处理到的歌曲继续。
+    :param task_args: argparse.Namespace or None, qq_music_tasks.add_arguments 添加的任务选择参数。
+    """
+    print("--- QQ音乐爬虫启动 (V19 - 向上取整版) ---")
+    init_environment()
+    if not resume:
+        ledger.reset(LEDGER_FILE)  # 新的一次运行，从头记录台账
+
+    # 未通过 --input 指定时，调用 find_input_file 函数自动查找输入文件
+    input_filepath = (task_args.input if task_args else None) or find_input_file()
+    if not input_filepath:
+        print("\n错误：在程序目录下未找到 'artists.xlsx' 或 'artists.csv' 文件。", file=sys.stderr)
+        print("请确保您的歌手列表文件存在，并已正确命名。", file=sys.stderr)
+        sys.exit(1)
+
+    # 逐块读取任务：singer_mid 为空的行已跳过，权重已统一为 0~1，重复的歌手已去重
+    task_source = qq_music_tasks.from_args(task_args, input_filepath)
+    print(f"任务来源: {task_source.describe()}")
+
+    for batch in task_source.chunks(ARTIST_BATCH_SIZE):
+        # 同一歌手重复出现时按最大的权重获取，处理时再按各自的权重截取
+        weights = {}
+        for artist_id, artist_weight in batch:
+            weights[artist_id] = max(artist_weight, weights.get(artist_id, artist_weight))
+        # 台账中已有完整歌曲列表、且当时的权重不小于本次所需的歌手，不再请求歌曲列表
+        jobs = {artist_id: ledger.load_job(LEDGER_FILE, artist_id) for artist_id in weights}
+        recorded = {artist_id: job for artist_id, job in jobs.items()
+                    if job and job.listing_complete and job.weight is not None and job.weight >= weights[artist_id]}
+        to_fetch = [artist_id for artist_id, _ in batch if artist_id not in recorded]
+        # 先并发获取整批歌手按权重所需的歌曲列表，再逐首处理歌曲
+        # 每位歌手的歌曲列表一获取完毕就写入台账，批次中途崩溃时已获取的列表不会丢失
+        prefetched = {}
+        if to_fetch:
+            prefetched = qq_music_async.crawl_artists(to_fetch,
+                                                      concurrency=ASYNC_CONCURRENCY,
+                                                      requests_per_second=ASYNC_REQUESTS_PER_SECOND,
+                                                      fallback=qq_music_api.get_artist_songs_api,
+                                                      weights=weights, mode=SONG_ORDER_MODE,
+                                                      on_result=lambda artist_id, artist_data: record_artist_listing(
+                                                          artist_id, artist_data, weights[artist_id]))
+        for artist_id, job in recorded.items():
+            prefetched[artist_id] = {"artist_name": job.artist_name, "total_num": job.total_num,
+                                     "songs": ledger.load_songs(LEDGER_FILE, artist_id)}
+        for artist_id, artist_weight in batch:
+            # 每次都重新读取进度：同一歌手在列表中重复出现时，从前一次处理到的位置继续
+            job = ledger.load_job(LEDGER_FILE, artist_id)
+            artist_data = prefetched.get(artist_id)
+            process_artist(artist_id, artist_weight, artist_data, job.next_index if job else 0)
+            if artist_data:
+                ledger.finish_job(LEDGER_FILE, artist_id)
+
     print("\n--- 所有任务处理完毕 ---")
+    qq_music_coalesce.print_stats()
     print(f"数据已存储在数据库文件: {DB_FILE}")
     export_to_excel()
 
 
 # --- 程序入口 ---
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="按歌手列表和权重爬取QQ音乐歌曲、评论、歌词和封面，并导出到Excel")
+    parser.add_argument('--resume', action='store_true',
+                        help="续抓：复用上次记录的歌曲列表，从每位歌手上次处理到的歌曲继续")
+    qq_music_tasks.add_arguments(parser)  # --input、--offset、--limit、--shard、--default-weight
+    args = parser.parse_args()
+    main(resume=args.resume, task_args=args)
@@ -12,38 +12,38 @@
 """
 
 # --- 模块导入 ---
-import requests  # 用于发送HTTP网络请求
+import argparse  # 用于解析命令行参数(如 --offset/--limit、--shard)
 import sqlite3  # 用于操作SQLite数据库
-import time  # 用于实现程序延时
-import json  # 用于处理JSON格式的数据
 import sys  # 用于访问系统特定的参数和功能
 import pandas as pd
 import math
 
+import qq_music_api  # 歌手歌曲列表获取(首页之后的分页并发获取)
+import qq_music_async  # 并发抓取歌手歌曲列表的异步引擎
+import qq_music_tasks  # 歌手任务文件的流式读取
+
 # --- 全局配置 (Global Configuration) ---
 
 # 1. 数据库与输出文件配置
 DB_FILE = 'qq_music_ids_library.db'
 OUTPUT_EXCEL_FILE = 'qq_music_song_list.xlsx'
 
-# 2. 伪装请求头 (Request Headers)
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36',
-    'Referer': 'https://y.qq.com/',
-    'Content-Type': 'application/json'
-}
+# 2. 网络请求配置
+# 伪装请求头、代理修复(NO_PROXY)、连接池和超时时间统一由 qq_music_client 模块管理。
 
-# 3. 代理配置
-# 新增：定义一个空的代理字典，以覆盖并禁用系统代理，解决 ProxyError 问题
-NO_PROXY = {'http': None, 'https': None}
+# 3. 并发抓取配置
+# 每批并发获取多少位歌手的歌曲列表；批内按并发数和每秒请求数预算调度，未安装 aiohttp 时逐个获取。
+ARTIST_BATCH_SIZE = 200
+ASYNC_CONCURRENCY = 50
+ASYNC_REQUESTS_PER_SECOND = 10
+# 按权重截取时歌曲列表的排序方式: 'time' 最新发布的歌曲优先(原有行为)，'hot' 热度最高的歌曲优先，
+# 'mix' 一半名额给热度最高的歌曲、其余给最新发布的歌曲。配合按权重只请求所需分页，小权重即可覆盖热门歌曲。
+SONG_ORDER_MODE = 'time'
 
-# 4. 导入excel
-try:
-    df = pd.read_csv("test.csv")
-    df.dropna(subset=['singer_mid'], inplace=True)
-except FileNotFoundError:
-    print("错误：未找到 'test.csv' 文件。请确保该文件与脚本在同一目录下。", file=sys.stderr)
-    sys.exit(1)
+# 4. 任务文件配置
+# 在 main 中由 qq_music_tasks 逐块流式读取，不再在导入时读入整个文件；可用 --input 指定其他文件。
+INPUT_FILE = 'test.csv'
+DEFAULT_WEIGHT = 1.0  # 任务文件没有 song_weight/weight 列(如 qq_music_singers.csv)时，获取歌手的全部歌曲
 
 
 # --- 核心功能函数 ---
@@ -101,91 +101,48 @@ def export_to_excel():
         print(f"导出到Excel时发生错误: {e}", file=sys.stderr)
 
 
-def get_artist_songs_api(artist_id):
-    """
-    通过歌手ID，分页获取其名下的所有歌曲列表。
-    """
-    print(f"\n正在获取歌手详情: ID={artist_id}")
-    url = 'https://u.y.qq.com/cgi-bin/musicu.fcg'
-    all_songs, page_num, artist_name, total_songs_count = [], 0, "", 0
-    songs_per_page = 80
-
-    while True:
-        req_data = {
-            "comm": {"ct": 24, "cv": 0},
-            "req_1": {
-                "module": "musichall.song_list_server",
-                "method": "GetSingerSongList",
-                "param": {"singerMid": artist_id, "begin": page_num * songs_per_page, "num": songs_per_page, "order": 1}
-            }
-        }
-        try:
-            # 修改：增加了 proxies=NO_PROXY 参数，以忽略系统代理
-            res = requests.post(url, headers=HEADERS, data=json.dumps(req_data), timeout=20, proxies=NO_PROXY)
-            res.raise_for_status()
-            data = res.json()
-
-            if data.get('code') == 0 and data.get('req_1', {}).get('code') == 0:
-                api_data = data['req_1']['data']
-                if not artist_name:
-                    artist_name = api_data.get('singerName', '未知歌手')
-                    total_songs_count = api_data.get('totalNum', 0)
-                    print(f"成功锁定歌手: '{artist_name}'，官方记录总歌曲数: {total_songs_count}")
-
-                song_list = api_data.get('songList', [])
-                if not song_list:
-                    print("  -> 已获取该歌手所有歌曲。")
-                    break
-
-                all_songs.extend(song_list)
-                print(f"  -> 已获取 {len(song_list)} 首歌曲，累计: {len(all_songs)} / {total_songs_count}")
-                page_num += 1
-                time.sleep(0.5)
-            else:
-                print(f"获取歌手 {artist_id} 的歌曲列表时，API返回错误: {data}", file=sys.stderr)
-                break
-        except Exception as e:
-            print(f"获取歌手 {artist_id} 歌曲列表时出错: {e}", file=sys.stderr)
-            break
-
-    if all_songs:
-        return {"artist_name": artist_name, "songs": all_songs}
-    return None
-
-
 # --- 主程序逻辑 (Main Logic) ---
 
-def main():
+def main(task_args=None):
     """
     主程序执行入口。
+    :param task_args: argparse.Namespace or None, qq_music_tasks.add_arguments 添加的任务选择参数。
     """
     print("--- QQ音乐爬虫启动 (V17 - 超精简可行性分析版) ---")
+    # 逐块读取任务：singer_mid 为空的行已跳过，权重已统一为 0~1，重复的歌手已去重
+    task_source = qq_music_tasks.from_args(task_args, INPUT_FILE, DEFAULT_WEIGHT)
+    print(f"任务来源: {task_source.describe()}")
     init_environment()
 
-    for artist_id, weight in zip(df["singer_mid"], df["song_weight"]):
-        # 修正：使用 pd.isna() 来判断是否为 NaN
-        if not pd.isna(artist_id):
-            artist_data = get_artist_songs_api(artist_id)
+    for batch in task_source.chunks(ARTIST_BATCH_SIZE):
+        # 同一歌手重复出现时按最大的权重获取，入库时再按各自的权重截取
+        weights = {}
+        for artist_id, weight in batch:
+            weights[artist_id] = max(weight, weights.get(artist_id, weight))
+        # 先并发获取整批歌手按权重所需的歌曲列表，再依次入库
+        prefetched = qq_music_async.crawl_artists([artist_id for artist_id, _ in batch],
+                                                  concurrency=ASYNC_CONCURRENCY,
+                                                  requests_per_second=ASYNC_REQUESTS_PER_SECOND,
+                                                  fallback=qq_music_api.get_artist_songs_api,
+                                                  weights=weights, mode=SONG_ORDER_MODE)
+
+        for artist_id, weight in batch:
+            artist_data = prefetched.get(artist_id)
             if not artist_data:
                 print(f"跳过无法获取歌曲的歌手: {artist_id}")
                 continue
 
             song_list = artist_data.get('songs', [])
             artist_name = artist_data.get('artist_name', artist_id)
-            total_num = len(song_list)
+            total_num = artist_data.get('total_num', len(song_list))  # 首页返回的 totalNum，列表只包含按权重所需的部分
             need_song_num = math.ceil(total_num * weight)
             new_songs_count = 0
             print(f"\n--- 开始处理歌手 '{artist_name}' 的 {need_song_num} 首歌曲，并存入数据库 ---")
 
             for index, song in enumerate(song_list):
                 if index + 1 <= need_song_num:
-                    try:
-                        song_data = song['songInfo']
-                        song_id = song_data['mid']
-                        song_name = song_data['name']
-                    except KeyError as e:
-                        print(f"解析歌曲基础信息时缺少关键字段: {e}，跳过。", file=sys.stderr)
-                        continue
+                    # 歌曲已在解析时投影为 qq_music_models.Song，缺少关键字段的歌曲已被跳过
+                    song_id, song_name = song.mid, song.name
 
                     conn = sqlite3.connect(DB_FILE)
                     cursor = conn.cursor()
@@ -206,4 +163,7 @@ def main():
 
 # --- 程序入口 ---
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="按歌手列表和权重只爬取歌曲ID和歌名，并导出到Excel")
+    qq_music_tasks.add_arguments(parser, default_weight=DEFAULT_WEIGHT)  # --input、--offset、--limit、--shard
+    args = parser.parse_args()
+    main(task_args=args)
@@ -1,101 +1,466 @@
 import requests
+import argparse  # 命令行参数(如 --refresh)
 import json
 import csv
-from time import sleep
+import os  # fsync 与检查点文件的原子替换
+import threading  # 多个分片共用同一个写入器
+from concurrent.futures import ThreadPoolExecutor  # 分片并发爬取
 
+import qq_music_client as client
+import qq_music_retry as retry
 
-def fetch_singer_list():
-    # 请求头设置
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Referer': 'https://y.qq.com/n/ryqq/singer_list',
-        'Content-Type': 'application/json'
-    }
+# 请求头设置（其余默认请求头和连接池由 qq_music_client 统一管理）
+HEADERS = {'Referer': 'https://y.qq.com/n/ryqq/singer_list'}
+PER_PAGE = 80  # 每页数量
+ALL = -100  # -100表示不按该条件筛选
 
-    # 基础URL
-    url = 'https://u.y.qq.com/cgi-bin/musicu.fcg'
+# 分片配置: 按 索引字母 × 地区 把歌手总列表拆成互不重叠的分片，各分片并发翻页，
+# 请求速率仍由 'singer_list' 端点的限速器统一控制(见 qq_music_governor)。
+SHARD_INDEXES = list(range(1, 28))  # 1-26 对应 A-Z，27 对应 #(数字及其他)
+SHARD_AREAS = [200, 2, 5, 4, 3, 6]  # 内地、港台、欧美、日本、韩国、其他
+SHARD_WORKERS = 8  # 同时爬取的分片数
 
-    singers = []
-    page = 1
-    per_page = 80  # 每页数量
+# 输出配置: 每爬完一页就把歌手写入CSV，每 FSYNC_EVERY_PAGES 页(以及每个分片结束时)fsync 一次，
+# 并在旁边的检查点文件中记录已完成的分片和各分片下一页的页码；中断后重新运行会从检查点继续。
+CSV_FILENAME = 'qq_music_singers.csv'
+CHECKPOINT_SUFFIX = '.checkpoint.json'
+SHARD_TOTALS_SUFFIX = '.shards.json'  # 完整爬取或刷新后记录各分片的歌手总数，供增量刷新比对
+FSYNC_EVERY_PAGES = 10
 
-    while True:
-        # 构造POST请求的JSON数据
-        payload = {
-            "comm": {"ct": "24", "cv": "10000"},
-            "singerList": {
-                "module": "Music.SingerListServer",
-                "method": "get_singer_list",
-                "param": {
-                    "area": -100,  # -100表示全部地区
-                    "sex": -100,  # -100表示全部性别
-                    "genre": -100,  # -100表示全部流派
-                    "index": -100,  # -100表示全部索引
-                    "sin": (page - 1) * per_page,  # 起始位置
-                    "cur_page": page  # 当前页码
-                }
+# 增量刷新配置 (--refresh): 各分片不读缓存地请求第1页，歌手总数与上次记录的相同就跳过该分片；
+# 总数增加时继续翻页，找到的新歌手数达到增加的数量后停止(接口不保证新歌手排在前面，只能按数量截止)。
+# 新增和改名的歌手写入 DELTA_FILENAME，并合并进 CSV_FILENAME；有分片未能刷新完时，
+# 变化只写入 PARTIAL_DELTA_FILENAME，不修改 CSV_FILENAME。--full 时不比对总数，翻完每个分片
+DELTA_FILENAME = 'qq_music_singers_delta.csv'
+PARTIAL_DELTA_FILENAME = 'qq_music_singers_delta.partial.csv'
+
+# 一页请求失败时可能抛出的异常：传输或解析失败、端点熔断中、接口返回错误码；都按该分片未完成处理
+PAGE_ERRORS = (requests.exceptions.RequestException, json.JSONDecodeError, retry.CircuitOpenError, retry.ApiError)
+
+
+class SingerCsvWriter:
+    """
+    边爬边写的歌手CSV (线程安全)，不在内存中保留歌手列表，只保留用于去重的 singer_mid 集合
+    检查点只在CSV fsync 之后更新，检查点记录的页一定已经落盘；检查点之后写入的行在续爬时会被重新请求，按 singer_mid 去重
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.checkpoint_file = filename + CHECKPOINT_SUFFIX
+        self.lock = threading.Lock()
+        self.seen = set()  # 已写入的 singer_mid
+        self.done_shards = set()  # 已完整爬取的分片
+        self.next_pages = {}  # 未完成的分片 -> 下一页的页码
+        self.shard_totals = {}  # 分片 -> 接口报告的该分片歌手总数，用于检查分片是否覆盖了全部歌手
+        self.pending_pages = 0  # 上次 fsync 之后写入的页数
+        self.resumed = False
+        checkpoint = self._load_checkpoint()
+        if checkpoint is not None and os.path.exists(filename):
+            self.resumed = True
+            self.done_shards = set(checkpoint.get('done_shards', []))
+            self.next_pages = dict(checkpoint.get('next_pages', {}))
+            self.shard_totals = dict(checkpoint.get('shard_totals', {}))
+            self._load_existing_rows()
+            self.file = open(filename, 'a', encoding='utf-8', newline='')
+            self.writer = csv.DictWriter(self.file, fieldnames=['singer_mid', 'singer_name'])
+        else:
+            self.file = open(filename, 'w', encoding='utf-8-sig', newline='')  # utf-8-sig处理Excel中文乱码
+            self.writer = csv.DictWriter(self.file, fieldnames=['singer_mid', 'singer_name'])
+            self.writer.writeheader()
+            self._sync()
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"检查点文件 '{self.checkpoint_file}' 无法读取，重新开始爬取: {e}")
+            return None
+
+    def _load_existing_rows(self):
+        """续爬时读入已写入的 singer_mid；截掉崩溃时可能只写了一半的最后一行"""
+        with open(self.filename, 'rb+') as f:
+            content = f.read()
+            end = content.rfind(b'\n') + 1
+            if end < len(content):
+                f.truncate(end)
+        with open(self.filename, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                if row.get('singer_mid'):
+                    self.seen.add(row['singer_mid'])
+
+    @staticmethod
+    def shard_key(index, area):
+        return f"{index},{area}"
+
+    def start_page(self, index, area):
+        """返回分片应从第几页开始爬取；上次已完成的分片返回None"""
+        key = self.shard_key(index, area)
+        if key in self.done_shards:
+            return None
+        return self.next_pages.get(key, 1)
+
+    def write_page(self, index, area, page, singers, last=False, total=None):
+        """
+        写入一个分片的一页歌手(跳过已写入的 singer_mid)
+        :param last: 这是否是该分片的最后一页
+        :param total: 接口报告的该分片歌手总数
+        """
+        key = self.shard_key(index, area)
+        with self.lock:
+            if total is not None:
+                self.shard_totals[key] = total
+            for singer in singers:
+                if singer['singer_mid'] not in self.seen:
+                    self.seen.add(singer['singer_mid'])
+                    self.writer.writerow(singer)
+            if last:
+                self.done_shards.add(key)
+                self.next_pages.pop(key, None)
+            else:
+                self.next_pages[key] = page + 1
+            self.pending_pages += 1
+            if last or self.pending_pages >= FSYNC_EVERY_PAGES:
+                self._sync()
+
+    def finish_shard(self, index, area, total=None):
+        """标记分片已完整爬取(最后一页为空时)"""
+        key = self.shard_key(index, area)
+        with self.lock:
+            if total is not None:
+                self.shard_totals[key] = total
+            self.done_shards.add(key)
+            self.next_pages.pop(key, None)
+            self._sync()
+
+    def sync(self):
+        with self.lock:
+            self._sync()
+
+    def _sync(self):
+        """CSV落盘后再原子地替换检查点文件。调用方需持有 lock"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        tmp_file = self.checkpoint_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'done_shards': sorted(self.done_shards), 'next_pages': self.next_pages,
+                       'shard_totals': self.shard_totals}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.checkpoint_file)
+        self.pending_pages = 0
+
+    def close(self, complete):
+        """
+        关闭CSV；全部分片完整爬取时记录各分片的歌手总数并删除检查点，否则保留检查点供下次续爬
+        """
+        with self.lock:
+            self._sync()
+            self.file.close()
+            if complete:
+                save_shard_totals(self.filename, self.shard_totals)
+                os.remove(self.checkpoint_file)
+
+
+def build_payload(page, area=ALL, sex=ALL, genre=ALL, index=ALL):
+    """构造 get_singer_list 的POST请求JSON数据"""
+    return {
+        "comm": {"ct": "24", "cv": "10000"},
+        "singerList": {
+            "module": "Music.SingerListServer",
+            "method": "get_singer_list",
+            "param": {
+                "area": area,  # 地区
+                "sex": sex,  # 性别
+                "genre": genre,  # 流派
+                "index": index,  # 歌手名首字母索引
+                "sin": (page - 1) * PER_PAGE,  # 起始位置
+                "cur_page": page  # 当前页码
             }
         }
+    }
+
+
+def fetch_singer_page(page, use_cache=True, **filters):
+    """
+    请求歌手列表的一页
+    :param use_cache: 是否读写响应缓存(歌手列表缓存一天)，增量刷新需要最新数据时传 False
+    :return: (本页歌手列表, 该筛选条件下的歌手总数)；请求失败时抛出异常
+    :raises retry.ApiError: 顶层或 singerList 子请求的 code 不为0，不能当作"没有更多歌手"
+    """
+    # 发送前会向 'singer_list' 端点的限速器领取令牌，传输错误按重试策略重试
+    data = client.post_musicu(build_payload(page, **filters), endpoint='singer_list', headers=HEADERS,
+                              use_cache=use_cache)
+    sub = data.get('singerList') or {}
+    for code in (data.get('code', 0), sub.get('code', 0)):
+        if code != 0:
+            raise retry.ApiError(code, data)
+    result = sub.get('data') or {}
+    return result.get('singerlist', []), result.get('total')
+
+
+def extract_singers(singer_list):
+    """提取歌手信息"""
+    singers = []
+    for singer in singer_list:
+        singer_mid = singer.get('singer_mid')  # 使用singer_mid代替singer_id
+        singer_name = singer.get('singer_name')
+        if singer_mid and singer_name:
+            singers.append({
+                'singer_mid': singer_mid,
+                'singer_name': singer_name
+            })
+    return singers
+
 
-        # 发送POST请求
+def fetch_shard(index, area, writer):
+    """
+    从检查点记录的页码开始，逐页爬取一个分片(索引字母 + 地区)的歌手并写入 writer
+    :return: 是否完整爬取
+    """
+    page = writer.start_page(index, area)
+    if page is None:
+        return True  # 上次运行已完成
+    count = 0
+    while True:
         try:
-            response = requests.post(url, headers=headers, data=json.dumps(payload))
-            response.raise_for_status()  # 检查请求是否成功
-            data = response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"请求失败: {e}")
+            singer_list, total = fetch_singer_page(page, area=area, index=index)
+        except PAGE_ERRORS as e:
+            print(f"分片(index={index}, area={area})第 {page} 页请求失败: {e}")
+            writer.sync()
+            return False
+        if not singer_list:
+            writer.finish_shard(index, area, total)
             break
-        except json.JSONDecodeError:
-            print("JSON解析失败")
+        # 已达到该分片的歌手总数时不必再请求一页空结果
+        last = total is not None and (page - 1) * PER_PAGE + len(singer_list) >= total
+        writer.write_page(index, area, page, extract_singers(singer_list), last=last, total=total)
+        count += len(singer_list)
+        if last:
             break
+        page += 1
+    print(f'分片(index={index}, area={area})爬取完成，至第 {page} 页，本次 {count} 位歌手')
+    return True
+
+
+def fetch_singer_list_sharded(writer):
+    """
+    按 SHARD_INDEXES × SHARD_AREAS 分片并发爬取全部歌手，边爬边写入 writer (按 singer_mid 去重)。
+    各分片歌手总数之和少于不筛选时的歌手总数时(有歌手不属于 SHARD_AREAS 中的任何地区)，
+    再不筛选地补爬一遍，按 singer_mid 去重后只写入遗漏的歌手
+    :return: 是否所有分片(包括补爬)都完整爬取；无法得到歌手总数时返回 False，保留检查点下次再检查
+    """
+    # 先请求一次不筛选的首页，得到歌手总数，用于检查分片是否覆盖了全部歌手
+    try:
+        _, expected_total = fetch_singer_page(1)
+    except PAGE_ERRORS as e:
+        print(f"请求歌手总数失败: {e}")
+        expected_total = None
+
+    shards = [(index, area) for index in SHARD_INDEXES for area in SHARD_AREAS]
+    with ThreadPoolExecutor(max_workers=SHARD_WORKERS) as pool:
+        results = list(pool.map(lambda shard: fetch_shard(*shard, writer), shards))
+
+    for (index, area), complete in zip(shards, results):
+        if not complete:
+            print(f"警告: 分片(index={index}, area={area})未能完整爬取")
+    if not all(results):
+        return False
+
+    if expected_total is None:
+        print("警告: 无法得到歌手总数，不能确认分片覆盖了全部歌手，保留检查点，重新运行时再检查")
+        return False
+    with writer.lock:
+        writer.shard_totals[writer.shard_key(ALL, ALL)] = expected_total  # 供增量刷新比对不属于任何分片的歌手
+    # 分片互不重叠，各分片总数之和即分片能覆盖的歌手数 (上次运行留下的检查点中没有的分片按0计，会触发补爬)
+    shard_sum = sum(writer.shard_totals.get(writer.shard_key(*shard), 0) for shard in shards)
+    if shard_sum < expected_total:
+        print(f"警告: 各分片歌手总数之和 {shard_sum} 少于歌手总数 {expected_total}，"
+              f"有歌手不属于 SHARD_AREAS 中的任何地区，不筛选地补爬一遍")
+        return fetch_shard(ALL, ALL, writer)
+    return True
+
+
+def load_singer_csv(filename):
+    """
+    读取已有的歌手CSV
+    :return: dict, singer_mid -> singer_name (保持文件中的顺序)；文件不存在时返回空字典
+    """
+    singers = {}
+    try:
+        with open(filename, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                if row.get('singer_mid'):
+                    singers[row['singer_mid']] = row.get('singer_name') or ''
+    except FileNotFoundError:
+        pass
+    return singers
 
-        # 提取歌手列表
-        singer_list = data.get('singerList', {}).get('data', {}).get('singerlist', [])
 
-        # 如果没有数据，终止循环
+def load_shard_totals(filename):
+    """
+    读取上次完整爬取或刷新时记录的各分片歌手总数
+    :return: dict, 分片 -> 歌手总数；没有记录或无法读取时返回空字典
+    """
+    try:
+        with open(filename + SHARD_TOTALS_SUFFIX, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"分片总数文件 '{filename + SHARD_TOTALS_SUFFIX}' 无法读取，逐个分片翻完: {e}")
+        return {}
+
+
+def save_shard_totals(filename, totals):
+    """原子地写入各分片的歌手总数"""
+    tmp_file = filename + SHARD_TOTALS_SUFFIX + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(totals, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, filename + SHARD_TOTALS_SUFFIX)
+
+
+def refresh_shard(index, area, known, known_total=None):
+    """
+    不读缓存地翻页，找出一个分片中新增或改名的歌手。
+    给出 known_total 时，分片总数比它增加了多少，找到这么多位新歌手就停止翻页(总数不变时只请求第1页)；
+    总数减少(有歌手被删除，无法确定新增了多少)或未给出 known_total 时翻到该分片的歌手总数
+    :param known: dict, 已有的 singer_mid -> singer_name
+    :param known_total: int or None, 上次记录的该分片歌手总数
+    :return: (变化的歌手列表, 是否正常结束, 接口报告的该分片歌手总数)
+    """
+    changes = []
+    new_found = 0
+    total = None
+    page = 1
+    while True:
+        try:
+            singer_list, total = fetch_singer_page(page, use_cache=False, area=area, index=index)
+        except PAGE_ERRORS as e:
+            print(f"分片(index={index}, area={area})第 {page} 页请求失败: {e}")
+            return changes, False, total
         if not singer_list:
-            print("没有更多数据，爬取结束")
             break
-
-        # 提取歌手信息
-        for singer in singer_list:
-            singer_mid = singer.get('singer_mid')  # 使用singer_mid代替singer_id
-            singer_name = singer.get('singer_name')
-            if singer_mid and singer_name:
-                singers.append({
-                    'singer_mid': singer_mid,
-                    'singer_name': singer_name
-                })
-
-        print(f'已爬取第 {page} 页，共 {len(singer_list)} 位歌手')
+        singers = extract_singers(singer_list)
+        changes.extend(singer for singer in singers if known.get(singer['singer_mid']) != singer['singer_name'])
+        new_found += sum(1 for singer in singers if singer['singer_mid'] not in known)
+        if total is not None and (page - 1) * PER_PAGE + len(singer_list) >= total:
+            break
+        if known_total is not None and total is not None and new_found >= total - known_total >= 0:
+            break  # 增加的歌手都已找到
         page += 1
+    return changes, True, total
 
-        # 添加延迟避免请求过快
-        sleep(0.5)
 
-    return singers
+def refresh_singer_list(filename, full=False):
+    """
+    增量刷新已有的歌手CSV：按分片并发比对各分片的歌手总数，只翻有新增歌手的分片，找出新增和改名的歌手
+    (改名只在翻到的页中发现，需要全部检查时使用 full)。
+    全部分片刷新完时，把变化写入 DELTA_FILENAME (change, singer_mid, singer_name, old_name)，
+    再原子地更新 filename 和各分片的歌手总数；有分片未能刷新完时，变化只写入 PARTIAL_DELTA_FILENAME，
+    不修改 filename，下次刷新时重新比对
+    :param full: 不比对上次记录的歌手总数，翻完每个分片
+    :return: (新增数, 改名数, 是否全部分片都刷新完)
+    """
+    known = load_singer_csv(filename)
+    if not known:
+        print(f"'{filename}' 不存在或为空，请先完整爬取一次")
+        return 0, 0, False
+    known_totals = {} if full else load_shard_totals(filename)
+    if known_totals:
+        print(f"已有 {len(known)} 位歌手，只翻歌手总数增加的分片")
+    else:
+        print(f"已有 {len(known)} 位歌手，没有各分片歌手总数的记录(或指定了 --full)，逐个分片翻完比对")
 
+    shards = [(index, area) for index in SHARD_INDEXES for area in SHARD_AREAS]
+    keys = [SingerCsvWriter.shard_key(*shard) for shard in shards]
+    with ThreadPoolExecutor(max_workers=SHARD_WORKERS) as pool:
+        results = list(pool.map(lambda shard, key: refresh_shard(*shard, known, known_totals.get(key)), shards, keys))
 
-def save_to_csv(singers, filename):
-    """将歌手数据保存为CSV文件"""
-    with open(filename, 'w', encoding='utf-8-sig', newline='') as f:  # utf-8-sig处理Excel中文乱码
-        fieldnames = ['singer_mid', 'singer_name']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+    added, renamed, totals = {}, {}, {}
+    complete = True
+    for (index, area), key, (changes, shard_complete, total) in zip(shards, keys, results):
+        if not shard_complete:
+            print(f"警告: 分片(index={index}, area={area})未能完整刷新")
+            complete = False
+        totals[key] = total
+        for singer in changes:
+            mid = singer['singer_mid']
+            (renamed if mid in known else added)[mid] = singer['singer_name']
 
-        writer.writeheader()
-        for singer in singers:
-            writer.writerow(singer)
+    if complete:
+        # 不属于 SHARD_AREAS 中任何地区的歌手只能从不筛选的列表中找到：不筛选的总数比各分片总数之和多出的部分，
+        # 比上次多出的部分增加时才翻页 (没有上次的记录时按0计，与完整爬取一样，总数之和不足就翻完)
+        all_key = SingerCsvWriter.shard_key(ALL, ALL)
+        old_gap = 0
+        if all_key in known_totals and all(key in known_totals for key in keys):
+            old_gap = (known_totals[all_key] or 0) - sum(known_totals[key] or 0 for key in keys)
+        changes, complete, totals[all_key] = refresh_shard(ALL, ALL, {**known, **added},
+                                                           sum(total or 0 for total in totals.values()) + old_gap)
+        if not complete:
+            print("警告: 不筛选的歌手列表未能完整刷新")
+        for singer in changes:
+            mid = singer['singer_mid']
+            (renamed if mid in known else added)[mid] = singer['singer_name']
+
+    delta_file = DELTA_FILENAME if complete else PARTIAL_DELTA_FILENAME
+    with open(delta_file, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['change', 'singer_mid', 'singer_name', 'old_name'])
+        for mid, name in added.items():
+            writer.writerow(['added', mid, name, ''])
+        for mid, name in renamed.items():
+            writer.writerow(['renamed', mid, name, known[mid]])
+    if not complete:
+        print(f"部分分片未能刷新完，已找到的变化只写入 {PARTIAL_DELTA_FILENAME}，不修改 '{filename}'")
+        return len(added), len(renamed), False
+
+    # 先写临时文件再替换，刷新中途出错不会损坏原有的CSV
+    known.update(renamed)
+    known.update(added)
+    tmp_file = filename + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['singer_mid', 'singer_name'])
+        writer.writerows(known.items())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, filename)
+    save_shard_totals(filename, totals)
+    return len(added), len(renamed), True
 
 
 if __name__ == '__main__':
-    # 获取歌手列表
-    print("开始爬取QQ音乐歌手数据...")
-    singer_data = fetch_singer_list()
+    parser = argparse.ArgumentParser(description="爬取QQ音乐歌手列表")
+    parser.add_argument('--refresh', action='store_true',
+                        help=f"增量刷新：只查找新增和改名的歌手，变化写入 {DELTA_FILENAME} 并合并进 {CSV_FILENAME}")
+    parser.add_argument('--full', action='store_true',
+                        help="增量刷新时不比对各分片的歌手总数，翻完每个分片(可以发现所有改名的歌手)")
+    args = parser.parse_args()
 
-    # 保存结果到CSV文件
-    csv_filename = 'qq_music_singers.csv'
-    save_to_csv(singer_data, csv_filename)
+    if args.refresh:
+        print("开始增量刷新QQ音乐歌手数据...")
+        added_count, renamed_count, refresh_complete = refresh_singer_list(CSV_FILENAME, full=args.full)
+        print(f'新增 {added_count} 位、改名 {renamed_count} 位歌手，变化已保存到 '
+              f'{DELTA_FILENAME if refresh_complete else PARTIAL_DELTA_FILENAME}')
+    else:
+        # 获取歌手列表
+        print("开始爬取QQ音乐歌手数据...")
+        # 边爬边保存到CSV文件；存在检查点时从上次中断处继续
+        singer_writer = SingerCsvWriter(CSV_FILENAME)
+        if singer_writer.resumed:
+            print(f"从检查点继续: 已有 {len(singer_writer.seen)} 位歌手，{len(singer_writer.done_shards)} 个分片已完成")
+        all_complete = False
+        try:
+            all_complete = fetch_singer_list_sharded(singer_writer)
+        finally:
+            singer_writer.close(all_complete)
 
-    print(f'共爬取 {len(singer_data)} 位歌手信息，已保存到 {csv_filename}')
-    print(f"文件格式: singer_mid, singer_name")
-    print(f"示例数据:\n{singer_data[0] if singer_data else '无数据'}")
\ No newline at end of file
+        print(f'共爬取 {len(singer_writer.seen)} 位歌手信息，已保存到 {CSV_FILENAME}')
+        print(f"文件格式: singer_mid, singer_name")
+        if not all_complete:
+            print(f"部分分片未能完整爬取，进度已记录在 {singer_writer.checkpoint_file}，重新运行将从中断处继续")
\ No newline at end of file
@@ -0,0 +1,559 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_api.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    musicu.fcg 接口的请求构造与响应拆分工具。
+    musicu.fcg 支持在一个请求体里同时携带多个具名子请求(如 req_1、req_lyric)，服务器会在响应中
+    按相同的名字分别返回各自的结果。本模块负责把多个模块调用打包进一次POST，再把响应拆分回
+    与 get_song_details_api / get_lyrics_api 相同的返回值，从而减少每首歌的网络往返次数。
+    get_song_bundles_api 更进一步，把多首歌的详情和歌词子请求(req_0..req_N)打包进同一个请求。
+    get_artist_songs_api 是各脚本共用的歌手歌曲列表获取函数：拿到首页的 totalNum 后，其余分页并发请求；
+    stream_artist_songs 是它的流式版本，逐页产出歌曲，调用方无需等待整个列表获取完毕；
+    resume_artist_songs 从 qq_music_ledger 记录的歌曲之后继续获取。
+    各响应在解析时即由 qq_music_models 投影为紧凑的具名元组(Song、TrackInfo……)。
+"""
+
+# --- 模块导入 ---
+import math  # 按权重计算需要的歌曲数(向上取整)
+import sys  # 用于错误输出
+from concurrent.futures import ThreadPoolExecutor  # 用于并发请求歌曲列表的分页
+
+import qq_music_client as client  # 共用的连接池HTTP客户端
+import qq_music_coalesce  # 按歌曲 mid 合并重复请求
+import qq_music_models as models  # 响应的字段投影
+
+# --- 全局配置 (Global Configuration) ---
+# 请求体中公共的 'comm' 字段
+DEFAULT_COMM = {"ct": 24, "cv": 0, "g_tk": 5381}
+# 跨歌曲批量请求时，每个POST最多打包多少首歌 (每首歌最多两个子请求)
+SONG_BATCH_SIZE = 20
+# 歌手歌曲列表的分页配置
+SONGS_PER_PAGE = 80  # 每次请求获取的歌曲数，80是比较稳妥的最大值
+PAGE_FANOUT_WORKERS = 8  # 首页之后并发请求分页的线程数，实际速率仍受 'song_list' 限速器约束
+# 歌曲列表的排序方式: 'time' 按发布时间(order=1)，'hot' 按热度(order=2)，
+# 'mix' 分层混合——前 MIX_HOT_SHARE 的名额取热度最高的歌曲，其余名额取最新发布的歌曲(去重)
+ORDER_TIME = 1
+ORDER_HOT = 2
+ORDER_MODES = {'time': ORDER_TIME, 'hot': ORDER_HOT}
+ORDER_MODE_MIX = 'mix'
+MIX_HOT_SHARE = 0.5
+
+
+# --- 子请求构造函数 ---
+
+def track_info_request(song_id):
+    """构造获取单曲详情(语种、流派等)的子请求。"""
+    return {"module": "music.trackInfo.TrackInfoServer", "method": "GetTrackInfo",
+            "param": {"song_mid": song_id}}
+
+
+def lyric_request(song_id):
+    """构造获取歌词的子请求。"""
+    return {"module": "music.musichallSong.PlayLyricInfo", "method": "GetPlayLyricInfo",
+            "param": {"songMID": song_id}}
+
+
+def song_list_request(artist_id, begin, num=SONGS_PER_PAGE, order=1):
+    """构造获取歌手歌曲列表某一页的子请求。order: 1 按发布时间排序, 2 按热度排序。"""
+    return {"module": "musichall.song_list_server", "method": "GetSingerSongList",
+            "param": {"singerMid": artist_id, "begin": begin, "num": num, "order": order}}
+
+
+def build_musicu_payload(sub_requests, comm=None):
+    """
+    把多个具名子请求打包成一个 musicu.fcg 请求体。
+    :param sub_requests: dict, 子请求名 -> {"module": ..., "method": ..., "param": ...}。
+    :param comm: dict or None, 公共参数，默认使用 DEFAULT_COMM。
+    :return: dict, 可直接发送的请求体。
+    """
+    payload = {"comm": dict(comm or DEFAULT_COMM)}
+    payload.update(sub_requests)
+    return payload
+
+
+def call_musicu(sub_requests, comm=None, timeout=10, endpoint=None, use_cache=True):
+    """
+    发送一次打包后的 musicu.fcg 请求，并按子请求名拆分响应。
+    网络错误会直接抛出，由调用方决定如何处理；单个子请求失败(code != 0)只影响它自己。
+    :param sub_requests: dict, 子请求名 -> 子请求。
+    :param endpoint: str or None, 限速器端点名，如 'track_info'、'lyrics'。
+    :param use_cache: bool, 是否读写响应缓存，需要最新数据时传 False。
+    :return: dict, 子请求名 -> 该子请求的 'data' 字段，失败的子请求为 None。
+    """
+    data = client.post_musicu(build_musicu_payload(sub_requests, comm), endpoint=endpoint, timeout=timeout,
+                              use_cache=use_cache)
+    if data.get('code') != 0:
+        return {key: None for key in sub_requests}
+    results = {}
+    for key in sub_requests:
+        sub = data.get(key) or {}
+        results[key] = sub.get('data') if sub.get('code') == 0 else None
+    return results
+
+
+# --- 响应解析函数 ---
+
+def parse_track_info(sub_data):
+    """从 GetTrackInfo 子请求的 data 中投影出 models.TrackInfo，与 get_song_details_api 的返回值一致。"""
+    return models.decode_track_info(sub_data)
+
+
+def parse_lyric(sub_data):
+    """从 GetPlayLyricInfo 子请求的 data 中解码出歌词文本，与 get_lyrics_api 的返回值一致。"""
+    return models.decode_lyric(sub_data)
+
+
+# --- 组合请求 ---
+
+def _empty_bundle():
+    """一首歌的详情和歌词结果，"failed" 为请求失败的项名集合。"""
+    return {"track_info": None, "lyrics": None, "failed": set()}
+
+
+def get_song_bundle_api(song_id, with_track_info=True, with_lyrics=True):
+    """
+    在一次POST中同时获取一首歌的详情和歌词。
+    :param song_id: str, 歌曲的 mid。
+    :param with_track_info: bool, 是否请求歌曲详情。
+    :param with_lyrics: bool, 是否请求歌词(数据库中已有歌词时可以跳过)。
+    :return: dict, {"track_info": ..., "lyrics": ..., "failed": set}，未请求、失败或没有该资源的项为 None；
+             请求失败(传输错误、重试用完、子请求 code != 0)的项名记入 "failed"，
+             不在其中的 None 表示接口正常应答、确实没有该资源。
+    """
+    sub_requests = {}
+    if with_track_info:
+        sub_requests['req_track'] = track_info_request(song_id)
+    if with_lyrics:
+        sub_requests['req_lyric'] = lyric_request(song_id)
+    bundle = _empty_bundle()
+    if not sub_requests:
+        return bundle
+    fields = {'req_track': 'track_info', 'req_lyric': 'lyrics'}
+    try:
+        results = call_musicu(sub_requests, endpoint='track_info' if with_track_info else 'lyrics')
+        bundle['failed'].update(fields[key] for key in sub_requests if results.get(key) is None)
+        bundle['track_info'] = parse_track_info(results.get('req_track'))
+        bundle['lyrics'] = parse_lyric(results.get('req_lyric'))
+    except Exception as e:
+        bundle['failed'].update(fields[key] for key in sub_requests)
+        print(f"  -> 获取歌曲详情和歌词(ID={song_id})时出错: {e}", file=sys.stderr)
+    return bundle
+
+
+
+def _fetch_bundle_batch(track_ids, lyric_ids, bundles):
+    """
+    把一批歌曲的子请求打包成一次POST，结果写入 bundles。
+    整个请求失败时把这一批对半拆分后分别重试，直到定位到单首出错的歌曲，避免一首歌拖垮整批。
+    """
+    sub_requests, targets = {}, {}
+    for song_id in track_ids:
+        key = f"req_{len(sub_requests)}"
+        sub_requests[key] = track_info_request(song_id)
+        targets[key] = (song_id, 'track_info')
+    for song_id in lyric_ids:
+        key = f"req_{len(sub_requests)}"
+        sub_requests[key] = lyric_request(song_id)
+        targets[key] = (song_id, 'lyrics')
+    if not sub_requests:
+        return
+    try:
+        results = call_musicu(sub_requests, endpoint='track_info' if track_ids else 'lyrics')
+    except Exception as e:
+        song_ids = list(dict.fromkeys(list(track_ids) + list(lyric_ids)))
+        if len(song_ids) <= 1:
+            print(f"  -> 批量获取歌曲详情和歌词(ID={song_ids})时出错: {e}", file=sys.stderr)
+            for song_id, field in targets.values():
+                bundles[song_id]['failed'].add(field)
+            return
+        half = set(song_ids[:len(song_ids) // 2])
+        _fetch_bundle_batch([i for i in track_ids if i in half], [i for i in lyric_ids if i in half], bundles)
+        _fetch_bundle_batch([i for i in track_ids if i not in half], [i for i in lyric_ids if i not in half], bundles)
+        return
+    for key, (song_id, field) in targets.items():
+        parse = parse_track_info if field == 'track_info' else parse_lyric
+        if results.get(key) is None:  # 子请求失败，与"没有该资源"区分开，调用方之后可以重试
+            bundles[song_id]['failed'].add(field)
+            continue
+        try:
+            bundles[song_id][field] = parse(results.get(key))
+            # 只记住接口成功应答的结果(包括确实没有该资源的 None)，失败的歌曲之后仍可重新请求
+            qq_music_coalesce.remember(field, song_id, bundles[song_id][field])
+        except Exception as e:  # 单个子请求的数据异常(如歌词解码失败)不影响同批其他歌曲
+            print(f"  -> 解析歌曲(ID={song_id})的{field}时出错: {e}", file=sys.stderr)
+
+
+def get_song_bundles_api(track_ids=(), lyric_ids=(), batch_size=None):
+    """
+    跨歌曲批量获取详情和歌词：每 batch_size 首歌只发送一次POST。
+    单个子请求失败只会让对应歌曲的对应字段为 None，不影响同批的其他歌曲。
+    本次运行中已经获取过的歌曲(例如合唱歌曲出现在多位歌手名下)直接复用结果，不再打包进请求。
+    :param track_ids: iterable of str, 需要获取详情的歌曲 mid。
+    :param lyric_ids: iterable of str, 需要获取歌词的歌曲 mid。
+    :param batch_size: int or None, 每次请求打包的歌曲数，默认使用 SONG_BATCH_SIZE。
+    :return: dict, 歌曲 mid -> {"track_info": ..., "lyrics": ..., "failed": set} (见 get_song_bundle_api)。
+    """
+    batch_size = max(1, batch_size or SONG_BATCH_SIZE)
+    track_ids = list(dict.fromkeys(track_ids))
+    lyric_ids = list(dict.fromkeys(lyric_ids))
+    song_ids = list(dict.fromkeys(track_ids + lyric_ids))
+    bundles = {song_id: _empty_bundle() for song_id in song_ids}
+    track_set, lyric_set = set(), set()
+    for ids, field, pending in ((track_ids, 'track_info', track_set), (lyric_ids, 'lyrics', lyric_set)):
+        for song_id in ids:
+            found, value = qq_music_coalesce.peek(field, song_id)
+            if found:
+                bundles[song_id][field] = value
+            else:
+                pending.add(song_id)
+    song_ids = [song_id for song_id in song_ids if song_id in track_set or song_id in lyric_set]
+    for start in range(0, len(song_ids), batch_size):
+        batch = song_ids[start:start + batch_size]
+        _fetch_bundle_batch([i for i in batch if i in track_set], [i for i in batch if i in lyric_set], bundles)
+    return bundles
+
+
+# --- 歌手歌曲列表 ---
+
+def fetch_song_list_page(artist_id, begin, num=SONGS_PER_PAGE, order=1, use_cache=True):
+    """
+    获取歌手歌曲列表中从 begin 开始的一页。
+    :param use_cache: bool, 是否读写响应缓存，增量刷新时传 False 以取得最新列表。
+    :return: 成功则返回该页的 models.SongListPage(歌手名、totalNum、Song 列表)，失败则返回None。
+    """
+    try:
+        results = call_musicu({"req_1": song_list_request(artist_id, begin, num, order)},
+                              comm={"ct": 24, "cv": 0}, timeout=20, endpoint='song_list', use_cache=use_cache)
+        if results['req_1'] is None:
+            print(f"获取歌手 {artist_id} 的歌曲列表(begin={begin})时，API返回错误", file=sys.stderr)
+        return models.decode_song_list(results['req_1'])
+    except Exception as e:
+        print(f"获取歌手 {artist_id} 歌曲列表(begin={begin})时出错(重试后仍失败): {e}", file=sys.stderr)
+    return None
+
+
+def weighted_limit(total_num, weight):
+    """按权重计算需要的歌曲数: ceil(totalNum * weight)。weight 为None时返回None，表示不限制。"""
+    if weight is None:
+        return None
+    return int(math.ceil(total_num * weight))
+
+
+def page_size(begin, songs_per_page=SONGS_PER_PAGE, limit=None):
+    """begin 处这一页需要请求的歌曲数：有 limit 时最后一页只请求不足一页的剩余部分。"""
+    if limit is None:
+        return songs_per_page
+    return max(0, min(songs_per_page, limit - begin))
+
+
+def page_offsets(total_num, songs_per_page=SONGS_PER_PAGE, limit=None, start=None):
+    """
+    根据首页给出的 totalNum，计算其余分页的 begin 偏移；有 limit 时只覆盖前 limit 首歌。
+    start 为第一个需要请求的 begin，默认为首页之后的第二页(续抓时从已记录的歌曲之后开始)。
+    """
+    end = total_num if limit is None else min(total_num, limit)
+    return list(range(songs_per_page if start is None else start, end, songs_per_page))
+
+
+def next_overflow_offset(pages, songs_per_page=SONGS_PER_PAGE, limit=None):
+    """
+    totalNum 偶尔会少于实际歌曲数：已取到的最后一页是满页时，返回还需继续请求的下一个 begin，否则返回None。
+    有 limit 时，已覆盖前 limit 首歌后不再继续。
+    :param pages: dict, begin -> 该页的 SongListPage (失败为None)。
+    """
+    last_begin = max(pages)
+    last_page = pages[last_begin]
+    next_begin = last_begin + songs_per_page
+    if limit is not None and next_begin >= limit:
+        return None
+    if last_page and len(last_page.songs) >= songs_per_page:
+        return next_begin
+    return None
+
+
+def assemble_pages(artist_id, pages):
+    """
+    按 begin 顺序拼接各分页的歌曲。
+    :return: (all_songs, missing)，missing 为仍然失败的分页 begin 列表。
+    """
+    all_songs, missing = [], []
+    for begin in sorted(pages):
+        if pages[begin] is None:
+            missing.append(begin)
+            continue
+        all_songs.extend(pages[begin].songs)
+    if missing:
+        print(f"获取歌手 {artist_id} 的歌曲列表不完整，以下分页(begin)补请求后仍失败: {missing}", file=sys.stderr)
+    return all_songs, missing
+
+
+def order_for_mode(mode, default=ORDER_TIME):
+    """把排序方式 'time' / 'hot' 转换为接口的 order 参数，mode 为None时返回 default。"""
+    if mode is None:
+        return default
+    if mode not in ORDER_MODES:
+        raise ValueError(f"未知的排序方式: {mode!r}，可选: {', '.join(list(ORDER_MODES) + [ORDER_MODE_MIX])}")
+    return ORDER_MODES[mode]
+
+
+def mix_hot_weight(weight):
+    """'mix' 方式下热度部分使用的权重；weight 为None(获取全部歌曲)时热度列表本身已包含全部歌曲。"""
+    return None if weight is None else weight * MIX_HOT_SHARE
+
+
+def merge_mixed(hot_data, newest_data, weight):
+    """
+    合并 'mix' 方式下分别按热度和按发布时间获取的两份结果：热度靠前的歌曲在前，
+    再用最新发布的歌曲(跳过重复的 mid)补足到 ceil(totalNum * weight) 首。
+    :return: get_artist_songs_api 形式的结果，热度列表获取失败时返回None。
+    """
+    if not hot_data:
+        return None
+    limit = weighted_limit(hot_data['total_num'], weight)
+    songs, seen = [], set()
+    for song in hot_data['songs'] + (newest_data['songs'] if newest_data else []):
+        if limit is not None and len(songs) >= limit:
+            break
+        if song.mid not in seen:
+            seen.add(song.mid)
+            songs.append(song)
+    return {"artist_name": hot_data['artist_name'], "total_num": hot_data['total_num'], "songs": songs}
+
+
+class ArtistSongStream:
+    """
+    歌手歌曲列表的流式结果 (单一排序方式)。
+    首页返回后即可读取 artist_name 和 total_num；迭代时按顺序逐页产出 models.Song，
+    首页之后的分页在后台线程中并发请求，调用方可以一边处理已到达的歌曲一边等待后续分页。
+    某一页失败时立即补请求一次，仍失败则记入 missing 并跳过。只能迭代一次。
+    按发布时间排序时 newest_song 为歌手最新发布的歌曲，可用于下次增量刷新时比对。
+    续抓时 first_page 为已记录的前 resume_from 首歌(整页数)，只请求 resume_from 之后的分页。
+    """
+
+    def __init__(self, artist_id, first_page, songs_per_page=SONGS_PER_PAGE, order=ORDER_TIME, limit=None,
+                 use_cache=True, resume_from=None):
+        self.artist_id = artist_id
+        self.artist_name = first_page.singer_name
+        self.total_num = first_page.total_num
+        self.newest_song = first_page.songs[0] if order == ORDER_TIME and first_page.songs else None
+        self.missing = []  # 补请求后仍失败的分页 begin
+        self._first_page = first_page
+        self._songs_per_page = songs_per_page
+        self._order = order
+        self._limit = limit
+        self._use_cache = use_cache
+        self._resume_from = resume_from
+
+    def _fetch(self, begin):
+        return fetch_song_list_page(self.artist_id, begin, page_size(begin, self._songs_per_page, self._limit),
+                                    self._order, self._use_cache)
+
+    def __iter__(self):
+        start = self._songs_per_page if self._resume_from is None else self._resume_from
+        offsets = page_offsets(self.total_num, self._songs_per_page, self._limit, start)
+        pool = ThreadPoolExecutor(max_workers=max(1, min(PAGE_FANOUT_WORKERS, len(offsets))))
+        try:
+            futures = [(begin, pool.submit(self._fetch, begin)) for begin in offsets]
+            first_songs = self._first_page.songs
+            yield from (first_songs if self._limit is None else first_songs[:self._limit])  # 首页总是整页请求，可能多于所需
+            # 用于判断 totalNum 是否偏少: 以 first_page 的最后一整页作为“已取到的最后一页”
+            last = {start - self._songs_per_page: models.SongListPage(self.artist_name, self.total_num,
+                                                                      first_songs[-self._songs_per_page:])}
+            for begin, future in futures:
+                page = future.result()
+                if page is None:
+                    print(f"  -> 分页(begin={begin})获取失败，正在补请求...")
+                    page = self._fetch(begin)
+                last = {begin: page}
+                if page is None:
+                    self.missing.append(begin)
+                    continue
+                yield from page.songs
+            begin = next_overflow_offset(last, self._songs_per_page, self._limit)
+            while begin is not None:
+                page = self._fetch(begin)
+                last = {begin: page}
+                if page is None:
+                    self.missing.append(begin)
+                else:
+                    yield from page.songs
+                begin = next_overflow_offset(last, self._songs_per_page, self._limit)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)  # 调用方提前停止迭代时取消尚未开始的分页请求
+        if self.missing:
+            print(f"获取歌手 {self.artist_id} 的歌曲列表不完整，以下分页(begin)补请求后仍失败: {self.missing}",
+                  file=sys.stderr)
+
+
+class MixedArtistSongStream:
+    """
+    'mix' 排序方式的流式结果：先产出热度靠前的歌曲，再用最新发布的歌曲(跳过重复的 mid)补足到 limit 首。
+    属性与 ArtistSongStream 相同。
+    """
+
+    def __init__(self, hot_stream, newest_stream, limit):
+        self.artist_id = hot_stream.artist_id
+        self.artist_name = hot_stream.artist_name
+        self.total_num = hot_stream.total_num
+        self.newest_song = newest_stream.newest_song if newest_stream is not None else None
+        self._streams = [stream for stream in (hot_stream, newest_stream) if stream is not None]
+        self._limit = limit
+
+    @property
+    def missing(self):
+        return [begin for stream in self._streams for begin in stream.missing]
+
+    def __iter__(self):
+        seen = set()
+        for stream in self._streams:
+            for song in stream:
+                if self._limit is not None and len(seen) >= self._limit:
+                    return
+                if song.mid not in seen:
+                    seen.add(song.mid)
+                    yield song
+
+
+class SongListing:
+    """已经在内存中的歌曲列表(如增量刷新得到的新歌)，属性和迭代方式与 ArtistSongStream 相同。"""
+
+    def __init__(self, artist_id, artist_name, total_num, songs, newest_song=None):
+        self.artist_id = artist_id
+        self.artist_name = artist_name
+        self.total_num = total_num
+        self.newest_song = newest_song
+        self.missing = []
+        self._songs = songs
+
+    def __iter__(self):
+        return iter(self._songs)
+
+
+def stream_artist_songs(artist_id, songs_per_page=SONGS_PER_PAGE, order=ORDER_TIME, weight=None, mode=None):
+    """
+    流式获取歌手的歌曲列表：只同步请求首页，其余分页在迭代时后台并发请求、按顺序逐页产出。
+    用法: stream = stream_artist_songs(artist_id)；stream.artist_name / stream.total_num；for song in stream: ...
+    :param artist_id: str, 歌手的 mid。
+    :param songs_per_page: int, 每页歌曲数。
+    :param order: int, 1 按发布时间排序, 2 按热度排序。
+    :param weight: float or None, 抓取权重，给出时只获取前 ceil(totalNum * weight) 首歌。
+    :param mode: str or None, 排序方式 'time' / 'hot' / 'mix'，给出时取代 order。
+    :return: ArtistSongStream / MixedArtistSongStream，首页获取失败时返回None。
+    """
+    if mode == ORDER_MODE_MIX:
+        hot_stream = stream_artist_songs(artist_id, songs_per_page, ORDER_HOT, mix_hot_weight(weight))
+        if hot_stream is None or weight is None:
+            return hot_stream
+        newest_stream = stream_artist_songs(artist_id, songs_per_page, ORDER_TIME, weight)
+        return MixedArtistSongStream(hot_stream, newest_stream, weighted_limit(hot_stream.total_num, weight))
+    order = order_for_mode(mode, order)
+
+    print(f"\n正在获取歌手详情: ID={artist_id}")
+    first_page = fetch_song_list_page(artist_id, 0, songs_per_page, order)
+    if not first_page or not first_page.songs:
+        return None
+    print(f"成功锁定歌手: '{first_page.singer_name}'，官方记录总歌曲数: {first_page.total_num}")
+    limit = weighted_limit(first_page.total_num, weight)
+    if limit is not None:
+        print(f"  -> 按权重 {weight:.2%} 只需获取前 {limit} 首歌曲")
+    return ArtistSongStream(artist_id, first_page, songs_per_page, order, limit)
+
+
+def resume_artist_songs(artist_id, artist_name, total_num, known_songs, newest_song=None,
+                        songs_per_page=SONGS_PER_PAGE):
+    """
+    续抓：已记录的歌曲(按发布时间排序的前若干首)不再请求，只请求其后的分页。
+    已记录的歌曲数不是整页时，最后不满一页的部分随下一页重新获取。
+    :param known_songs: list of models.Song, 上次运行已记录的歌曲列表。
+    :param newest_song: models.Song or None, 上次运行看到的最新歌曲。
+    :return: ArtistSongStream，先产出已记录的歌曲，再产出新请求的分页。
+    """
+    resume_from = len(known_songs) // songs_per_page * songs_per_page
+    first_page = models.SongListPage(artist_name, total_num, list(known_songs[:resume_from]))
+    stream = ArtistSongStream(artist_id, first_page, songs_per_page, ORDER_TIME, resume_from=resume_from)
+    stream.newest_song = newest_song
+    return stream
+
+
+def refresh_artist_songs(artist_id, known_total=None, known_newest_mid=None, songs_per_page=SONGS_PER_PAGE):
+    """
+    增量刷新：绕过响应缓存只请求首页(按发布时间排序)，与上次记录的 totalNum 和最新歌曲比对。
+    1. 两者都没变 -> 不再翻页，返回空的 SongListing；
+    2. 有新歌 -> 只请求覆盖新增数量(再多一页余量)的分页，直到遇到上次记录的最新歌曲，返回其之前的新歌；
+    3. 没有快照，或在这些分页中找不到上次的最新歌曲(歌曲被下架、重排等) -> 退回完整获取。
+    :param artist_id: str, 歌手的 mid。
+    :param known_total: int or None, 上次记录的 totalNum。
+    :param known_newest_mid: str or None, 上次记录的最新歌曲 mid。
+    :return: SongListing / ArtistSongStream，newest_song 为本次看到的最新歌曲；首页获取失败时返回None。
+    """
+    print(f"\n正在刷新歌手: ID={artist_id}")
+    first_page = fetch_song_list_page(artist_id, 0, songs_per_page, ORDER_TIME, use_cache=False)
+    if not first_page or not first_page.songs:
+        return None
+    newest_song = first_page.songs[0]
+    if not known_newest_mid:
+        print(f"  -> 歌手 '{first_page.singer_name}' 没有历史快照，获取全部 {first_page.total_num} 首歌曲")
+        return ArtistSongStream(artist_id, first_page, songs_per_page, ORDER_TIME, use_cache=False)
+    if newest_song.mid == known_newest_mid and first_page.total_num == known_total:
+        print(f"  -> 歌手 '{first_page.singer_name}' 没有新歌 (总数仍为 {first_page.total_num})")
+        return SongListing(artist_id, first_page.singer_name, first_page.total_num, [], newest_song)
+
+    first_mids = [song.mid for song in first_page.songs]
+    if known_newest_mid in first_mids:  # 新歌都在首页之内，无需翻页
+        new_songs = first_page.songs[:first_mids.index(known_newest_mid)]
+    else:
+        grown = max(0, first_page.total_num - (known_total or 0))
+        stream = ArtistSongStream(artist_id, first_page, songs_per_page, ORDER_TIME, limit=grown + songs_per_page,
+                                  use_cache=False)
+        new_songs = []
+        for song in stream:
+            if song.mid == known_newest_mid:
+                break
+            new_songs.append(song)
+        else:
+            new_songs = None
+    if new_songs is not None:
+        print(f"  -> 歌手 '{first_page.singer_name}' 新增 {len(new_songs)} 首歌曲 "
+              f"(总数 {known_total} -> {first_page.total_num})")
+        return SongListing(artist_id, first_page.singer_name, first_page.total_num, new_songs, newest_song)
+    print(f"  -> 未找到上次记录的最新歌曲，重新获取歌手 '{first_page.singer_name}' 的全部歌曲")
+    return ArtistSongStream(artist_id, first_page, songs_per_page, ORDER_TIME, use_cache=False)
+
+
+def iter_batches(songs, batch_size):
+    """把歌曲迭代器按 batch_size 分组，逐组产出 (本组第一首的序号, 本组歌曲列表)。"""
+    batch, start = [], 0
+    for song in songs:
+        batch.append(song)
+        if len(batch) >= batch_size:
+            yield start, batch
+            start += len(batch)
+            batch = []
+    if batch:
+        yield start, batch
+
+
+def get_artist_songs_api(artist_id, songs_per_page=SONGS_PER_PAGE, order=ORDER_TIME, weight=None, mode=None):
+    """
+    通过歌手ID获取其名下的所有歌曲列表。
+    先请求第一页拿到歌手名和 totalNum，再把剩余所有 begin 偏移一次性并发请求，最后按顺序拼接；
+    失败的分页会立即补请求一次，仍失败时打印警告并返回其余部分。
+    给出 weight 时只请求覆盖前 ceil(totalNum * weight) 首歌的分页(最后一页只请求剩余部分)，
+    结果与获取全部歌曲后再截取前 ceil(totalNum * weight) 首相同。
+    需要边获取边处理时请使用 stream_artist_songs。
+    :param artist_id: str, 歌手的 mid，如陈奕迅的 '003Nz2So3XXYek'。
+    :param songs_per_page: int, 每页歌曲数。
+    :param order: int, 1 按发布时间排序, 2 按热度排序。
+    :param weight: float or None, 抓取权重 (0~1)，为None时获取全部歌曲。
+    :param mode: str or None, 排序方式 'time' / 'hot' / 'mix'，给出时取代 order (见 ORDER_MODES)。
+    :return: 成功则返回 {"artist_name": ..., "total_num": totalNum, "songs": [models.Song, ...]}，失败则返回None。
+    """
+    stream = stream_artist_songs(artist_id, songs_per_page, order, weight, mode)
+    if stream is None:
+        return None
+    all_songs = list(stream)
+    print(f"  -> 歌曲列表获取完成，累计: {len(all_songs)} / {stream.total_num}")
+    return {"artist_name": stream.artist_name, "total_num": stream.total_num, "songs": all_songs}
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_async.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    基于 asyncio + aiohttp 的歌手歌曲列表并发抓取引擎。
+    同步版的 get_artist_songs_api 只能一个歌手一个歌手地串行翻页，全量跑完 qq_music_singers.csv 需要数天。
+    本模块用有限个协程并发处理多个歌手，并用全局的每秒请求数预算控制总体请求速率，
+    同时与同步脚本共用 qq_music_governor 中 'song_list' 端点的自适应限速器。
+    返回值与 get_artist_songs_api 完全相同: {"artist_name": ..., "total_num": ..., "songs": [...]}，失败时为 None；
+    给出各歌手的抓取权重时同样只请求覆盖前 ceil(totalNum * weight) 首歌的分页；排序方式同样支持
+    'time' / 'hot' / 'mix' (见 qq_music_api.ORDER_MODES)。
+    aiohttp 为可选依赖，未安装时 crawl_artists 会退回到调用方提供的同步函数逐个获取。
+"""
+
+# --- 模块导入 ---
+import asyncio  # 协程调度
+import json  # 用于序列化请求体
+import sys  # 用于错误输出
+
+try:
+    import aiohttp  # 异步HTTP客户端 (可选依赖: pip install aiohttp)
+except ImportError:
+    aiohttp = None
+
+import qq_music_api  # 歌曲列表分页的构造与拼接
+import qq_music_cache as cache  # 持久化响应缓存
+import qq_music_governor as governor  # 按端点的自适应限速器
+import qq_music_models as models  # JSON解码与响应的字段投影
+import qq_music_retry as retry  # 退避重试与熔断器
+from qq_music_client import HEADERS, MUSICU_URL, response_ok
+
+# --- 全局配置 (Global Configuration) ---
+CONCURRENCY = 50  # 同时处理的歌手数(即同时在途的请求数上限)
+REQUESTS_PER_SECOND = 10  # 全局每秒请求数预算，<=0 表示不限速
+SONGS_PER_PAGE = qq_music_api.SONGS_PER_PAGE  # 每次请求获取的歌曲数，与同步版保持一致
+REQUEST_TIMEOUT = 20  # 单次请求超时时间(秒)
+# 按 qq_music_retry 的策略重试的错误：aiohttp 的传输层错误、超时、JSON解析失败、接口错误码
+RETRYABLE_ERRORS = ((aiohttp.ClientError, asyncio.TimeoutError, ValueError, retry.ApiError) if aiohttp is not None
+                    else retry.RETRYABLE_ERRORS)
+
+
+def is_available():
+    """判断当前环境是否安装了 aiohttp，可以使用异步引擎。"""
+    return aiohttp is not None
+
+
+class AsyncRateLimiter:
+    """
+    全局请求速率限制器。
+    按固定间隔为每个请求分配一个发送时刻，协程在各自的时刻到来前等待，
+    从而把所有协程的总请求速率控制在 requests_per_second 以内。
+    """
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second and requests_per_second > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        """等待直到轮到本次请求发送。"""
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def _post_musicu(session, limiter, req_data, endpoint='song_list'):
+    """
+    发送一次 musicu.fcg 请求并返回解析后的JSON。
+    先查询与同步客户端共用的响应缓存；未命中时每次尝试都会向端点限速器领取令牌并反馈结果，
+    失败时按 qq_music_retry 的策略退避重试。
+    """
+    # 缓存是加锁的同步 SQLite 调用，放到线程池中执行，不阻塞事件循环里的其他协程
+    cached, request_payload = await asyncio.to_thread(cache.lookup_musicu, MUSICU_URL, req_data)
+    if request_payload is None:
+        return cache.merge_musicu(cached)
+    loop = asyncio.get_running_loop()
+
+    async def attempt():
+        await limiter.acquire()
+        wait = governor.get_governor(endpoint).reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        start = loop.time()
+        try:
+            async with session.post(MUSICU_URL, data=json.dumps(request_payload)) as res:
+                res.raise_for_status()
+                # 接口返回的 Content-Type 并不总是 application/json，因此直接按字节解码
+                data = models.loads(await res.read())
+        except Exception:
+            governor.report(endpoint, loop.time() - start, ok=False)
+            raise
+        governor.report(endpoint, loop.time() - start, ok=response_ok(data))
+        if data.get('code', 0) != 0:
+            raise retry.ApiError(data.get('code'), data)
+        return data
+
+    try:
+        data = await retry.call_with_retry_async(endpoint, attempt, retry_on=RETRYABLE_ERRORS)
+    except retry.ApiError as e:
+        data = e.data
+    await asyncio.to_thread(cache.store_musicu, MUSICU_URL, request_payload, data)
+    return cache.merge_musicu(cached, data) if cached else data
+
+
+async def _fetch_page(session, limiter, artist_id, begin, num=SONGS_PER_PAGE, order=qq_music_api.ORDER_TIME):
+    """异步获取歌手歌曲列表中从 begin 开始的 num 首歌，返回 models.SongListPage，失败返回None。"""
+    req_data = {"comm": {"ct": 24, "cv": 0}, "req_1": qq_music_api.song_list_request(artist_id, begin, num, order)}
+    try:
+        data = await _post_musicu(session, limiter, req_data)
+        if data.get('code') == 0 and data.get('req_1', {}).get('code') == 0:
+            return models.decode_song_list(data['req_1']['data'])
+        print(f"获取歌手 {artist_id} 的歌曲列表(begin={begin})时，API返回错误: {data}", file=sys.stderr)
+    except Exception as e:
+        print(f"获取歌手 {artist_id} 歌曲列表(begin={begin})时出错(重试后仍失败): {e}", file=sys.stderr)
+    return None
+
+
+async def _fetch_pages(session, limiter, artist_id, offsets, limit=None, order=qq_music_api.ORDER_TIME):
+    """并发请求多个分页，返回 begin -> 该页的 SongListPage (失败为None)。"""
+    pages = await asyncio.gather(*(_fetch_page(session, limiter, artist_id, begin,
+                                               qq_music_api.page_size(begin, SONGS_PER_PAGE, limit), order)
+                                   for begin in offsets))
+    return dict(zip(offsets, pages))
+
+
+async def fetch_artist_songs(session, limiter, artist_id, weight=None, order=qq_music_api.ORDER_TIME):
+    """
+    异步获取单个歌手的全部歌曲，逻辑与同步版 qq_music_api.get_artist_songs_api 一致：
+    首页返回 totalNum 后，其余分页同时发出，失败的分页补请求一轮，最后按顺序拼接。
+    :param session: aiohttp.ClientSession, 共用的会话。
+    :param limiter: AsyncRateLimiter, 全局速率限制器。
+    :param artist_id: str, 歌手的 mid。
+    :param weight: float or None, 抓取权重，给出时只获取前 ceil(totalNum * weight) 首歌。
+    :param order: int, 1 按发布时间排序, 2 按热度排序。
+    :return: 成功则返回 {"artist_name": ..., "total_num": ..., "songs": [...]}，失败则返回None。
+    """
+    first_page = await _fetch_page(session, limiter, artist_id, 0, SONGS_PER_PAGE, order)
+    if not first_page or not first_page.songs:
+        return None
+    artist_name = first_page.singer_name
+    total_songs_count = first_page.total_num
+    limit = qq_music_api.weighted_limit(total_songs_count, weight)
+
+    pages = {0: first_page}
+    offsets = qq_music_api.page_offsets(total_songs_count, SONGS_PER_PAGE, limit)
+    pages.update(await _fetch_pages(session, limiter, artist_id, offsets, limit, order))
+    gaps = [begin for begin in offsets if pages.get(begin) is None]
+    if gaps:
+        pages.update(await _fetch_pages(session, limiter, artist_id, gaps, limit, order))
+    begin = qq_music_api.next_overflow_offset(pages, SONGS_PER_PAGE, limit)
+    while begin is not None:
+        pages[begin] = await _fetch_page(session, limiter, artist_id, begin,
+                                         qq_music_api.page_size(begin, SONGS_PER_PAGE, limit), order)
+        begin = qq_music_api.next_overflow_offset(pages, SONGS_PER_PAGE, limit)
+
+    all_songs, _ = qq_music_api.assemble_pages(artist_id, pages)
+    if limit is not None:
+        del all_songs[limit:]  # 首页总是整页请求，可能多于所需
+    print(f"  -> 歌手 '{artist_name}' ({artist_id}) 已获取 {len(all_songs)} / {total_songs_count} 首歌曲")
+    return {"artist_name": artist_name, "total_num": total_songs_count, "songs": all_songs}
+
+
+async def fetch_artist_songs_by_mode(session, limiter, artist_id, weight=None, mode=None):
+    """
+    按排序方式异步获取单个歌手的歌曲，'mix' 方式下热度和发布时间两份列表同时请求后合并。
+    :param mode: str or None, 'time' / 'hot' / 'mix'，为None时按发布时间排序。
+    :return: 与 fetch_artist_songs 相同。
+    """
+    if mode != qq_music_api.ORDER_MODE_MIX:
+        return await fetch_artist_songs(session, limiter, artist_id, weight, qq_music_api.order_for_mode(mode))
+    if weight is None:
+        return await fetch_artist_songs(session, limiter, artist_id, None, qq_music_api.ORDER_HOT)
+    hot_data, newest_data = await asyncio.gather(
+        fetch_artist_songs(session, limiter, artist_id, qq_music_api.mix_hot_weight(weight), qq_music_api.ORDER_HOT),
+        fetch_artist_songs(session, limiter, artist_id, weight, qq_music_api.ORDER_TIME))
+    return qq_music_api.merge_mixed(hot_data, newest_data, weight)
+
+
+async def crawl_artists_async(artist_ids, concurrency=CONCURRENCY, requests_per_second=REQUESTS_PER_SECOND,
+                              weights=None, mode=None, on_result=None):
+    """
+    并发获取一批歌手的歌曲列表。
+    使用固定数量的工作协程从队列中领取歌手，保证同时在途的歌手数不超过 concurrency。
+    :param artist_ids: iterable of str, 歌手 mid 列表。
+    :param concurrency: int, 并发协程数。
+    :param requests_per_second: float, 全局每秒请求数预算。
+    :param weights: dict or None, 歌手 mid -> 抓取权重，未给出的歌手获取全部歌曲。
+    :param mode: str or None, 排序方式 'time' / 'hot' / 'mix'。
+    :param on_result: callable or None, 每位歌手获取完毕时立即以 on_result(artist_id, result) 调用
+                      (在线程池中执行，可以写数据库)，不必等整批结束。
+    :return: dict, 歌手 mid -> get_artist_songs_api 形式的结果(失败为None)。
+    """
+    weights = weights or {}
+    queue = asyncio.Queue()
+    for artist_id in dict.fromkeys(artist_ids):  # 去重并保持顺序
+        queue.put_nowait(artist_id)
+    results = {}
+    limiter = AsyncRateLimiter(requests_per_second)
+    connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+
+    async with aiohttp.ClientSession(headers=HEADERS, connector=connector, timeout=timeout,
+                                     trust_env=False) as session:
+        async def worker():
+            while True:
+                try:
+                    artist_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results[artist_id] = await fetch_artist_songs_by_mode(session, limiter, artist_id,
+                                                                      weights.get(artist_id), mode)
+                if on_result is not None:
+                    await asyncio.to_thread(on_result, artist_id, results[artist_id])
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, queue.qsize())))]
+        await asyncio.gather(*workers)
+    return results
+
+
+def crawl_artists(artist_ids, concurrency=CONCURRENCY, requests_per_second=REQUESTS_PER_SECOND, fallback=None,
+                  weights=None, mode=None, on_result=None):
+    """
+    同步入口：并发获取一批歌手的歌曲列表，供普通脚本直接调用。
+    :param artist_ids: iterable of str, 歌手 mid 列表。
+    :param concurrency: int, 并发协程数。
+    :param requests_per_second: float, 全局每秒请求数预算。
+    :param fallback: callable or None, 未安装 aiohttp 时逐个调用的同步函数(如 get_artist_songs_api)，
+                     给出 weights / mode 时以 fallback(artist_id, weight=..., mode=...) 的形式调用。
+    :param weights: dict or None, 歌手 mid -> 抓取权重，只获取前 ceil(totalNum * weight) 首歌。
+    :param mode: str or None, 排序方式 'time' / 'hot' / 'mix'，为None时按发布时间排序。
+    :param on_result: callable or None, 每位歌手获取完毕时立即调用 on_result(artist_id, result)，
+                      调用方可以借此边获取边落盘。
+    :return: dict, 歌手 mid -> {"artist_name": ..., "total_num": ..., "songs": [...]} 或 None。
+    """
+    artist_ids = list(dict.fromkeys(artist_ids))  # 去重并保持顺序
+    if mode not in (None, qq_music_api.ORDER_MODE_MIX):
+        qq_music_api.order_for_mode(mode)  # 提前校验排序方式
+    if not is_available():
+        if fallback is None:
+            raise RuntimeError("未安装 aiohttp，无法使用异步抓取引擎 (pip install aiohttp)")
+        results = {}
+        for artist_id in artist_ids:
+            kwargs = {}
+            if weights is not None:
+                kwargs['weight'] = weights.get(artist_id)
+            if mode is not None:
+                kwargs['mode'] = mode
+            results[artist_id] = fallback(artist_id, **kwargs)
+            if on_result is not None:
+                on_result(artist_id, results[artist_id])
+        return results
+    print(f"\n正在并发获取 {len(artist_ids)} 位歌手的歌曲列表 (并发: {concurrency}, 限速: {requests_per_second} 次/秒)...")
+    return asyncio.run(crawl_artists_async(artist_ids, concurrency, requests_per_second, weights, mode, on_result))
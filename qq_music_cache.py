@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_cache.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    持久化的接口响应缓存，透明地挂在 qq_music_client 之下。
+    任何脚本重跑(例如导出步骤崩溃之后)都会把 GetSingerSongList 等接口重新请求一遍，即使几分钟前刚请求过。
+    本模块以 (接口地址, module, method, param) 的规范化哈希为键，把每个成功的子请求响应压缩后存入
+    SQLite 文件；按 module 设置不同的有效期(TTL)，总大小超过上限时按最近最少使用(LRU)淘汰。
+    一个 musicu.fcg 请求中命中缓存的子请求不会再发往服务器，只有未命中的部分才会真正请求。
+"""
+
+# --- 模块导入 ---
+import hashlib  # 计算缓存键
+import json  # 规范化请求参数，生成缓存键
+import sqlite3  # 缓存存储
+import sys  # 错误输出
+import threading  # 多线程共用同一个连接时需要加锁
+import time  # 有效期与LRU时间戳
+import zlib  # 压缩响应内容
+
+import qq_music_models as models  # JSON编解码(可用时使用 orjson)
+
+# --- 全局配置 (Global Configuration) ---
+CACHE_ENABLED = True  # 总开关
+CACHE_FILE = 'qq_music_cache.db'  # 缓存数据库文件
+MAX_CACHE_BYTES = 512 * 1024 * 1024  # 压缩后内容的总大小上限，超过后按LRU淘汰到上限的90%
+# 命中时距上次记录的访问时间超过这么久(秒)才更新 accessed_at：LRU 只需要粗粒度的时间，
+# 不必每次命中都写一次盘(提交一个事务)
+ACCESS_TOUCH_INTERVAL = 600
+
+# 各 module 的缓存有效期(秒)，0 表示不缓存；未登记的 module 使用 DEFAULT_TTL
+MODULE_TTLS = {
+    'musichall.song_list_server': 6 * 3600,  # 歌手歌曲列表，变化不频繁
+    'music.trackInfo.TrackInfoServer': 30 * 86400,  # 歌曲详情(语种、流派)，几乎不变
+    'music.musichallSong.PlayLyricInfo': 30 * 86400,  # 歌词，几乎不变
+    'Music.SingerListServer': 86400,  # 歌手总列表
+    'vkey.GetVkeyServer': 0,  # 播放链接带有时效性签名，不能缓存
+    'comments': 3600,  # 评论接口(GET)，更新较快
+}
+DEFAULT_TTL = 3600
+
+# --- 内部状态 ---
+_conn = None
+_lock = threading.Lock()
+_total_bytes = None  # 当前缓存内容总大小，首次使用时从数据库统计
+
+
+def _get_conn():
+    """打开(必要时创建)缓存数据库。调用方需持有 _lock。"""
+    global _conn, _total_bytes
+    if _conn is None:
+        _conn = sqlite3.connect(CACHE_FILE, check_same_thread=False)
+        _conn.execute('''
+        CREATE TABLE IF NOT EXISTS responses (
+            cache_key TEXT PRIMARY KEY,
+            module TEXT,
+            expires_at REAL,
+            accessed_at REAL,
+            size INTEGER,
+            body BLOB
+        )''')
+        _conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)')
+        _conn.commit()
+        _total_bytes = _conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+    return _conn
+
+
+def make_key(url, module, method, param):
+    """对 (接口地址, module, method, param) 做规范化(键排序、紧凑格式)后取SHA-1，作为缓存键。"""
+    canonical = json.dumps([url, module, method, param], sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def ttl_for(module):
+    """返回某个 module 的缓存有效期(秒)。"""
+    return MODULE_TTLS.get(module, DEFAULT_TTL)
+
+
+def get(cache_key):
+    """
+    读取一条缓存。
+    :return: 解压后的响应对象；未命中或已过期时返回None。
+    """
+    if not CACHE_ENABLED:
+        return None
+    try:
+        with _lock:
+            conn = _get_conn()
+            row = conn.execute('SELECT expires_at, body, accessed_at FROM responses WHERE cache_key = ?',
+                               (cache_key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if row[0] < now:
+                _delete(conn, cache_key)
+                conn.commit()
+                return None
+            if now - (row[2] or 0) >= ACCESS_TOUCH_INTERVAL:
+                conn.execute('UPDATE responses SET accessed_at = ? WHERE cache_key = ?', (now, cache_key))
+                conn.commit()
+        return models.loads(zlib.decompress(row[1]))
+    except (sqlite3.Error, zlib.error, ValueError) as e:
+        print(f"  -> 读取响应缓存失败: {e}", file=sys.stderr)
+        return None
+
+
+def put(cache_key, module, value):
+    """写入一条缓存；该 module 的有效期为0时不写入。超过总大小上限时触发LRU淘汰。"""
+    global _total_bytes
+    ttl = ttl_for(module)
+    if not CACHE_ENABLED or ttl <= 0:
+        return
+    body = zlib.compress(models.dumps(value))
+    now = time.time()
+    try:
+        with _lock:
+            conn = _get_conn()
+            _delete(conn, cache_key)
+            conn.execute('INSERT INTO responses (cache_key, module, expires_at, accessed_at, size, body) '
+                         'VALUES (?, ?, ?, ?, ?, ?)', (cache_key, module, now + ttl, now, len(body), body))
+            _total_bytes += len(body)
+            if _total_bytes > MAX_CACHE_BYTES:
+                _evict(conn)
+            conn.commit()
+    except sqlite3.Error as e:
+        print(f"  -> 写入响应缓存失败: {e}", file=sys.stderr)
+
+
+def _delete(conn, cache_key):
+    """删除一条缓存并同步总大小。调用方需持有 _lock。"""
+    global _total_bytes
+    row = conn.execute('SELECT size FROM responses WHERE cache_key = ?', (cache_key,)).fetchone()
+    if row:
+        conn.execute('DELETE FROM responses WHERE cache_key = ?', (cache_key,))
+        _total_bytes -= row[0]
+
+
+def _evict(conn):
+    """先清理过期条目，再按最近访问时间从旧到新淘汰，直到总大小降到上限的90%。调用方需持有 _lock。"""
+    global _total_bytes
+    conn.execute('DELETE FROM responses WHERE expires_at < ?', (time.time(),))
+    _total_bytes = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+    target = MAX_CACHE_BYTES * 0.9
+    while _total_bytes > target:
+        rows = conn.execute('SELECT cache_key, size FROM responses ORDER BY accessed_at LIMIT 500').fetchall()
+        if not rows:
+            break
+        for cache_key, size in rows:
+            conn.execute('DELETE FROM responses WHERE cache_key = ?', (cache_key,))
+            _total_bytes -= size
+            if _total_bytes <= target:
+                break
+
+
+def clear():
+    """清空全部缓存。"""
+    global _total_bytes
+    with _lock:
+        conn = _get_conn()
+        conn.execute('DELETE FROM responses')
+        conn.commit()
+        _total_bytes = 0
+
+
+# --- musicu.fcg 子请求级别的缓存 ---
+
+def _is_sub_request(value):
+    return isinstance(value, dict) and 'module' in value and 'method' in value
+
+
+def lookup_musicu(url, payload):
+    """
+    按子请求查找缓存。
+    :param url: str, 接口地址。
+    :param payload: dict, musicu.fcg 请求体。
+    :return: (cached, request_payload)。cached 为 子请求名 -> 缓存的子响应；
+             request_payload 为去掉已命中子请求后仍需发送的请求体，全部命中时为None。
+    """
+    cached, request_payload, missing = {}, {}, 0
+    for key, value in payload.items():
+        if _is_sub_request(value) and ttl_for(value['module']) > 0:
+            hit = get(make_key(url, value['module'], value['method'], value.get('param')))
+            if hit is not None:
+                cached[key] = hit
+                continue
+        request_payload[key] = value
+        if _is_sub_request(value):
+            missing += 1
+    return cached, (request_payload if missing else None)
+
+
+def store_musicu(url, payload, data):
+    """把响应中成功(code == 0)的子请求逐个写入缓存。"""
+    if not CACHE_ENABLED or data.get('code', 0) != 0:
+        return
+    for key, value in payload.items():
+        sub = data.get(key)
+        if _is_sub_request(value) and isinstance(sub, dict) and sub.get('code') == 0:
+            put(make_key(url, value['module'], value['method'], value.get('param')), value['module'], sub)
+
+
+def merge_musicu(cached, data=None):
+    """把命中缓存的子响应与新请求到的响应合并成一个完整的 musicu.fcg 响应。"""
+    merged = dict(data) if data is not None else {"code": 0}
+    merged.update(cached)
+    return merged
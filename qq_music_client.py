@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_client.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    所有爬虫脚本共用的HTTP客户端模块。
+    此前每个API函数都直接调用 requests.post / requests.get，每次请求都要重新建立一次
+    TCP+TLS 连接。本模块按主机(u.y.qq.com、c.y.qq.com、y.qq.com……)各维护一个
+    requests.Session 连接池，复用长连接(keep-alive)，并统一管理默认请求头、代理修复配置和超时时间。
+    post_musicu / get_json 在发送前向 qq_music_governor 领取对应端点的令牌，并把耗时和结果反馈给它；
+    失败时按 qq_music_retry 的策略退避重试，端点持续失败时由熔断器暂停请求。
+    两者都会先查询 qq_music_cache 的持久化响应缓存，命中的部分不再发送请求。
+"""
+
+# --- 模块导入 ---
+import json  # 用于序列化请求体
+import threading  # 用于保证多线程下连接池只被创建一次
+import time  # 用于统计请求耗时
+from urllib.parse import urlsplit  # 用于从URL中解析出主机名
+
+import requests  # 用于发送HTTP网络请求
+from requests.adapters import HTTPAdapter  # 用于配置连接池大小
+
+import qq_music_cache as cache  # 持久化响应缓存
+import qq_music_governor as governor  # 按端点的自适应限速器
+import qq_music_models as models  # JSON解码(可用时使用 orjson)
+import qq_music_retry as retry  # 退避重试与熔断器
+
+# --- 全局配置 (Global Configuration) ---
+
+# 1. 常用接口地址
+MUSICU_URL = 'https://u.y.qq.com/cgi-bin/musicu.fcg'  # QQ音乐通用数据接口
+COMMENT_URL = 'https://c.y.qq.com/base/fcgi-bin/fcg_global_comment_h5.fcg'  # 评论接口(较旧，但目前依然有效)
+
+# 2. 伪装请求头 (Request Headers)
+# 模拟浏览器发送请求，这是反爬虫策略中最基本的一步。
+# 'User-Agent' 告诉服务器我们是普通用户通过浏览器访问。
+# 'Referer' 告诉服务器请求是从QQ音乐官网页面跳转过来的，增加请求的“合法性”。
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36',
+    'Referer': 'https://y.qq.com/',
+    'Content-Type': 'application/json'  # 明确告诉服务器我们发送的是JSON格式数据
+}
+
+# 3. 代理修复配置
+# 用空的代理字典覆盖系统代理，并关闭 trust_env，彻底避免无效代理配置导致的 ProxyError。
+NO_PROXY = {'http': None, 'https': None}
+
+# 4. 连接池与超时配置
+POOL_MAXSIZE = 16  # 每个主机最多保持的长连接数，并发抓取时应不小于并发数
+DEFAULT_TIMEOUT = 10  # 未显式指定时使用的超时时间(秒)
+
+# --- 内部状态 ---
+_sessions = {}  # 主机 -> requests.Session
+_sessions_lock = threading.Lock()
+
+
+def configure(pool_maxsize=None, timeout=None, headers=None):
+    """
+    调整客户端的全局配置。已经创建的连接池会被关闭，下一次请求时按新配置重建。
+    :param pool_maxsize: int or None, 每个主机的最大长连接数。
+    :param timeout: int/float or None, 默认超时时间(秒)。
+    :param headers: dict or None, 需要合并到默认请求头中的字段。
+    """
+    global POOL_MAXSIZE, DEFAULT_TIMEOUT
+    if pool_maxsize is not None:
+        POOL_MAXSIZE = pool_maxsize
+    if timeout is not None:
+        DEFAULT_TIMEOUT = timeout
+    if headers:
+        HEADERS.update(headers)
+    close_all()
+
+
+def _host_key(url):
+    """以 '协议://主机' 作为连接池的键，同一主机的请求共享同一个 Session。"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session(url):
+    """
+    获取(必要时创建)某个URL所属主机的 Session。
+    :param url: str, 请求地址。
+    :return: requests.Session, 带有默认请求头、代理修复和连接池配置。
+    """
+    key = _host_key(url)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            session.proxies.update(NO_PROXY)
+            session.trust_env = False  # 不读取环境变量中的代理设置
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[key] = session
+    return session
+
+
+def post_json(url, payload, timeout=None, headers=None):
+    """
+    以JSON请求体发送POST请求，主要用于 musicu.fcg 接口。
+    :param url: str, 请求地址。
+    :param payload: dict, 请求体，会被序列化为JSON字符串。
+    :param timeout: int/float or None, 超时时间(秒)，为None时使用 DEFAULT_TIMEOUT。
+    :param headers: dict or None, 仅对本次请求生效的额外请求头。
+    :return: requests.Response
+    """
+    session = get_session(url)
+    return session.post(url, data=json.dumps(payload), headers=headers,
+                        timeout=timeout or DEFAULT_TIMEOUT)
+
+
+def get(url, params=None, timeout=None, headers=None, stream=False):
+    """
+    发送GET请求，用于评论接口以及封面、音频文件的下载。
+    :param url: str, 请求地址。
+    :param params: dict or None, 查询参数。
+    :param timeout: int/float or None, 超时时间(秒)，为None时使用 DEFAULT_TIMEOUT。
+    :param headers: dict or None, 仅对本次请求生效的额外请求头。
+    :param stream: bool, 是否流式下载。
+    :return: requests.Response
+    """
+    session = get_session(url)
+    return session.get(url, params=params, headers=headers,
+                       timeout=timeout or DEFAULT_TIMEOUT, stream=stream)
+
+
+def response_ok(data):
+    """
+    判断接口返回的JSON在业务层面是否成功。
+    顶层 code 非0，或者所有子请求的 code 都非0，都视为失败，限速器会据此降速。
+    """
+    if data.get('code', 0) != 0:
+        return False
+    sub_codes = [value.get('code') for value in data.values() if isinstance(value, dict) and 'code' in value]
+    return not sub_codes or any(code == 0 for code in sub_codes)
+
+
+def _request_json(send, endpoint):
+    """
+    在限速器和重试策略的管控下发送请求并解析JSON。
+    传输层错误在重试用完后抛出；顶层 code != 0 重试用完后照常返回响应，由调用方按原逻辑处理。
+    :param send: callable, 实际发出请求并返回 requests.Response 的函数。
+    :param endpoint: str or None, 端点名，为None时不限速也不重试。
+    :return: dict, 解析后的JSON。
+    """
+    if not endpoint:
+        res = send()
+        res.raise_for_status()
+        return models.loads(res.content)
+
+    def attempt():
+        governor.acquire(endpoint)
+        start = time.monotonic()
+        try:
+            res = send()
+            res.raise_for_status()
+            data = models.loads(res.content)
+        except Exception:
+            governor.report(endpoint, time.monotonic() - start, ok=False)
+            raise
+        governor.report(endpoint, time.monotonic() - start, ok=response_ok(data))
+        if data.get('code', 0) != 0:
+            raise retry.ApiError(data.get('code'), data)
+        return data
+
+    try:
+        return retry.call_with_retry(endpoint, attempt)
+    except retry.ApiError as e:
+        return e.data
+
+
+def post_musicu(payload, endpoint=None, timeout=None, headers=None, use_cache=True):
+    """
+    向 musicu.fcg 发送请求并返回解析后的JSON，发送前先领取 endpoint 对应的令牌。
+    请求体中已命中缓存的子请求不会被发送，返回值中会合并缓存的结果。
+    :param payload: dict, 请求体。
+    :param endpoint: str or None, 端点名，如 'song_list'、'track_info'、'lyrics'。
+    :param timeout: int/float or None, 超时时间(秒)。
+    :param headers: dict or None, 仅对本次请求生效的额外请求头。
+    :param use_cache: bool, 是否读写响应缓存，需要最新数据时传 False。
+    :return: dict
+    """
+    if not use_cache:
+        return _request_json(lambda: post_json(MUSICU_URL, payload, timeout=timeout, headers=headers), endpoint)
+    cached, request_payload = cache.lookup_musicu(MUSICU_URL, payload)
+    if request_payload is None:  # 所有子请求都命中缓存
+        return cache.merge_musicu(cached)
+    data = _request_json(lambda: post_json(MUSICU_URL, request_payload, timeout=timeout, headers=headers), endpoint)
+    cache.store_musicu(MUSICU_URL, request_payload, data)
+    return cache.merge_musicu(cached, data) if cached else data
+
+
+def get_json(url, params=None, endpoint=None, timeout=None, headers=None, use_cache=True):
+    """
+    发送GET请求并返回解析后的JSON，发送前先领取 endpoint 对应的令牌，主要用于评论接口。
+    以 endpoint 作为缓存的 module 名，决定缓存有效期。
+    :return: dict
+    """
+    cache_key = cache.make_key(url, endpoint, 'GET', params) if use_cache and endpoint else None
+    if cache_key:
+        data = cache.get(cache_key)
+        if data is not None:
+            return data
+    data = _request_json(lambda: get(url, params=params, timeout=timeout, headers=headers), endpoint)
+    if cache_key and data.get('code', 0) == 0:
+        cache.put(cache_key, endpoint, data)
+    return data
+
+
+def close_all():
+    """关闭并清空所有连接池，一般在程序结束或配置变更时调用。"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_coalesce.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    按歌曲 mid 合并重复请求。
+    合唱、featuring 的歌曲会出现在每一位署名歌手名下，遍历 qq_music_singers.csv 时同一首歌的评论、
+    歌词、封面会按合作歌手的人数被重复请求。本模块以 (模块, 歌曲mid) 为键：
+    1. 同一时刻的并发请求共用同一个进行中的 Future，只真正请求一次；
+    2. 本次运行中已经成功完成的请求直接复用结果(返回None或被判定为失败的结果不会被记住)；
+       评论这类结果很大、又只需写库一次的请求可以只共享进行中的调用，不保留结果；
+    并用计数器记录因此省下了多少次调用，程序结束时可通过 print_stats 打印。
+"""
+
+# --- 模块导入 ---
+import functools  # 用于编写装饰器
+import inspect  # 用于按参数名取出歌曲 mid
+import threading  # 多线程共用进行中的请求
+from collections import OrderedDict, defaultdict  # 有界结果表与计数器
+from concurrent.futures import Future  # 进行中请求的共享结果
+
+# --- 全局配置 (Global Configuration) ---
+MAX_RESULTS = 20000  # 最多记住多少个已完成请求的结果，超出后丢弃最早的
+
+# --- 内部状态 ---
+_lock = threading.Lock()
+_inflight = {}  # (模块, 歌曲mid) -> Future
+_results = OrderedDict()  # (模块, 歌曲mid) -> 结果
+_stats = defaultdict(lambda: {'calls': 0, 'inflight_shared': 0, 'result_reused': 0})
+
+
+def _remember(key, value):
+    """记录一个已完成的结果。调用方需持有 _lock。"""
+    _results[key] = value
+    _results.move_to_end(key)
+    while len(_results) > MAX_RESULTS:
+        _results.popitem(last=False)
+
+
+def succeeded(result):
+    """默认的成功判断：各请求函数失败时返回None。"""
+    return result is not None
+
+
+def coalesce(module, song_id, func, *args, remember_if=succeeded, **kwargs):
+    """
+    以 (module, song_id) 为键执行 func(*args, **kwargs)，重复或并发的调用共享同一个结果。
+    func 抛出的异常会传递给所有等待者，但不会被记住，下一次调用会重新请求。
+    :param remember_if: callable or None, 结果满足该条件时才记住供之后的调用复用；为None时只共享进行中的调用。
+    """
+    key = (module, song_id)
+    with _lock:
+        _stats[module]['calls'] += 1
+        if key in _results:
+            _stats[module]['result_reused'] += 1
+            _results.move_to_end(key)
+            return _results[key]
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _inflight[key] = future
+        else:
+            _stats[module]['inflight_shared'] += 1
+    if not owner:
+        return future.result()
+
+    try:
+        result = func(*args, **kwargs)
+    except BaseException as e:
+        with _lock:
+            _inflight.pop(key, None)
+        future.set_exception(e)
+        raise
+    with _lock:
+        if remember_if is not None and remember_if(result):
+            _remember(key, result)
+        _inflight.pop(key, None)
+    future.set_result(result)
+    return result
+
+
+def coalesced(module, key_arg='song_id', remember_if=succeeded):
+    """
+    装饰器：把函数的调用按 (module, 参数 key_arg 的值) 合并。
+    用法: @coalesced('lyrics') 装饰 get_lyrics_api(song_id)。
+    :param remember_if: callable or None, 见 coalesce。
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            song_id = signature.bind(*args, **kwargs).arguments[key_arg]
+            return coalesce(module, song_id, func, *args, remember_if=remember_if, **kwargs)
+        return wrapper
+    return decorator
+
+
+def peek(module, song_id):
+    """
+    查询本次运行中是否已有 (module, song_id) 的结果，供批量请求在打包前剔除重复歌曲。
+    :return: (found, value)
+    """
+    key = (module, song_id)
+    with _lock:
+        _stats[module]['calls'] += 1
+        if key in _results:
+            _stats[module]['result_reused'] += 1
+            return True, _results[key]
+    return False, None
+
+
+def remember(module, song_id, value):
+    """记录批量请求得到的单首歌结果，之后同一首歌的请求可以直接复用。"""
+    with _lock:
+        _remember((module, song_id), value)
+
+
+def stats():
+    """返回各模块的调用计数: 模块 -> {'calls', 'inflight_shared', 'result_reused', 'saved'}。"""
+    with _lock:
+        return {module: dict(counter, saved=counter['inflight_shared'] + counter['result_reused'])
+                for module, counter in _stats.items()}
+
+
+def print_stats():
+    """打印重复请求合并的统计信息。"""
+    for module, counter in stats().items():
+        if counter['calls']:
+            print(f"  -> [请求合并] {module}: 调用 {counter['calls']} 次，复用进行中请求 {counter['inflight_shared']} 次，"
+                  f"复用已有结果 {counter['result_reused']} 次，共节省 {counter['saved']} 次请求")
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_comments.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    歌曲评论的分页获取，各脚本的 get_all_comments_api 共用。
+    此前每次都从第0页一直翻到 MAX_COMMENTS_PER_SONG，再靠 INSERT OR IGNORE 丢弃已有的评论。
+    增量模式下，调用方传入数据库中该歌曲已存储的评论ID和最新评论时间，评论按时间从新到旧返回，
+    遇到第一页全部已存储的评论时即停止翻页，日常刷新每首歌只需一两次请求。
+
+    页大小与翻页方式是自适应的：
+    1. 先按 PROBE_PAGE_SIZE 请求，接口返回的条数少于请求条数、而评论总数表明还有更多时，
+       说明接口对页大小有上限，记住这个上限，之后所有歌曲都直接按它请求；
+    2. 翻页时带上上一页最后一条评论的ID (CURSOR_PARAM) 作为游标，接口支持时按游标续读，
+       深翻页不必让服务器跳过越来越大的偏移量；接口忽略游标(又返回了见过的评论)时记住并退回页码翻页。
+    这样调大 MAX_COMMENTS_PER_SONG 时，请求次数按探测到的页大小增长，而不是每25条一次。
+"""
+
+# --- 模块导入 ---
+import sys  # 用于错误输出
+import threading  # 探测结果在多线程间共享
+
+import qq_music_client as client  # 共用的连接池HTTP客户端
+import qq_music_models as models  # 响应的字段投影 (Comment)
+
+# --- 全局配置 (Global Configuration) ---
+PROBE_PAGE_SIZE = 100  # 首次请求时尝试的页大小，接口不支持时自动降到它实际返回的条数
+CURSOR_PARAM = 'lasthotcommentid'  # 游标参数名: 上一页最后一条评论的ID
+MAX_STALLED_REQUESTS = 2  # 连续多少次请求没有获取到新评论时放弃这首歌，防止死循环
+
+# --- 内部状态 ---
+_lock = threading.Lock()
+_honored_page_size = None  # 探测到的接口页大小上限，None 表示尚未发现上限
+_cursor_supported = None  # 接口是否支持游标翻页，None 表示尚未确认
+
+
+def _learn_page_size(size):
+    """记录接口的页大小上限。"""
+    global _honored_page_size
+    with _lock:
+        if _honored_page_size is None or size < _honored_page_size:
+            _honored_page_size = size
+            print(f"    -> 评论接口每页最多返回 {size} 条，之后按此页大小请求。")
+
+
+def _learn_cursor(supported):
+    """记录接口是否支持游标翻页。之前确认过支持、后来又发现游标被忽略时，降级为不支持。"""
+    global _cursor_supported
+    with _lock:
+        if _cursor_supported is None or (_cursor_supported and not supported):
+            _cursor_supported = supported
+            if not supported:
+                print(f"    -> 评论接口不支持游标翻页，改用页码翻页。")
+
+
+def is_stored(comment, known_ids, newest_time):
+    """
+    判断一条评论是否已经存储过：评论ID已在库中，或者早于库中最新的一条评论。
+    :param comment: models.Comment
+    :param known_ids: set, 库中该歌曲已有的评论ID。
+    :param newest_time: int or None, 库中该歌曲最新评论的时间。
+    """
+    if comment.comment_id in known_ids:
+        return True
+    return newest_time is not None and comment.comment_time is not None and comment.comment_time < newest_time
+
+
+def fetch_song_comments(song_id_num, song_id, max_comments, page_size, known_ids=None, newest_time=None):
+    """
+    分页获取一首歌的评论，直到达到上限或没有更多评论。
+    给出 known_ids 时为增量模式：只返回尚未存储的评论，并在第一页全部已存储时停止翻页。
+    :param song_id_num: int, 歌曲的数字ID (songid)，评论API需要这个ID。
+    :param song_id: str, 歌曲的文本ID (mid)，用于存入数据库。
+    :param max_comments: int, 本次最多请求的评论条数。
+    :param page_size: int, 每次请求的最少评论条数；尚未探测到上限时按 max(page_size, PROBE_PAGE_SIZE) 请求。
+    :param known_ids: set or None, 数据库中该歌曲已有的评论ID；为None时获取全部。
+    :param newest_time: int or None, 数据库中该歌曲最新评论的时间 (comment_time)。
+    :return: (comments, complete) 元组。comments 为 models.Comment 列表；complete 表示是否正常结束
+             (到达上限、没有更多评论或遇到已存储的页)，请求出错而中断时为 False。
+    """
+    print(f"    -> 开始获取歌曲 {song_id} 的评论...")
+    incremental = known_ids is not None
+    with _lock:
+        size = _honored_page_size or max(page_size, PROBE_PAGE_SIZE)
+    all_comments = []
+    seen_ids = set()  # 本次已获取的评论ID，用于判断接口是否忽略了游标
+    fetched, cursor = 0, None
+    cursor_ok = True  # 这首歌是否仍可用游标翻页；游标一旦被忽略，这首歌之后都按页码翻页
+    complete = True
+    last_fetched, stalled = None, 0
+    while fetched < max_comments:
+        stalled = stalled + 1 if fetched == last_fetched else 0
+        if stalled > MAX_STALLED_REQUESTS:
+            print(f"    -> 连续 {stalled} 次请求没有获取到新评论，停止翻页。", file=sys.stderr)
+            complete = False
+            break
+        last_fetched = fetched
+        with _lock:
+            use_cursor = cursor is not None and cursor_ok and _cursor_supported is not False
+        # 游标翻页时页码固定为0；页码翻页时 fetched 始终是 size 的整数倍
+        params = {'biztype': 1, 'topid': song_id_num, 'cmd': 8, 'pagenum': 0 if use_cursor else fetched // size,
+                  'pagesize': size, 'format': 'json', 'g_tk': 5381}
+        if use_cursor:
+            params[CURSOR_PARAM] = cursor
+        try:
+            # 增量同步要看到最新的评论，不读响应缓存
+            data = client.get_json(client.COMMENT_URL, params=params, endpoint='comments', timeout=10,
+                                   use_cache=not incremental)
+            if data.get('code') != 0:
+                complete = False
+                break
+            # 只投影出需要入库的字段，评论关联到我们的文本主键 song_id
+            comments = models.decode_comments(data, song_id)
+            if not comments:  # 如果返回的评论列表为空，说明没有更多了
+                print(f"    -> 已无更多评论。")
+                break
+            if use_cursor:
+                if comments[0].comment_id in seen_ids:  # 接口忽略了游标，又从头返回；按页码重新请求这一页
+                    cursor_ok = False
+                    _learn_cursor(False)
+                    continue
+                _learn_cursor(True)
+            last_page = False
+            if len(comments) < size:
+                # 返回条数少于请求条数：可能是最后一页，也可能是接口的页大小上限(评论总数表明还有更多)。
+                total = (data.get('comment') or {}).get('commenttotal')
+                more = total is not None and fetched + len(comments) < total
+                if more:
+                    _learn_page_size(len(comments))
+                if fetched == 0 or use_cursor:
+                    size = len(comments)  # 之后按实际条数翻页，页码翻页时也不会跳过评论
+                elif not more:
+                    last_page = True
+            comments = comments[:max_comments - fetched]
+            fetched += len(comments)
+            seen_ids.update(cmt.comment_id for cmt in comments)
+            cursor = comments[-1].comment_id
+            if incremental:
+                comments = [cmt for cmt in comments if not is_stored(cmt, known_ids, newest_time)]
+                if not comments:
+                    print(f"    -> 本页的评论均已存储，停止翻页。")
+                    break
+            all_comments.extend(comments)
+            print(f"    -> 已获取 {len(comments)} 条评论，累计: {len(all_comments)}")
+            if last_page:
+                break
+        except Exception as e:
+            print(f"    -> 获取评论失败(重试后仍失败，已获取 {len(all_comments)} 条): {e}", file=sys.stderr)
+            complete = False
+            break
+    return all_comments, complete
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_frontier.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    合作歌手的抓取边界(crawl frontier)。
+    每首歌的 songInfo 都带有 singer 数组，此前只把其中的歌手名存入 artist_names。本模块从这些数组中
+    发现新的歌手 mid，不必先跑一遍八万多位歌手的总列表，就能从少量种子歌手出发逐步扩大覆盖面。
+    在爬虫数据库中维护两张表：
+    1. frontier_artists: 已发现的歌手，包括发现时的层数(种子为0，种子的合作歌手为1……)、
+       与已抓取歌手的合作次数和状态(queued 待抓 / visited 已抓 / failed 本次运行获取歌曲列表失败)，
+       即持久化的已访问集合与优先队列；
+    2. frontier_songs: (歌手 mid, 歌曲 mid) 合作记录，同一首歌只计一次合作，重跑或续抓不会重复计数。
+    出队顺序为广度优先：层数小的先抓，同一层中合作次数多的先抓。
+"""
+
+# --- 模块导入 ---
+import csv  # 读取种子歌手CSV
+import sqlite3  # 抓取边界与歌曲数据存放在同一个数据库中
+import sys  # 错误输出
+import time  # 记录发现与抓取时间
+
+# --- 全局配置 (Global Configuration) ---
+MIN_COOCCURRENCE = 1  # 非种子歌手至少与已抓取歌手合作多少首歌才会被抓取
+
+# --- 歌手状态 ---
+STATUS_QUEUED = 'queued'
+STATUS_VISITED = 'visited'
+STATUS_FAILED = 'failed'  # 本次运行中不再出队，下次运行开始时重新入队
+
+
+def init_tables(cursor):
+    """创建 frontier_artists 和 frontier_songs 表，在脚本的 init_environment 中调用。"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS frontier_artists (
+        singer_mid TEXT PRIMARY KEY,
+        singer_name TEXT,
+        depth INTEGER NOT NULL,
+        co_count INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL,
+        discovered_at REAL,
+        visited_at REAL
+    )''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS frontier_songs (
+        singer_mid TEXT NOT NULL,
+        song_mid TEXT NOT NULL,
+        PRIMARY KEY (singer_mid, song_mid)
+    )''')
+    # 出队时按 (状态, 层数, 合作次数) 查找
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_frontier_queue ON frontier_artists (status, depth, co_count DESC)')
+
+
+def read_seed_csv(filepath):
+    """
+    从CSV文件(如 Singerlist_V2.py 导出的 qq_music_singers.csv)读取种子歌手。
+    :param filepath: str, 必须包含 'singer_mid' 列，可选 'singer_name' 列。
+    :return: list of (singer_mid, singer_name) 元组，读取失败时返回空列表。
+    """
+    try:
+        with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f)
+            if 'singer_mid' not in (reader.fieldnames or ()):
+                print(f"错误：种子文件 '{filepath}' 必须包含 'singer_mid' 列。", file=sys.stderr)
+                return []
+            return [(row['singer_mid'].strip(), row.get('singer_name')) for row in reader
+                    if (row['singer_mid'] or '').strip()]
+    except OSError as e:
+        print(f"读取种子文件 '{filepath}' 失败: {e}", file=sys.stderr)
+        return []
+
+
+def seed(db_file, artists):
+    """
+    把种子歌手加入抓取边界(层数0)。已经发现过的歌手只把层数降为0，已抓取的不会重新入队。
+    :param artists: iterable of str 或 (singer_mid, singer_name) 元组。
+    :return: int, 新加入的歌手数。
+    """
+    now = time.time()
+    added = 0
+    try:
+        with sqlite3.connect(db_file) as conn:
+            for artist in artists:
+                artist_id, artist_name = (artist, None) if isinstance(artist, str) else artist
+                cur = conn.execute("INSERT OR IGNORE INTO frontier_artists (singer_mid, singer_name, depth, status, "
+                                   "discovered_at) VALUES (?, ?, 0, ?, ?)",
+                                   (artist_id, artist_name, STATUS_QUEUED, now))
+                if cur.rowcount:
+                    added += 1
+                else:
+                    conn.execute("UPDATE frontier_artists SET depth = 0 WHERE singer_mid = ?", (artist_id,))
+    except sqlite3.Error as e:
+        print(f"写入抓取边界失败: {e}", file=sys.stderr)
+    return added
+
+
+def observe(db_file, artist_id, songs):
+    """
+    从一位歌手的一批歌曲中发现合作歌手：新歌手以 (该歌手层数 + 1) 入队，已知歌手的合作次数加一。
+    同一首歌对同一位合作歌手只计一次。
+    :param artist_id: str, 正在抓取的歌手 mid。
+    :param songs: iterable of models.Song
+    :return: int, 新发现的歌手数。
+    """
+    now = time.time()
+    discovered = 0
+    try:
+        with sqlite3.connect(db_file) as conn:
+            row = conn.execute("SELECT depth FROM frontier_artists WHERE singer_mid = ?", (artist_id,)).fetchone()
+            depth = (row[0] if row else 0) + 1
+            for song in songs:
+                for singer_mid, singer_name in zip(song.singer_mids, song.singer_names):
+                    if not singer_mid or singer_mid == artist_id:
+                        continue
+                    if not conn.execute("INSERT OR IGNORE INTO frontier_songs (singer_mid, song_mid) VALUES (?, ?)",
+                                        (singer_mid, song.mid)).rowcount:
+                        continue  # 这首歌的合作已经计过
+                    cur = conn.execute("INSERT OR IGNORE INTO frontier_artists (singer_mid, singer_name, depth, "
+                                       "co_count, status, discovered_at) VALUES (?, ?, ?, 1, ?, ?)",
+                                       (singer_mid, singer_name, depth, STATUS_QUEUED, now))
+                    if cur.rowcount:
+                        discovered += 1
+                    else:
+                        conn.execute("UPDATE frontier_artists SET co_count = co_count + 1, depth = MIN(depth, ?) "
+                                     "WHERE singer_mid = ?", (depth, singer_mid))
+    except sqlite3.Error as e:
+        print(f"更新抓取边界失败: {e}", file=sys.stderr)
+    return discovered
+
+
+def next_artist(db_file, max_depth=None):
+    """
+    取出优先级最高的待抓歌手(不改变其状态)：层数最小，其次合作次数最多。
+    :param max_depth: int or None, 只抓取层数不超过它的歌手，None 表示不限制。
+    :return: (singer_mid, singer_name, depth, co_count) 元组，队列为空时返回None。
+    """
+    try:
+        with sqlite3.connect(db_file) as conn:
+            return conn.execute(
+                "SELECT singer_mid, singer_name, depth, co_count FROM frontier_artists "
+                "WHERE status = ? AND depth <= ? AND (depth = 0 OR co_count >= ?) "
+                "ORDER BY depth, co_count DESC, discovered_at LIMIT 1",
+                (STATUS_QUEUED, sys.maxsize if max_depth is None else max_depth, MIN_COOCCURRENCE)).fetchone()
+    except sqlite3.Error as e:
+        print(f"读取抓取边界失败: {e}", file=sys.stderr)
+        return None
+
+
+def mark_visited(db_file, artist_id):
+    """把一位歌手加入已访问集合，之后不再出队。"""
+    try:
+        with sqlite3.connect(db_file) as conn:
+            conn.execute("UPDATE frontier_artists SET status = ?, visited_at = ? WHERE singer_mid = ?",
+                         (STATUS_VISITED, time.time(), artist_id))
+    except sqlite3.Error as e:
+        print(f"写入抓取边界失败: {e}", file=sys.stderr)
+
+
+def mark_failed(db_file, artist_id):
+    """把仍在队列中的歌手标记为获取失败：本次运行不再出队，已标记为已访问的歌手不受影响。"""
+    try:
+        with sqlite3.connect(db_file) as conn:
+            conn.execute("UPDATE frontier_artists SET status = ? WHERE singer_mid = ? AND status = ?",
+                         (STATUS_FAILED, artist_id, STATUS_QUEUED))
+    except sqlite3.Error as e:
+        print(f"写入抓取边界失败: {e}", file=sys.stderr)
+
+
+def requeue_failed(db_file):
+    """把之前运行中获取失败的歌手重新放回队列，返回重新入队的歌手数。"""
+    try:
+        with sqlite3.connect(db_file) as conn:
+            return conn.execute("UPDATE frontier_artists SET status = ? WHERE status = ?",
+                                (STATUS_QUEUED, STATUS_FAILED)).rowcount
+    except sqlite3.Error as e:
+        print(f"写入抓取边界失败: {e}", file=sys.stderr)
+        return 0
+
+
+def count_queued(db_file):
+    """返回仍在队列中的歌手数。"""
+    try:
+        with sqlite3.connect(db_file) as conn:
+            return conn.execute("SELECT COUNT(*) FROM frontier_artists WHERE status = ?",
+                                (STATUS_QUEUED,)).fetchone()[0]
+    except sqlite3.Error as e:
+        print(f"读取抓取边界失败: {e}", file=sys.stderr)
+        return 0
+
+
+def iter_frontier(db_file, max_artists=None, max_depth=None):
+    """
+    按优先级逐个产出待抓歌手的 mid。调用方在完整获取并处理一位歌手的歌曲列表后调用 mark_visited；
+    请求下一位时仍未标记的歌手(歌曲列表获取失败或有分页缺失)标记为获取失败，本次运行不再出队，
+    下次运行时重新入队。中途崩溃的歌手仍在队列中，下次运行会再次出队。
+    处理过程中调用 observe 加入的新歌手会立即参与排序。
+    :param max_artists: int or None, 本次最多抓取的歌手数，None 表示直到队列为空。
+    :param max_depth: int or None, 见 next_artist。
+    """
+    requeued = requeue_failed(db_file)
+    if requeued:
+        print(f"[抓取边界] 上次获取失败的 {requeued} 位歌手重新入队。")
+    count = 0
+    while max_artists is None or count < max_artists:
+        entry = next_artist(db_file, max_depth)
+        if entry is None:
+            break
+        artist_id, artist_name, depth, co_count = entry
+        count += 1
+        print(f"\n[抓取边界] 第 {count} 位: {artist_name or artist_id} (层数 {depth}，合作 {co_count} 首)")
+        yield artist_id
+        mark_failed(db_file, artist_id)
+    print(f"\n[抓取边界] 本次抓取 {count} 位歌手，队列中还有 {count_queued(db_file)} 位。")
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_governor.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    按接口(端点)划分的自适应限速器，取代各脚本中散落的固定 time.sleep。
+    每个端点(歌曲列表、歌曲详情、歌词、评论……)各有一个令牌桶，API函数发请求前先领取令牌。
+    速率按 AIMD 策略调整：请求成功且响应够快时加性提速；出现HTTP错误、返回码 code != 0
+    或响应明显变慢时乘性降速。接口健康时不再白白等待，接口吃紧时也能自动退避。
+"""
+
+# --- 模块导入 ---
+import threading  # 令牌桶需要在多线程下保持一致
+import time  # 计时与等待
+
+# --- 全局配置 (Global Configuration) ---
+
+# 各端点的速率配置: 端点名 -> (初始速率, 最低速率, 最高速率)，单位: 次/秒
+# 初始速率大致对应原先各处固定延时的节奏，之后根据接口表现自动调整。
+ENDPOINT_RATES = {
+    'song_list': (1.0, 0.2, 10.0),  # GetSingerSongList 歌手歌曲列表
+    'track_info': (2.0, 0.2, 10.0),  # GetTrackInfo 歌曲详情
+    'lyrics': (2.0, 0.2, 10.0),  # GetPlayLyricInfo 歌词
+    'comments': (2.0, 0.2, 10.0),  # fcg_global_comment_h5 评论
+    'vkey': (1.0, 0.2, 5.0),  # CgiGetVkey 播放链接
+    'singer_list': (2.0, 0.2, 10.0),  # get_singer_list 歌手列表
+}
+DEFAULT_RATE = (1.0, 0.2, 5.0)  # 未在上表中登记的端点使用的配置
+
+RATE_INCREASE = 0.2  # 每次成功后速率的加性增量(次/秒)
+ERROR_DECREASE = 0.5  # 出错(HTTP错误/code != 0)后速率乘以该系数
+SLOW_DECREASE = 0.8  # 响应变慢后速率乘以该系数
+LATENCY_TARGET = 2.0  # 响应时间超过该值(秒)视为接口吃紧
+BURST = 1.0  # 令牌桶容量，保持为1可以避免空闲后瞬间突发大量请求
+
+
+class TokenBucketGovernor:
+    """
+    单个端点的令牌桶限速器 (线程安全)。
+    acquire() 领取一个令牌，令牌不足时计算需要等待的时间；report() 根据请求结果调整速率。
+    """
+
+    def __init__(self, name, rate, min_rate, max_rate, burst=BURST):
+        self.name = name
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        预定一个令牌并返回需要等待的秒数(不阻塞)。
+        令牌允许透支，多个线程/协程同时领取时会自动排队到各自的发送时刻。
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self):
+        """阻塞直到领取到一个令牌。"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def report(self, latency, ok):
+        """
+        根据一次请求的结果调整速率 (AIMD)。
+        :param latency: float, 本次请求耗时(秒)。
+        :param ok: bool, 请求是否成功(无HTTP错误且返回码为0)。
+        """
+        with self.lock:
+            if not ok:
+                self.rate = max(self.min_rate, self.rate * ERROR_DECREASE)
+            elif latency > LATENCY_TARGET:
+                self.rate = max(self.min_rate, self.rate * SLOW_DECREASE)
+            else:
+                self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+
+
+# --- 内部状态 ---
+_governors = {}  # 端点名 -> TokenBucketGovernor
+_governors_lock = threading.Lock()
+
+
+def get_governor(endpoint):
+    """获取(必要时创建)某个端点的限速器。"""
+    governor = _governors.get(endpoint)
+    if governor is not None:
+        return governor
+    with _governors_lock:
+        governor = _governors.get(endpoint)
+        if governor is None:
+            rate, min_rate, max_rate = ENDPOINT_RATES.get(endpoint, DEFAULT_RATE)
+            governor = TokenBucketGovernor(endpoint, rate, min_rate, max_rate)
+            _governors[endpoint] = governor
+    return governor
+
+
+def acquire(endpoint):
+    """为某个端点领取一个令牌，必要时阻塞等待。"""
+    get_governor(endpoint).acquire()
+
+
+def report(endpoint, latency, ok):
+    """把一次请求的结果反馈给对应端点的限速器。"""
+    get_governor(endpoint).report(latency, ok)
+
+
+def current_rates():
+    """返回各端点当前的速率(次/秒)，便于打印调试。"""
+    return {name: round(governor.rate, 2) for name, governor in _governors.items()}
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_ledger.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    可续抓的抓取台账。
+    脚本在处理一位有三千首歌的歌手时中途崩溃，重启后要重新获取整个歌曲列表，再逐首检查每一首歌。
+    本模块在台账数据库中记录(每个脚本使用自己的台账文件：两个脚本共用同一个爬虫数据库，
+    一个脚本的新运行清空台账时不会清掉另一个脚本未完成的任务)：
+    1. crawl_jobs: 每位歌手一条任务记录，包括歌手名、totalNum、已记录的歌曲数、列表是否完整、
+       下一首待处理歌曲的序号(每处理完一批歌曲就提交一次)和任务状态；
+    2. crawl_listing: 歌曲列表本身，按分页(SONGS_PER_PAGE 首一块)在获取到时立即写入。
+    每首歌各阶段的结果由 qq_music_stages 的 song_stages 表记录。以 --resume 启动时，已完成的歌手直接跳过，
+    未完成的歌手从台账恢复歌曲列表(已记录的分页不再请求)，并从上次提交的位置继续处理。
+"""
+
+# --- 模块导入 ---
+import sqlite3  # 台账数据库
+import sys  # 错误输出
+import time  # 记录更新时间
+from collections import namedtuple  # 任务记录
+
+import qq_music_api  # 续抓时请求剩余的分页
+import qq_music_models as models  # 歌曲列表的编解码
+
+# --- 全局配置 (Global Configuration) ---
+LISTING_CHUNK_SIZE = qq_music_api.SONGS_PER_PAGE  # 歌曲列表每凑满多少首写入一次，与分页大小一致
+
+# --- 任务状态 ---
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+
+# 一位歌手的任务记录
+Job = namedtuple('Job', ['artist_id', 'artist_name', 'total_num', 'newest_song', 'weight', 'listed',
+                         'listing_complete', 'next_index', 'status'])
+
+
+def init_tables(cursor):
+    """创建 crawl_jobs 和 crawl_listing 表，在脚本的 init_environment 中调用。"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS crawl_jobs (
+        singer_mid TEXT PRIMARY KEY,
+        artist_name TEXT,
+        total_num INTEGER,
+        newest_song BLOB,
+        weight REAL,
+        listed INTEGER NOT NULL DEFAULT 0,
+        listing_complete INTEGER NOT NULL DEFAULT 0,
+        next_index INTEGER NOT NULL DEFAULT 0,
+        status TEXT,
+        updated_at REAL
+    )''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS crawl_listing (
+        singer_mid TEXT NOT NULL,
+        chunk_start INTEGER NOT NULL,
+        songs BLOB,
+        PRIMARY KEY (singer_mid, chunk_start)
+    )''')
+
+
+def _execute(db_file, statements):
+    """在一个事务中执行若干条 (sql, params)。"""
+    try:
+        with sqlite3.connect(db_file) as conn:
+            for sql, params in statements:
+                conn.execute(sql, params)
+    except sqlite3.Error as e:
+        print(f"写入抓取台账失败: {e}", file=sys.stderr)
+
+
+def _encode_songs(songs):
+    return models.dumps([list(song) for song in songs])
+
+
+def _decode_song(row):
+    mid, song_id, name, album_mid, album_name, singer_names = row[:6]
+    singer_mids = row[6] if len(row) > 6 else [None] * len(singer_names)  # 旧版本台账没有记录歌手mid
+    return models.Song(mid, song_id, name, album_mid, album_name, tuple(singer_names), tuple(singer_mids))
+
+
+def reset(db_file):
+    """开始新的一次运行(非 --resume)：清空上次的台账。"""
+    _execute(db_file, [("DELETE FROM crawl_jobs", ()), ("DELETE FROM crawl_listing", ())])
+
+
+def load_job(db_file, artist_id):
+    """
+    读取一位歌手的任务记录。
+    :return: Job，没有记录时返回None。
+    """
+    try:
+        with sqlite3.connect(db_file) as conn:
+            row = conn.execute("SELECT singer_mid, artist_name, total_num, newest_song, weight, listed, "
+                               "listing_complete, next_index, status FROM crawl_jobs WHERE singer_mid = ?",
+                               (artist_id,)).fetchone()
+    except sqlite3.Error as e:
+        print(f"读取抓取台账失败: {e}", file=sys.stderr)
+        return None
+    if row is None:
+        return None
+    newest_song = _decode_song(models.loads(row[3])) if row[3] else None
+    return Job(row[0], row[1], row[2], newest_song, row[4], row[5], bool(row[6]), row[7], row[8])
+
+
+def start_job(db_file, artist_id, artist_name, total_num, newest_song=None, weight=None):
+    """
+    为一位歌手开始新的任务：记录歌手信息，清空之前记录的歌曲列表和进度。
+    :param weight: float or None, 按权重获取歌曲列表时的权重，None 表示完整列表。
+    """
+    newest = models.dumps(list(newest_song)) if newest_song else None
+    _execute(db_file, [
+        ("DELETE FROM crawl_listing WHERE singer_mid = ?", (artist_id,)),
+        ("INSERT OR REPLACE INTO crawl_jobs (singer_mid, artist_name, total_num, newest_song, weight, listed, "
+         "listing_complete, next_index, status, updated_at) VALUES (?, ?, ?, ?, ?, 0, 0, 0, ?, ?)",
+         (artist_id, artist_name, total_num, newest, weight, JOB_RUNNING, time.time())),
+    ])
+
+
+def record_songs(db_file, artist_id, chunk_start, songs, complete=False):
+    """
+    记录歌曲列表中从 chunk_start 开始的一段。
+    :param complete: bool, 这是否是列表的最后一段。
+    """
+    _execute(db_file, [
+        ("INSERT OR REPLACE INTO crawl_listing (singer_mid, chunk_start, songs) VALUES (?, ?, ?)",
+         (artist_id, chunk_start, _encode_songs(songs))),
+        ("UPDATE crawl_jobs SET listed = ?, listing_complete = ?, updated_at = ? WHERE singer_mid = ?",
+         (chunk_start + len(songs), int(complete), time.time(), artist_id)),
+    ])
+
+
+def record_listing(db_file, artist_id, songs):
+    """一次记录完整的歌曲列表(按 LISTING_CHUNK_SIZE 分段)。"""
+    songs = list(songs)
+    for start in range(0, len(songs), LISTING_CHUNK_SIZE):
+        record_songs(db_file, artist_id, start, songs[start:start + LISTING_CHUNK_SIZE],
+                     complete=start + LISTING_CHUNK_SIZE >= len(songs))
+    if not songs:
+        _execute(db_file, [("UPDATE crawl_jobs SET listing_complete = 1 WHERE singer_mid = ?", (artist_id,))])
+
+
+def checkpoint(db_file, artist_id, next_index):
+    """提交进度：序号小于 next_index 的歌曲都已处理完毕。"""
+    _execute(db_file, [("UPDATE crawl_jobs SET next_index = ?, updated_at = ? WHERE singer_mid = ?",
+                        (next_index, time.time(), artist_id))])
+
+
+def finish_job(db_file, artist_id):
+    """一位歌手的所有歌曲处理完毕。"""
+    _execute(db_file, [("UPDATE crawl_jobs SET status = ?, updated_at = ? WHERE singer_mid = ?",
+                        (JOB_DONE, time.time(), artist_id))])
+
+
+def load_songs(db_file, artist_id):
+    """读取台账中记录的歌曲列表，按原顺序返回 models.Song 列表。"""
+    songs = []
+    try:
+        with sqlite3.connect(db_file) as conn:
+            for (chunk,) in conn.execute("SELECT songs FROM crawl_listing WHERE singer_mid = ? ORDER BY chunk_start",
+                                         (artist_id,)):
+                songs.extend(_decode_song(row) for row in models.loads(chunk))
+    except sqlite3.Error as e:
+        print(f"读取抓取台账失败: {e}", file=sys.stderr)
+    return songs
+
+
+def resume_listing(db_file, job):
+    """
+    从台账恢复一位歌手的歌曲列表：列表完整时不再发出任何请求，否则只请求已记录部分之后的分页。
+    :param job: Job, load_job 的结果。
+    :return: qq_music_api.SongListing / ArtistSongStream
+    """
+    songs = load_songs(db_file, job.artist_id)
+    if job.listing_complete:
+        return qq_music_api.SongListing(job.artist_id, job.artist_name, job.total_num, songs, job.newest_song)
+    return qq_music_api.resume_artist_songs(job.artist_id, job.artist_name, job.total_num, songs, job.newest_song)
+
+
+class RecordingStream:
+    """
+    包装歌曲列表的流式结果，迭代时每凑满 LISTING_CHUNK_SIZE 首就写入台账，列表结束时标记为完整。
+    已在内存中的 SongListing (如增量刷新得到的新歌)在包装时立即整体写入。属性与被包装的流相同。
+    """
+
+    def __init__(self, db_file, stream, recorded=0):
+        """
+        :param recorded: int, 台账中已经记录的歌曲数(续抓时)，这部分不再重复写入。
+        """
+        self.db_file = db_file
+        self.stream = stream
+        self.recorded = recorded
+        if isinstance(stream, qq_music_api.SongListing) and not recorded:
+            songs = list(stream)
+            record_listing(db_file, stream.artist_id, songs)
+            self.recorded = len(songs)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def __iter__(self):
+        chunk, chunk_start = [], None
+        for index, song in enumerate(self.stream):
+            if index >= self.recorded:
+                if chunk_start is None:
+                    chunk_start = index
+                chunk.append(song)
+                if len(chunk) >= LISTING_CHUNK_SIZE:
+                    record_songs(self.db_file, self.stream.artist_id, chunk_start, chunk)
+                    chunk, chunk_start = [], None
+            yield song
+        if self.stream.missing:
+            # 有分页补请求后仍失败，已记录的歌曲与服务器的分页不再对齐，续抓时重新获取整个列表
+            _execute(self.db_file, [
+                ("DELETE FROM crawl_listing WHERE singer_mid = ?", (self.stream.artist_id,)),
+                ("UPDATE crawl_jobs SET listed = 0, listing_complete = 0 WHERE singer_mid = ?",
+                 (self.stream.artist_id,)),
+            ])
+        elif chunk:
+            record_songs(self.db_file, self.stream.artist_id, chunk_start, chunk, complete=True)
+        else:
+            _execute(self.db_file, [("UPDATE crawl_jobs SET listing_complete = 1 WHERE singer_mid = ?",
+                                     (self.stream.artist_id,))])
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_models.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    接口响应的快速解码与字段投影。
+    GetSingerSongList 每首歌返回几十个字段(文件信息、付费信息、MV、评分……)，而脚本只用到
+    mid、id、name、album.mid/name 和 singer[].name/mid；此前整页嵌套字典会一直保存在 all_songs 中，
+    大歌手动辄上万首歌，既占内存又拖慢解析。本模块：
+    1. 安装了 orjson 时用它解码/编码JSON(可选依赖: pip install orjson)，否则退回标准库 json；
+    2. 为歌曲列表、歌曲详情、歌词、评论定义紧凑的具名元组，解码后立即只保留用到的字段，
+       原始的嵌套字典随即可以被回收。
+"""
+
+# --- 模块导入 ---
+import base64  # 用于解码API返回的Base64编码的歌词
+import json  # orjson 不可用时的后备解码器
+import sys  # 用于错误输出
+from collections import namedtuple  # 紧凑的只读记录
+
+try:
+    import orjson  # 更快的JSON解码器 (可选依赖: pip install orjson)
+except ImportError:
+    orjson = None
+
+# --- 数据结构 ---
+# 歌曲列表中的一首歌: 文本ID(mid)、数字ID(id，评论接口使用)、歌名、专辑mid/名、歌手名元组、
+# 与歌手名一一对应的歌手mid元组(合作歌手，供 qq_music_frontier 发现新歌手)
+Song = namedtuple('Song', ['mid', 'id', 'name', 'album_mid', 'album_name', 'singer_names', 'singer_mids'])
+# 歌曲列表的一页: 歌手名、官方记录的总歌曲数、本页的 Song 列表
+SongListPage = namedtuple('SongListPage', ['singer_name', 'total_num', 'songs'])
+# 歌曲详情中生成标签用到的部分: 语种值元组(如 "国语,粤语")、流派值元组
+TrackInfo = namedtuple('TrackInfo', ['languages', 'genres'])
+# 一条评论，字段顺序与 comments 表的列顺序一致，可以直接作为插入参数
+Comment = namedtuple('Comment', ['comment_id', 'song_id', 'user_nickname', 'content', 'liked_count', 'comment_time'])
+
+
+# --- JSON 编解码 ---
+
+def loads(raw):
+    """解码JSON文本(bytes 或 str)。"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dumps(value):
+    """把对象编码为紧凑的UTF-8 JSON字节串。"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# --- 字段投影 ---
+
+def decode_song(item):
+    """
+    从 songList 的一项中投影出 Song。
+    :param item: dict, songList 中的一项(歌曲信息在外层 'songInfo' 中)。
+    :return: Song。缺少 mid/id/name 时抛出 KeyError。
+    """
+    info = item['songInfo']
+    album = info.get('album') or {}
+    singers = info.get('singer') or ()
+    return Song(info['mid'], info['id'], info['name'], album.get('mid'), album.get('name'),
+                tuple(singer.get('name') for singer in singers), tuple(singer.get('mid') for singer in singers))
+
+
+def decode_song_list(data):
+    """
+    把 GetSingerSongList 子请求的 data 投影为 SongListPage，缺少关键字段的歌曲会被跳过。
+    :param data: dict or None, 子请求的 'data' 字段。
+    :return: SongListPage，data 为空时返回None。
+    """
+    if not data:
+        return None
+    songs = []
+    for item in data.get('songList') or ():
+        try:
+            songs.append(decode_song(item))
+        except KeyError as e:
+            print(f"解析歌曲基础信息时缺少关键字段: {e}，跳过此歌曲。歌曲数据: {item}", file=sys.stderr)
+    return SongListPage(data.get('singerName', '未知歌手'), data.get('totalNum', 0), songs)
+
+
+def decode_track_info(data):
+    """
+    从 GetTrackInfo 子请求的 data 中投影出语种(lan)和流派(genre)。
+    :return: TrackInfo，data 或 'track_info' 为空时返回None。
+    """
+    track_info = (data or {}).get('track_info')
+    if not track_info:
+        return None
+    values = {'lan': [], 'genre': []}
+    info_items = track_info.get('info')
+    # 歌曲的详情信息存储在一个列表中，需要遍历查找
+    for info_item in info_items if isinstance(info_items, list) else ():
+        if info_item.get('name') in values:
+            values[info_item['name']].extend(content.get('value', '') for content in info_item.get('content') or ())
+    return TrackInfo(tuple(values['lan']), tuple(values['genre']))
+
+
+def decode_lyric(data):
+    """从 GetPlayLyricInfo 子请求的 data 中解码出歌词文本，没有歌词时返回None。"""
+    if not data:
+        return None
+    lyric_base64 = data.get('lyric')
+    if lyric_base64:
+        # 使用 base64.b64decode 解码，再用 .decode('utf-8') 转为字符串。
+        return base64.b64decode(lyric_base64).decode('utf-8')
+    return None
+
+
+def decode_comments(data, song_id):
+    """
+    从评论接口的响应中投影出 Comment 列表。
+    :param data: dict, fcg_global_comment_h5 返回的JSON。
+    :param song_id: str, 歌曲的 mid，作为评论关联的主键。
+    :return: list of Comment，没有更多评论时为空列表。
+    """
+    comments = (data.get('comment') or {}).get('commentlist') or ()
+    return [Comment(cmt.get('commentid'), song_id, cmt.get('nick'), cmt.get('rootcommentcontent'),
+                    cmt.get('praisenum'), cmt.get('time')) for cmt in comments]
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_retry.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    请求重试策略与按端点的熔断器。
+    此前 get_artist_songs_api / get_all_comments_api 遇到任何异常都直接 break，一次偶发超时就会让
+    歌手的歌曲列表或歌曲的评论被悄悄截断。本模块提供带随机抖动的指数退避重试：
+    1. 传输层错误(超时、连接失败、HTTP错误、JSON解析失败)最多重试 TRANSPORT_RETRIES 次；
+    2. 接口层错误(返回的顶层 code != 0)单独计数，最多重试 API_ERROR_RETRIES 次；
+    3. 某个端点(歌曲列表、歌曲详情、歌词、评论……)连续 FAILURE_THRESHOLD 次调用在重试用完后仍失败时熔断，
+       冷却 COOLDOWN 秒内直接拒绝该端点的请求，冷却结束后放行一次试探请求，成功才恢复。
+    只有 RETRYABLE_ERRORS 中的错误会被重试和计入熔断，KeyError、TypeError 之类的程序错误直接抛出。
+"""
+
+# --- 模块导入 ---
+import asyncio  # 异步版本的退避等待
+import random  # 退避时间的随机抖动
+import threading  # 熔断器需要在多线程下保持一致
+import time  # 计时与等待
+
+import requests  # 传输层错误的类型
+
+# --- 全局配置 (Global Configuration) ---
+TRANSPORT_RETRIES = 3  # 传输层错误的最大重试次数
+API_ERROR_RETRIES = 1  # 接口层错误(code != 0)的最大重试次数
+BASE_DELAY = 1.0  # 第一次重试的退避基数(秒)
+MAX_DELAY = 30.0  # 单次退避的上限(秒)
+FAILURE_THRESHOLD = 5  # 连续多少次调用(重试用完后)失败后熔断
+COOLDOWN = 60.0  # 熔断后的冷却时间(秒)
+
+
+class ApiError(Exception):
+    """接口返回了非0的 code。data 保存完整的响应，便于调用方按原逻辑处理。"""
+
+    def __init__(self, code, data):
+        super().__init__(f"接口返回错误码 code={code}")
+        self.code = code
+        self.data = data
+
+
+class CircuitOpenError(Exception):
+    """端点处于熔断状态，本次请求被直接拒绝。"""
+
+
+# 会被重试、并计入熔断的错误：传输层错误(超时、连接失败、HTTP错误)、JSON解析失败(ValueError 的子类)、接口错误码
+RETRYABLE_ERRORS = (requests.exceptions.RequestException, ValueError, ApiError)
+
+
+class CircuitBreaker:
+    """
+    单个端点的熔断器 (线程安全)。
+    closed: 正常放行；open: 冷却期内拒绝所有请求；half_open: 冷却结束后只放行一次试探请求。
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def before_request(self):
+        """请求发出前调用，熔断中则抛出 CircuitOpenError。"""
+        with self.lock:
+            if self.state == 'closed':
+                return
+            if self.state == 'open' and time.monotonic() - self.opened_at >= COOLDOWN:
+                self.state = 'half_open'  # 冷却结束，放行这一次试探请求
+                return
+            raise CircuitOpenError(f"端点 '{self.name}' 连续失败，已熔断，暂停请求")
+
+    def abort_probe(self):
+        """试探请求因不可重试的错误中止(不代表端点的好坏)：回到 open，下一个请求立即重新试探。"""
+        with self.lock:
+            if self.state == 'half_open':
+                self.state = 'open'
+
+    def record_success(self):
+        with self.lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= FAILURE_THRESHOLD:
+                if self.state != 'open':
+                    print(f"  -> [熔断] 端点 '{self.name}' 连续失败 {self.failures} 次，暂停请求 {COOLDOWN:.0f} 秒")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+# --- 内部状态 ---
+_breakers = {}  # 端点名 -> CircuitBreaker
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint):
+    """获取(必要时创建)某个端点的熔断器。"""
+    breaker = _breakers.get(endpoint)
+    if breaker is not None:
+        return breaker
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(endpoint)
+            _breakers[endpoint] = breaker
+    return breaker
+
+
+def backoff_delay(attempt):
+    """第 attempt 次重试前的等待时间：指数增长并加入完全随机抖动(full jitter)，避免多个工作线程同时重试。"""
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY * (2 ** (attempt - 1))))
+
+
+def _next_delay(error, breaker, counters):
+    """
+    记录一次失败尝试并决定是否继续重试。一次调用只在重试用完时向熔断器记一次失败。
+    熔断器处于 half_open 时失败的是那一次试探请求：无论哪种错误都记为失败、重新熔断并直接抛出，
+    否则熔断器会一直停在 half_open，之后的请求(包括本次重试)全部被拒绝。
+    :return: float or None, 需要等待的秒数；None 表示重试次数已用完，应当抛出错误。
+    """
+    probing = breaker.state == 'half_open'
+    kind, limit = ('api', API_ERROR_RETRIES) if isinstance(error, ApiError) else ('transport', TRANSPORT_RETRIES)
+    counters[kind] += 1
+    if counters[kind] > limit or probing:
+        breaker.record_failure()
+        return None
+    return backoff_delay(counters[kind])
+
+
+def call_with_retry(endpoint, attempt, retry_on=None):
+    """
+    按重试策略执行一次请求。
+    :param endpoint: str, 端点名，用于选择熔断器。
+    :param attempt: callable, 执行一次请求：成功时返回结果，传输错误时抛出异常，接口返回码错误时抛出 ApiError。
+    :param retry_on: tuple of exception types or None, 需要重试的错误，默认 RETRYABLE_ERRORS。
+    :return: attempt() 的返回值。重试用完后抛出最后一次的错误；熔断中抛出 CircuitOpenError；
+             其他错误不重试，直接抛出。
+    """
+    breaker = get_breaker(endpoint)
+    retry_on = retry_on or RETRYABLE_ERRORS
+    counters = {'transport': 0, 'api': 0}
+    while True:
+        breaker.before_request()
+        try:
+            result = attempt()
+        except retry_on as e:
+            delay = _next_delay(e, breaker, counters)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            continue
+        except BaseException:
+            breaker.abort_probe()
+            raise
+        breaker.record_success()
+        return result
+
+
+async def call_with_retry_async(endpoint, attempt, retry_on=None):
+    """
+    call_with_retry 的协程版本，attempt 为返回协程的函数，退避时不阻塞事件循环。
+    :param retry_on: tuple of exception types or None, 需要重试的错误，异步客户端需传入自己的传输错误类型。
+    """
+    breaker = get_breaker(endpoint)
+    retry_on = retry_on or RETRYABLE_ERRORS
+    counters = {'transport': 0, 'api': 0}
+    while True:
+        breaker.before_request()
+        try:
+            result = await attempt()
+        except retry_on as e:
+            delay = _next_delay(e, breaker, counters)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            breaker.abort_probe()
+            raise
+        breaker.record_success()
+        return result
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_singer_index.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    歌手索引：从 Singerlist_V2.py 导出的 qq_music_singers.csv (八万多行)一次性构建，
+    按歌手名查 mid 时不必再 grep 整个CSV。索引由几组平行的紧凑数组组成：
+    1. 按 mid 排序的 mid 数组 -> 行号，二分查找 mid -> 歌手名；
+    2. 按规范化歌手名(NFKC、忽略大小写、去掉空格和间隔号等)排序的名字数组 -> 行号，
+       同一个数组上二分即可完成精确查找和前缀查找(起到前缀树的作用，但没有逐节点的对象开销)；
+    3. 规范化歌手名的二元字符组(bigram) -> 行号数组的倒排表，用于模糊查找：先按共同 bigram 数选出候选，
+       再按编辑相似度(difflib)排序。
+    构建结果以普通的列表和数组用 pickle 缓存到磁盘(不依赖类的导入路径)，CSV 的大小或修改时间变化后自动重建。
+    作为脚本运行时，把一份歌手名列表批量解析为 mid，生成 Except_tags&MP3.py 等脚本使用的任务文件。
+"""
+
+# --- 模块导入 ---
+import argparse  # 命令行参数
+import array  # 紧凑的行号数组
+import bisect  # 在排序数组上二分查找
+import csv  # 读写CSV
+import difflib  # 模糊查找时对候选排序
+import os  # 检查缓存是否过期
+import pickle  # 索引的磁盘缓存
+import sys  # 错误输出
+import unicodedata  # 歌手名规范化
+from collections import Counter  # 模糊查找时统计共同的 bigram
+
+# --- 全局配置 (Global Configuration) ---
+SINGER_CSV = 'qq_music_singers.csv'  # Singerlist_V2.py 的输出
+CACHE_SUFFIX = '.index.pickle'  # 索引缓存文件 = CSV 文件名 + 该后缀
+CACHE_VERSION = 2  # 索引结构变化时递增，旧缓存自动失效
+FUZZY_CANDIDATES = 50  # 模糊查找时按共同 bigram 数保留的候选个数
+FUZZY_MIN_SCORE = 0.6  # 模糊查找的最低相似度 (difflib.SequenceMatcher.ratio)
+IGNORED_CHARS = set(' \t·•・.-_\'"()（）')  # 规范化时去掉的字符
+
+
+def normalize_name(name):
+    """规范化歌手名：NFKC(全角转半角等)、忽略大小写、去掉空白和常见分隔符号。"""
+    name = unicodedata.normalize('NFKC', name or '').casefold()
+    return ''.join(ch for ch in name if ch not in IGNORED_CHARS)
+
+
+def bigrams(key):
+    """规范化歌手名的二元字符组；单字的名字返回它本身。"""
+    if len(key) < 2:
+        return {key} if key else set()
+    return {key[i:i + 2] for i in range(len(key) - 1)}
+
+
+class SingerIndex:
+    """
+    不可变的歌手索引。mids/names 为CSV中的原始顺序(分片爬取的顺序，不代表热度)，
+    其余结构都以行号引用这两个数组。
+    """
+
+    # 写入缓存的属性，都是列表、数组和字典
+    STATE_FIELDS = ('mids', 'names', 'sorted_mids', 'mid_rows', 'sorted_keys', 'key_rows', 'postings')
+
+    def __init__(self, mids, names):
+        self.mids = list(mids)
+        self.names = list(names)
+        # mid -> 行号
+        mid_rows = sorted(range(len(self.mids)), key=self.mids.__getitem__)
+        self.sorted_mids = [self.mids[row] for row in mid_rows]
+        self.mid_rows = array.array('I', mid_rows)
+        # 规范化名 -> 行号 (同名时保持CSV顺序)
+        keys = [normalize_name(name) for name in self.names]
+        key_rows = sorted(range(len(keys)), key=lambda row: (keys[row], row))
+        self.sorted_keys = [keys[row] for row in key_rows]
+        self.key_rows = array.array('I', key_rows)
+        # bigram -> 行号数组
+        postings = {}
+        for row, key in enumerate(keys):
+            for gram in bigrams(key):
+                postings.setdefault(gram, array.array('I')).append(row)
+        self.postings = postings
+
+    def __len__(self):
+        return len(self.mids)
+
+    # --- 缓存 ---
+
+    def to_state(self):
+        """导出可 pickle 的普通数据，不包含 SingerIndex 对象本身。"""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+
+    @classmethod
+    def from_state(cls, state):
+        """从 to_state 导出的数据恢复索引，不必重新排序。"""
+        index = cls.__new__(cls)
+        for field in cls.STATE_FIELDS:
+            setattr(index, field, state[field])
+        return index
+
+    @classmethod
+    def from_csv(cls, csv_file):
+        """从歌手CSV (singer_mid, singer_name) 构建索引；同一个 mid 只保留第一次出现的行。"""
+        mids, names, seen = [], [], set()
+        with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                mid = row.get('singer_mid')
+                if mid and mid not in seen:
+                    seen.add(mid)
+                    mids.append(mid)
+                    names.append(row.get('singer_name') or '')
+        return cls(mids, names)
+
+    @classmethod
+    def load(cls, csv_file=SINGER_CSV, cache_file=None):
+        """
+        读取索引：缓存与CSV一致时直接加载缓存，否则从CSV重建并写入缓存。
+        :param cache_file: str or None, 缓存文件，默认为 csv_file + CACHE_SUFFIX。
+        """
+        cache_file = cache_file or csv_file + CACHE_SUFFIX
+        stat = os.stat(csv_file)
+        source = (CACHE_VERSION, stat.st_size, stat.st_mtime_ns)
+        try:
+            with open(cache_file, 'rb') as f:
+                cached_source, state = pickle.load(f)
+            if cached_source == source:
+                return cls.from_state(state)
+        except FileNotFoundError:
+            pass
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError, AttributeError, KeyError) as e:
+            print(f"歌手索引缓存 '{cache_file}' 无法读取，重新构建: {e}", file=sys.stderr)
+        print(f"正在从 '{csv_file}' 构建歌手索引...")
+        index = cls.from_csv(csv_file)
+        try:
+            tmp_file = cache_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                pickle.dump((source, index.to_state()), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"写入歌手索引缓存失败: {e}", file=sys.stderr)
+        return index
+
+    # --- 查找 ---
+
+    def name_of(self, mid):
+        """mid -> 歌手名，未收录时返回None。"""
+        pos = bisect.bisect_left(self.sorted_mids, mid)
+        if pos < len(self.sorted_mids) and self.sorted_mids[pos] == mid:
+            return self.names[self.mid_rows[pos]]
+        return None
+
+    def exact(self, name):
+        """
+        规范化后完全同名的歌手。
+        :return: list of (mid, name)，按CSV中的顺序排列。
+        """
+        key = normalize_name(name)
+        if not key:
+            return []
+        lo = bisect.bisect_left(self.sorted_keys, key)
+        hi = bisect.bisect_right(self.sorted_keys, key, lo)
+        return [(self.mids[row], self.names[row]) for row in self.key_rows[lo:hi]]
+
+    def prefix(self, prefix, limit=20):
+        """
+        规范化名以 prefix 开头的歌手。
+        :return: list of (mid, name)，按规范化名排序，最多 limit 个。
+        """
+        key = normalize_name(prefix)
+        if not key:
+            return []
+        lo = bisect.bisect_left(self.sorted_keys, key)
+        results = []
+        for pos in range(lo, len(self.sorted_keys)):
+            if len(results) >= limit or not self.sorted_keys[pos].startswith(key):
+                break
+            row = self.key_rows[pos]
+            results.append((self.mids[row], self.names[row]))
+        return results
+
+    def fuzzy(self, name, limit=5, min_score=FUZZY_MIN_SCORE):
+        """
+        查找相近的歌手名(错别字、多一个字或少一个字等)：按共同 bigram 数选出 FUZZY_CANDIDATES 个候选，
+        再按规范化名之间的相似度排序。
+        :return: list of (mid, name, score)，score 从高到低，最多 limit 个。
+        """
+        key = normalize_name(name)
+        grams = bigrams(key)
+        if not grams:
+            return []
+        overlap = Counter()
+        for gram in grams:
+            overlap.update(self.postings.get(gram, ()))
+        scored = []
+        matcher = difflib.SequenceMatcher(b=key, autojunk=False)
+        for row, _ in overlap.most_common(FUZZY_CANDIDATES):
+            matcher.set_seq1(normalize_name(self.names[row]))
+            score = matcher.ratio()
+            if score >= min_score:
+                scored.append((-score, row))
+        scored.sort()
+        return [(self.mids[row], self.names[row], -score) for score, row in scored[:limit]]
+
+    def resolve(self, name):
+        """
+        把一个歌手名解析为 mid：先精确查找，找不到时取模糊查找的最佳结果。
+        规范化后同名的歌手有多位时，优先取原始写法完全一致的，其次取CSV中最靠前的。
+        :return: (mid, matched_name, how) 元组，how 为 'exact' / 'fuzzy'；都找不到时返回 (None, None, None)。
+        """
+        matches = self.exact(name)
+        if matches:
+            mid, matched_name = next((match for match in matches if match[1] == name.strip()), matches[0])
+            return mid, matched_name, 'exact'
+        matches = self.fuzzy(name, limit=1)
+        if matches:
+            return matches[0][0], matches[0][1], 'fuzzy'
+        return None, None, None
+
+    def resolve_many(self, names):
+        """批量解析歌手名，返回 歌手名 -> resolve 的结果。"""
+        return {name: self.resolve(name) for name in names}
+
+
+def read_name_list(filepath):
+    """
+    读取待解析的歌手名列表：带 'singer_name' 列(可选 'weight' 列)的CSV，或每行一个歌手名的文本文件。
+    :return: list of (singer_name, weight or None)
+    """
+    with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+        if filepath.lower().endswith('.csv'):
+            reader = csv.DictReader(f)
+            if 'singer_name' not in (reader.fieldnames or ()):
+                print(f"错误：名单文件 '{filepath}' 必须包含 'singer_name' 列。", file=sys.stderr)
+                return []
+            return [(row['singer_name'].strip(), row.get('weight') or None) for row in reader
+                    if (row['singer_name'] or '').strip()]
+        return [(line.strip(), None) for line in f if line.strip()]
+
+
+def build_task_file(index, names_file, output_file, default_weight=1.0, allow_fuzzy=True):
+    """
+    把歌手名单批量解析为 mid，写出任务文件 (singer_mid, singer_name, weight)。
+    :param allow_fuzzy: bool, 是否采用模糊查找的结果；模糊匹配的行会打印出来供人工核对。
+    :return: (写出的行数, 未能解析的歌手名列表)
+    """
+    entries = read_name_list(names_file)
+    resolved = index.resolve_many(name for name, _ in entries)
+    rows, unresolved, seen = [], [], set()
+    for name, weight in entries:
+        mid, matched_name, how = resolved[name]
+        if mid is None or (how == 'fuzzy' and not allow_fuzzy):
+            unresolved.append(name)
+            continue
+        if how == 'fuzzy':
+            print(f"  模糊匹配: '{name}' -> '{matched_name}' ({mid})")
+        if mid in seen:
+            continue
+        seen.add(mid)
+        rows.append((mid, matched_name, weight if weight is not None else default_weight))
+    with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['singer_mid', 'singer_name', 'weight'])
+        writer.writerows(rows)
+    return len(rows), unresolved
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="歌手索引：按歌手名查找 mid，或把歌手名单批量解析为任务文件")
+    parser.add_argument('--csv', default=SINGER_CSV, help=f"歌手列表CSV，默认 {SINGER_CSV}")
+    parser.add_argument('--find', metavar='NAME', help="查找一个歌手名(精确、前缀和模糊匹配)")
+    parser.add_argument('--names', metavar='FILE', help="待解析的歌手名单(每行一个名字，或带 singer_name 列的CSV)")
+    parser.add_argument('--output', default='artists.csv', help="生成的任务文件，默认 artists.csv")
+    parser.add_argument('--weight', type=float, default=1.0, help="名单中未给出权重时使用的权重")
+    parser.add_argument('--no-fuzzy', action='store_true', help="只接受精确匹配")
+    args = parser.parse_args()
+
+    singer_index = SingerIndex.load(args.csv)
+    print(f"歌手索引已就绪，共 {len(singer_index)} 位歌手。")
+    if args.find:
+        print("精确:", singer_index.exact(args.find))
+        print("前缀:", singer_index.prefix(args.find))
+        print("模糊:", singer_index.fuzzy(args.find))
+    if args.names:
+        count, missing = build_task_file(singer_index, args.names, args.output, args.weight, not args.no_fuzzy)
+        print(f"已写出 {count} 位歌手到 {args.output}")
+        if missing:
+            print(f"以下 {len(missing)} 个歌手名未能解析: {missing}", file=sys.stderr)
+    if not args.find and not args.names:
+        parser.print_help()
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_stages.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    逐首歌曲记录各抓取阶段(入库、标签、封面、歌词、评论、音频文件)的完成情况。
+    此前 Except_tags&MP3.py 只要歌曲已在 songs 表中就整首跳过，上次失败的封面、歌词、评论再也补不回来；
+    Base 脚本则对每首歌的每一列单独 SELECT 一次。本模块在数据库中维护 song_stages 表
+    (song_id, stage, done_at)，每处理一页歌曲前一次性批量读出，由 plan_songs 只安排缺失(或已过期)的阶段，
+    补抓时既便宜又完整。
+    没有歌词、没有封面、拿不到下载链接的歌曲记录在 negative_results 表 (song_id, resource, reason,
+    failures, retry_after) 中，在 retry_after 之前 plan_songs 不再安排对应阶段；每连续失败一次，
+    等待时间翻倍(直到 NEGATIVE_MAX_TTL)，永久缺失的资源很快不再消耗请求，但仍会偶尔复查。
+"""
+
+# --- 模块导入 ---
+import sqlite3  # 阶段状态与歌曲数据存放在同一个数据库中
+import sys  # 错误输出
+import time  # 记录阶段完成时间
+
+# --- 抓取阶段 ---
+STAGE_LISTED = 'listed'  # 歌曲基础信息已写入 songs 表
+STAGE_TAGS = 'tags'  # 已根据歌曲详情生成标签
+STAGE_COVER = 'cover'  # 封面已下载
+STAGE_LYRICS = 'lyrics'  # 歌词已存储
+STAGE_COMMENTS = 'comments'  # 评论已完整获取(到达上限或没有更多)
+STAGE_FILE = 'file'  # 音频文件已下载
+
+# --- 全局配置 (Global Configuration) ---
+# 阶段完成后多久视为过期、需要重新安排(秒)；未登记的阶段完成后不再重做。
+# 评论会不断增加，过期后按增量同步只获取新评论。
+STAGE_MAX_AGE = {
+    STAGE_COMMENTS: 7 * 86400,
+}
+QUERY_CHUNK_SIZE = 500  # 批量读取时每条 SQL 的 IN 列表长度，低于 SQLite 的参数个数上限
+NEGATIVE_BASE_TTL = 6 * 3600  # 第一次失败后多久再试(秒)，之后每次失败翻倍
+NEGATIVE_MAX_TTL = 30 * 86400  # 失败重试间隔的上限(秒)
+
+# 某个阶段还没有任何记录时，根据已有数据回填它的完成状态，旧数据库不必从头重抓
+BACKFILL_QUERIES = {
+    STAGE_LISTED: "SELECT song_id FROM songs",
+    STAGE_TAGS: "SELECT song_id FROM songs WHERE tags IS NOT NULL",
+    STAGE_COVER: "SELECT song_id FROM songs WHERE cover_path IS NOT NULL AND cover_path != ''",
+    STAGE_LYRICS: "SELECT song_id FROM songs WHERE lrc IS NOT NULL AND lrc != ''",
+    STAGE_COMMENTS: "SELECT DISTINCT song_id FROM comments",
+    # 'UNAVAILABLE' 是旧版本标记的无法下载，改由 negative_results 决定何时复查
+    STAGE_FILE: "SELECT song_id FROM songs WHERE file_path IS NOT NULL AND file_path NOT IN ('', 'UNAVAILABLE')",
+}
+# 回填查询依赖的 songs 列：另一个脚本建的库可能没有这一列(如 Except_tags&MP3.py 的库没有 file_path)，此时跳过回填
+BACKFILL_COLUMNS = {
+    STAGE_TAGS: 'tags',
+    STAGE_COVER: 'cover_path',
+    STAGE_LYRICS: 'lrc',
+    STAGE_FILE: 'file_path',
+}
+
+
+def init_table(cursor, stages):
+    """
+    创建 song_stages 和 negative_results 表；
+    stages 中还没有任何记录的阶段按 BACKFILL_QUERIES 从已有数据回填(两个脚本共用一个库时，
+    另一个脚本不执行的阶段也能补上)，songs 表缺少对应列的阶段跳过。
+    在脚本的 init_environment 中、'songs' 和 'comments' 表创建之后调用。
+    :param cursor: sqlite3.Cursor
+    :param stages: sequence of str, 该脚本会执行的阶段。
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS song_stages (
+        song_id TEXT NOT NULL,
+        stage TEXT NOT NULL,
+        done_at REAL,
+        PRIMARY KEY (song_id, stage)
+    )''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS negative_results (
+        song_id TEXT NOT NULL,
+        resource TEXT NOT NULL,
+        reason TEXT,
+        failures INTEGER NOT NULL DEFAULT 1,
+        retry_after REAL,
+        PRIMARY KEY (song_id, resource)
+    )''')
+    song_columns = {row[1] for row in cursor.execute("PRAGMA table_info(songs)")}
+    now = time.time()
+    for stage in stages:
+        if cursor.execute("SELECT 1 FROM song_stages WHERE stage = ? LIMIT 1", (stage,)).fetchone():
+            continue
+        column = BACKFILL_COLUMNS.get(stage)
+        if column is not None and column not in song_columns:
+            continue
+        cursor.execute(f"INSERT OR IGNORE INTO song_stages (song_id, stage, done_at) "
+                       f"SELECT song_id, ?, ? FROM ({BACKFILL_QUERIES[stage]})", (stage, now))
+
+
+def _select_chunked(conn, query, song_ids, params=()):
+    """按 QUERY_CHUNK_SIZE 分块执行带 'song_id IN (...)' 条件的查询，query 中用 {ids} 表示占位符列表。"""
+    for start in range(0, len(song_ids), QUERY_CHUNK_SIZE):
+        chunk = song_ids[start:start + QUERY_CHUNK_SIZE]
+        yield from conn.execute(query.format(ids=','.join('?' * len(chunk))), list(chunk) + list(params))
+
+
+def load_status(db_file, song_ids, now=None):
+    """
+    批量读取一组歌曲的阶段状态，以及仍在等待期内的失败记录。
+    :param db_file: str, 数据库文件。
+    :param song_ids: iterable of str, 歌曲 mid。
+    :return: (status, blocked) 元组。status 为 歌曲 mid -> {阶段: 完成时间}；
+             blocked 为 歌曲 mid -> 暂不重试的阶段集合。没有记录的歌曲不出现在结果中。
+    """
+    now = time.time() if now is None else now
+    song_ids = list(song_ids)
+    status, blocked = {}, {}
+    try:
+        with sqlite3.connect(db_file) as conn:
+            for song_id, stage, done_at in _select_chunked(
+                    conn, "SELECT song_id, stage, done_at FROM song_stages WHERE song_id IN ({ids})", song_ids):
+                status.setdefault(song_id, {})[stage] = done_at
+            for song_id, resource in _select_chunked(
+                    conn, "SELECT song_id, resource FROM negative_results WHERE song_id IN ({ids}) AND retry_after > ?",
+                    song_ids, (now,)):
+                blocked.setdefault(song_id, set()).add(resource)
+    except sqlite3.Error as e:
+        print(f"读取歌曲阶段状态失败: {e}", file=sys.stderr)
+    return status, blocked
+
+
+def missing_stages(song_status, stages, now=None):
+    """
+    返回一首歌尚未完成(或已过期)的阶段。
+    :param song_status: dict, 阶段 -> 完成时间。
+    :param stages: sequence of str, 需要检查的阶段，结果保持这个顺序。
+    :return: tuple of str
+    """
+    now = time.time() if now is None else now
+    missing = []
+    for stage in stages:
+        done_at = song_status.get(stage)
+        max_age = STAGE_MAX_AGE.get(stage)
+        if done_at is None or (max_age is not None and now - done_at > max_age):
+            missing.append(stage)
+    return tuple(missing)
+
+
+def plan_songs(db_file, song_ids, stages):
+    """
+    为一组歌曲安排需要执行的阶段：一次批量读取状态，只安排缺失或过期、且不在失败等待期内的阶段。
+    :param db_file: str, 数据库文件。
+    :param song_ids: iterable of str, 歌曲 mid。
+    :param stages: sequence of str, 脚本会执行的阶段。
+    :return: dict, 歌曲 mid -> 需要执行的阶段元组(为空表示整首歌都已完成)。
+    """
+    song_ids = [song_id for song_id in song_ids if song_id]
+    now = time.time()
+    status, blocked = load_status(db_file, song_ids, now)
+    plan = {}
+    for song_id in song_ids:
+        waiting = blocked.get(song_id, ())
+        plan[song_id] = tuple(stage for stage in missing_stages(status.get(song_id, {}), stages, now)
+                              if stage not in waiting)
+    return plan
+
+
+def mark_done(db_file, song_id, *stages):
+    """记录一首歌的若干阶段已完成，并清除这些阶段的失败记录。"""
+    now = time.time()
+    try:
+        with sqlite3.connect(db_file) as conn:
+            conn.executemany("INSERT OR REPLACE INTO song_stages (song_id, stage, done_at) VALUES (?, ?, ?)",
+                             [(song_id, stage, now) for stage in stages])
+            conn.executemany("DELETE FROM negative_results WHERE song_id = ? AND resource = ?",
+                             [(song_id, stage) for stage in stages])
+    except sqlite3.Error as e:
+        print(f"记录歌曲阶段状态失败: {e}", file=sys.stderr)
+
+
+def negative_ttl(failures):
+    """连续失败 failures 次后的等待时间(秒): NEGATIVE_BASE_TTL * 2^(failures-1)，不超过 NEGATIVE_MAX_TTL。"""
+    return min(NEGATIVE_BASE_TTL * 2 ** (max(failures, 1) - 1), NEGATIVE_MAX_TTL)
+
+
+def record_miss(db_file, song_id, resource, reason):
+    """
+    记录一首歌的某项资源没有取到(没有歌词、没有封面、拿不到下载链接……)，等待期内 plan_songs 不再安排该阶段。
+    :param db_file: str, 数据库文件。
+    :param song_id: str, 歌曲 mid。
+    :param resource: str, 对应的阶段，如 STAGE_LYRICS。
+    :param reason: str, 失败原因，仅供查看。
+    :return: float, 下一次重试的时间戳；记录失败时返回None。
+    """
+    now = time.time()
+    try:
+        with sqlite3.connect(db_file) as conn:
+            row = conn.execute("SELECT failures FROM negative_results WHERE song_id = ? AND resource = ?",
+                               (song_id, resource)).fetchone()
+            failures = row[0] + 1 if row else 1
+            retry_after = now + negative_ttl(failures)
+            conn.execute("INSERT OR REPLACE INTO negative_results (song_id, resource, reason, failures, retry_after) "
+                         "VALUES (?, ?, ?, ?, ?)", (song_id, resource, reason, failures, retry_after))
+        return retry_after
+    except sqlite3.Error as e:
+        print(f"记录失败结果失败: {e}", file=sys.stderr)
+        return None
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+@Project: QQ Music Scraper (Pro Version - Artist Edition)
+@File:    qq_music_tasks.py
+@Author:
+@Date:    2026-10-16
+@Description:
+    歌手任务文件(artists.csv / artists.xlsx / test.csv，以及 Singerlist_V2.py 导出的 qq_music_singers.csv)
+    的流式读取，取代各脚本中用 pandas 一次性读入整个文件、再在 DataFrame 和字典列表之间来回转换的做法。
+    1. CSV 用标准库逐行读取，XLSX 用 openpyxl 的只读模式逐行读取，内存占用与文件大小无关；
+    2. 权重列可以叫 'weight' 或 'song_weight'，支持 0.3 / 30% 两种写法，统一为 0~1 之间的小数；
+    3. singer_mid 为空的行跳过；同一歌手重复出现时只保留第一次，除非后面要求更大的权重；
+    4. 支持 --offset/--limit 截取任务，以及 --shard K/N 按 singer_mid 的稳定哈希分片，多台机器各跑一片。
+"""
+
+# --- 模块导入 ---
+import csv  # 逐行读取CSV
+import math  # 判断 NaN 权重
+import sys  # 错误输出
+import zlib  # 稳定的 singer_mid 哈希 (crc32)，不受 PYTHONHASHSEED 影响
+from collections import namedtuple  # 任务记录
+
+# --- 全局配置 (Global Configuration) ---
+CHUNK_SIZE = 1000  # chunks() 默认每块的任务数
+WEIGHT_COLUMNS = ('weight', 'song_weight')  # 按顺序查找的权重列名
+
+# 一条歌手任务: 歌手 mid、抓取权重 (0~1)
+Task = namedtuple('Task', ['singer_mid', 'weight'])
+
+
+def parse_weight(value):
+    """
+    把权重单元格统一为 0~1 之间的小数：'30%' -> 0.3，超出范围的截断到 [0, 1]。
+    :return: float，为空或无法解析时返回None。
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return None
+        try:
+            weight = float(text[:-1]) / 100 if text.endswith('%') else float(text)
+        except ValueError:
+            return None
+    else:
+        weight = float(value)
+    if math.isnan(weight):
+        return None
+    return min(max(weight, 0.0), 1.0)
+
+
+def shard_of(singer_mid, shard_count):
+    """singer_mid 所属的分片编号 (0 ~ shard_count-1)。"""
+    return zlib.crc32(singer_mid.encode('utf-8')) % shard_count
+
+
+def parse_shard(text):
+    """解析 'K/N' 形式的分片参数，供 argparse 使用。"""
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise ValueError(f"分片参数应为 K/N 形式，如 0/4: {text}")
+    if count <= 0 or not 0 <= index < count:
+        raise ValueError(f"分片编号应满足 0 <= K < N: {text}")
+    return index, count
+
+
+def _iter_csv_rows(filepath):
+    """逐行产出CSV的单元格列表，第一行为表头。"""
+    with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+        yield from csv.reader(f)
+
+
+def _iter_xlsx_rows(filepath):
+    """用 openpyxl 的只读模式逐行产出第一个工作表的单元格值，第一行为表头。"""
+    import openpyxl  # 读取Excel (pandas 读写 .xlsx 时同样依赖它)
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+class TaskSource:
+    """
+    歌手任务文件的流式读取器。可以多次迭代，每次都从文件头重新读取。
+    """
+
+    def __init__(self, filepath, offset=0, limit=None, shard=None, default_weight=None):
+        """
+        :param filepath: str, .csv 或 .xlsx 文件，必须包含 'singer_mid' 列。
+        :param offset: int, 跳过(去重、分片筛选之后的)前 offset 个任务。
+        :param limit: int or None, 最多产出的任务数。
+        :param shard: (K, N) or None, 只产出 shard_of(singer_mid, N) == K 的任务。
+        :param default_weight: float or None, 没有权重列(或权重为空)时使用的权重；为None时这样的行被跳过。
+        :raises ValueError: 文件缺少 'singer_mid' 列，或既没有权重列也没有给出 default_weight。
+        """
+        self.filepath = filepath
+        self.offset = offset or 0
+        self.limit = limit
+        self.shard = shard
+        self.default_weight = default_weight
+        rows = self._rows()
+        header = next(rows, None) or ()
+        rows.close()
+        self.columns = [str(name).strip() if name is not None else '' for name in header]
+        if 'singer_mid' not in self.columns:
+            raise ValueError(f"输入文件 '{filepath}' 必须包含 'singer_mid' 列。")
+        self.weight_column = next((name for name in WEIGHT_COLUMNS if name in self.columns), None)
+        if self.weight_column is None and default_weight is None:
+            raise ValueError(f"输入文件 '{filepath}' 必须包含 {' 或 '.join(WEIGHT_COLUMNS)} 列。")
+
+    def _rows(self):
+        if self.filepath.lower().endswith('.xlsx'):
+            return _iter_xlsx_rows(self.filepath)
+        return _iter_csv_rows(self.filepath)
+
+    def __iter__(self):
+        mid_col = self.columns.index('singer_mid')
+        weight_col = self.columns.index(self.weight_column) if self.weight_column else None
+        emitted_weights = {}  # 已产出的 singer_mid -> 权重，用于去重
+        skipped = produced = 0
+        rows = self._rows()
+        next(rows, None)  # 表头
+        for line, row in enumerate(rows, 2):
+            mid = row[mid_col] if mid_col < len(row) else None
+            mid = str(mid).strip() if mid is not None else ''
+            if not mid:
+                continue
+            weight = parse_weight(row[weight_col]) if weight_col is not None and weight_col < len(row) else None
+            if weight is None:
+                weight = self.default_weight
+                if weight is None:
+                    print(f"输入文件第 {line} 行的权重为空或无法解析，跳过: {mid}", file=sys.stderr)
+                    continue
+            # 重复的歌手只有要求更大的权重时才再次产出(脚本会从上次处理到的位置继续)
+            previous = emitted_weights.get(mid)
+            if previous is not None and weight <= previous:
+                continue
+            if self.shard is not None and shard_of(mid, self.shard[1]) != self.shard[0]:
+                continue
+            emitted_weights[mid] = weight
+            if skipped < self.offset:
+                skipped += 1
+                continue
+            if self.limit is not None and produced >= self.limit:
+                break
+            produced += 1
+            yield Task(mid, weight)
+
+    def chunks(self, size=CHUNK_SIZE):
+        """按 size 个任务一块产出任务列表。"""
+        chunk = []
+        for task in self:
+            chunk.append(task)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def describe(self):
+        """本次任务选择的文字说明，供脚本打印。"""
+        parts = [f"输入文件 '{self.filepath}'"]
+        if self.shard is not None:
+            parts.append(f"分片 {self.shard[0]}/{self.shard[1]}")
+        if self.offset:
+            parts.append(f"跳过前 {self.offset} 个任务")
+        if self.limit is not None:
+            parts.append(f"最多 {self.limit} 个任务")
+        return '，'.join(parts)
+
+
+def add_arguments(parser, default_weight=None):
+    """
+    为脚本的命令行添加任务选择参数: --input、--offset、--limit、--shard、--default-weight。
+    :param default_weight: float or None, --default-weight 的默认值。
+    """
+    parser.add_argument('--input', metavar='FILE', help="歌手任务文件 (.csv / .xlsx)")
+    parser.add_argument('--offset', type=int, default=0, help="跳过前 N 个任务")
+    parser.add_argument('--limit', type=int, default=None, help="最多处理 N 个任务")
+    parser.add_argument('--shard', type=parse_shard, default=None, metavar='K/N',
+                        help="只处理 singer_mid 哈希后属于第 K 片(共 N 片)的任务，如 0/4")
+    parser.add_argument('--default-weight', type=parse_weight, default=default_weight, metavar='W',
+                        help="任务文件没有权重列或权重为空时使用的权重" +
+                             ("" if default_weight is None else f"，默认 {default_weight}"))
+
+
+def from_args(args, filepath, default_weight=None):
+    """
+    按 add_arguments 添加的命令行参数创建 TaskSource；文件不合法时打印错误并退出。
+    :param args: argparse.Namespace or None, 为None时不做任何截取或分片。
+    :param filepath: str, 任务文件 (args.input 为空时由脚本自行决定的默认文件)。
+    :param default_weight: float or None, args 为None时使用的默认权重。
+    """
+    if args is not None:
+        filepath = args.input or filepath
+    try:
+        if args is None:
+            return TaskSource(filepath, default_weight=default_weight)
+        return TaskSource(filepath, offset=args.offset, limit=args.limit, shard=args.shard,
+                          default_weight=args.default_weight)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"读取或解析输入文件 '{filepath}' 时出错: {e}", file=sys.stderr)
+        sys.exit(1)